@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+INITIAL_LIMIT = 8
+MIN_LIMIT = 2
+MAX_LIMIT = 32
+TARGET_LATENCY = 1.5 # Seconds; slower listings stop the limit from growing
+LATENCY_SMOOTHING = 0.2 # EWMA weight of the newest latency sample
+DECREASE_FACTOR = 0.5
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on concurrent requests
+    to one host. Every healthy response grows the limit by about one per
+    round trip; a timeout, connection error or 5xx halves it, at most once
+    per round trip so a burst of failures from one overload counts once.
+    """
+
+    def __init__(self, initial=INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=MAX_LIMIT,
+                 target_latency=TARGET_LATENCY):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.target_latency = target_latency
+        self.latency = None # Smoothed seconds per request
+        self.inflight = 0
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.condition = None # Created lazily inside the running loop
+
+    def current_limit(self):
+        return int(self.limit)
+
+    def on_success(self, seconds):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += LATENCY_SMOOTHING * (seconds - self.latency)
+        if self.latency > 2 * self.target_latency:
+            # Server is queueing our requests: treat as congestion
+            self.on_congestion()
+        elif self.latency <= self.target_latency and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.increases += 1
+
+    def on_congestion(self, now=None):
+        now = time.monotonic() if now is None else now
+        window = self.latency or self.target_latency
+        if now - self.last_decrease < window:
+            return
+        self.last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * DECREASE_FACTOR)
+        self.decreases += 1
+
+    async def acquire(self):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.inflight < self.current_limit())
+            self.inflight += 1
+
+    async def release(self, seconds, congested):
+        """Returns a slot; congested is True for timeouts, connection errors and 5xx."""
+        if congested:
+            self.on_congestion()
+        else:
+            self.on_success(seconds)
+        async with self.condition:
+            self.inflight -= 1
+            self.condition.notify_all()
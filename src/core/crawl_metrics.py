@@ -0,0 +1,168 @@
+import json
+import heapq
+import threading
+import time
+
+SLOWEST_KEPT = 10 # Directories listed in the "slowest" section
+
+class CrawlMetrics:
+    """
+    Thread-safe registry of per-request crawl measurements.
+    The crawler records fetch/parse/emit timings, the UI records DB writes,
+    and summary()/report() turn them into rates and percentiles.
+    A per-root registry forwards everything to its parent, the crawl-wide one.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.finished = None
+        self.directories = 0
+        self.files = 0
+        self.errors = 0
+        self.retries = 0
+        self.duplicates = 0 # Links to directories already queued, not fetched again
+        self.batched = 0 # Directories listed by another directory's request (h5ai)
+        self.links = 0 # Entries (files and folders) parsed out of listings
+        self.bytes = 0
+        self.fetch_times = []
+        self.parse_times = []
+        self.fetch_total = 0.0
+        self.parse_total = 0.0
+        self.emit_total = 0.0
+        self.db_total = 0.0
+        self.db_writes = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self.slowest = [] # min-heap of (fetch_s, url)
+        self.status_counts = {}
+
+    def fetch_started(self):
+        with self.lock:
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+        if self.parent:
+            self.parent.fetch_started()
+
+    def fetch_finished(self, url, seconds, size, status, retries=0):
+        if self.parent:
+            self.parent.fetch_finished(url, seconds, size, status, retries)
+        with self.lock:
+            self.inflight -= 1
+            self.fetch_times.append(seconds)
+            self.fetch_total += seconds
+            self.bytes += size
+            self.retries += retries
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            if status == 304:
+                return # Not modified since the last refresh: neither listed nor failed
+            if status != 200:
+                self.errors += 1
+                return
+            self.directories += 1
+            if len(self.slowest) < SLOWEST_KEPT:
+                heapq.heappush(self.slowest, (seconds, url))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, url))
+
+    def record_parse(self, seconds, links):
+        with self.lock:
+            self.parse_times.append(seconds)
+            self.parse_total += seconds
+            self.links += links
+        if self.parent:
+            self.parent.record_parse(seconds, links)
+
+    def record_files(self, count, emit_seconds):
+        with self.lock:
+            self.files += count
+            self.emit_total += emit_seconds
+        if self.parent:
+            self.parent.record_files(count, emit_seconds)
+
+    def record_batched(self, count):
+        with self.lock:
+            self.directories += count
+            self.batched += count
+        if self.parent:
+            self.parent.record_batched(count)
+
+    def record_duplicate(self):
+        with self.lock:
+            self.duplicates += 1
+        if self.parent:
+            self.parent.record_duplicate()
+
+    def record_db(self, seconds):
+        with self.lock:
+            self.db_writes += 1
+            self.db_total += seconds
+        if self.parent:
+            self.parent.record_db(seconds)
+
+    def finish(self):
+        with self.lock:
+            self.finished = time.monotonic()
+
+    @staticmethod
+    def _percentile(samples, pct):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)]
+
+    def summary(self):
+        with self.lock:
+            elapsed = max((self.finished or time.monotonic()) - self.started, 1e-9)
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "directories": self.directories,
+                "files": self.files,
+                "links": self.links,
+                "errors": self.errors,
+                "duplicates_skipped": self.duplicates,
+                "directories_per_s": round(self.directories / elapsed, 2),
+                "files_per_s": round(self.files / elapsed, 2),
+                "fetch_p95_ms": round(self._percentile(self.fetch_times, 95) * 1000, 1),
+                "inflight": self.inflight,
+            }
+
+    def summary_text(self):
+        s = self.summary()
+        return (f"{s['directories']} dirs ({s['directories_per_s']}/s), "
+                f"{s['files']} files ({s['files_per_s']}/s), {s['links']} links, "
+                f"p95 fetch {s['fetch_p95_ms']} ms, {s['errors']} errors, "
+                f"{s['duplicates_skipped']} duplicates skipped, {s['inflight']} in flight")
+
+    def report(self):
+        report = self.summary()
+        with self.lock:
+            report.update({
+                "bytes": self.bytes,
+                "retries": self.retries,
+                "batched_directories": self.batched,
+                "max_inflight": self.max_inflight,
+                "status_counts": {str(k): v for k, v in self.status_counts.items()},
+                "fetch_p50_ms": round(self._percentile(self.fetch_times, 50) * 1000, 1),
+                "parse_p50_ms": round(self._percentile(self.parse_times, 50) * 1000, 2),
+                "parse_p95_ms": round(self._percentile(self.parse_times, 95) * 1000, 2),
+                # Where the time went (seconds summed over all requests)
+                "time_breakdown_s": {
+                    "network": round(self.fetch_total, 3),
+                    "parse": round(self.parse_total, 3),
+                    "signal_emit": round(self.emit_total, 3),
+                    "db_write": round(self.db_total, 3),
+                },
+                "db_writes": self.db_writes,
+                "slowest_directories": [{"url": url, "fetch_ms": round(s * 1000, 1)}
+                                        for s, url in sorted(self.slowest, reverse=True)],
+            })
+        return report
+
+    def write_report(self, path):
+        try:
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=2)
+        except OSError as e:
+            print(f"Failed to write crawl report: {e}")
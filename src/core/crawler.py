@@ -0,0 +1,716 @@
+"""
+Qt-free crawl engine. Crawler walks the directory listings of one or more
+DhakaFlix roots (over HTTP, or FTP with protocol = "ftp") and reports through overridable on_* hooks; HttpClient
+turns those into Qt signals for the GUI and src/indexer.py into JSON lines.
+"""
+
+import aiohttp
+import asyncio
+import ftplib
+import hashlib
+import itertools
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import time
+import urllib.parse
+from src.core import ftp_listing, h5ai
+from src.core.crawl_metrics import CrawlMetrics
+from src.core.crawl_concurrency import AimdController, INITIAL_LIMIT, MAX_LIMIT
+from src.core.listing_parser import extract_entries, DEFAULT_BACKEND
+from src.core.url_dedup import VisitedSet, canonical_url
+
+SUMMARY_INTERVAL = 2.0 # Seconds between live metric summaries
+PARSE_OFFLOAD_BYTES = 256 * 1024 # Listings at least this big are parsed off the event loop
+PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+PER_HOST_LIMIT = MAX_LIMIT # Ceiling for concurrent requests per server, shared by the roots it hosts
+KEEPALIVE_SECS = 30 # Listings come in bursts; keep connections warm between them
+DNS_CACHE_SECS = 600
+# Big listings can take a while to arrive; a stalled socket should not
+CRAWL_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=5, sock_read=15)
+MAX_RETRIES = 3 # Extra attempts for a directory before it is filed as failed
+RETRY_BASE_DELAY = 1.0 # Seconds; doubles every attempt
+RETRY_MAX_DELAY = 30.0
+BOOSTED, NORMAL = 0, 1 # Frontier priorities; lower is crawled first
+MAX_BOOSTS = 16 # Most recent boosted folders/search terms kept
+
+class FetchError(Exception):
+    """A directory listing could not be fetched; status is 0 for network errors."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retriable(self):
+        # Timeouts, connection errors, overload; a 404 will not fix itself
+        return self.status == 0 or self.status == 429 or self.status >= 500
+
+# Sibling DhakaFlix roots; each is crawled concurrently into the same index
+DEFAULT_ROOTS = [
+    "http://172.16.50.7/DHAKA-FLIX-7/",
+    "http://172.16.50.9/DHAKA-FLIX-9/",
+    "http://172.16.50.12/DHAKA-FLIX-12/",
+    "http://172.16.50.14/DHAKA-FLIX-14/",
+]
+
+def root_label(root):
+    """Short name for a root in progress messages, e.g. DHAKA-FLIX-7."""
+    return root.rstrip('/').rsplit('/', 1)[-1] or root
+
+class Crawler:
+    def __init__(self, base_url="http://172.16.50.9/DHAKA-FLIX-9/", parser_backend=DEFAULT_BACKEND,
+                 parse_pool="process", offload_threshold=PARSE_OFFLOAD_BYTES, roots=None, timeout=None):
+        super().__init__()
+        self.base_url = base_url
+        self.roots = list(roots) if roots else [base_url]
+        self.parser_backend = parser_backend # See listing_parser.available_backends()
+        self.parse_pool_kind = parse_pool # "process", "thread" or None to always parse inline
+        self.offload_threshold = offload_threshold
+        self.parse_pool = None
+        self.stop_requested = False
+        self.aborted = False # The last scan died on an unexpected error
+        self.concurrency = INITIAL_LIMIT # Starting per-host limit, adapted while crawling
+        self.per_host_limit = PER_HOST_LIMIT
+        self.timeout = timeout or CRAWL_TIMEOUT
+        self.controllers = {} # host -> AimdController
+        self.max_retries = MAX_RETRIES
+        self.retry_base_delay = RETRY_BASE_DELAY
+        self.snapshot_store = None # SnapshotStore to record raw listings into
+        self.replay_store = None # SnapshotStore to read listings from instead of the network
+        self.listing_mode = "auto" # "auto" (h5ai JSON where the server has it, else HTML), "h5ai" or "html"
+        self.h5ai_hosts = {} # host -> whether its h5ai JSON API answered
+        self.protocol = "http" # "http" or "ftp": how listings are fetched; files are indexed by HTTP URL either way
+        self.ftp_port = ftp_listing.FTP_PORT
+        self.ftp_connections = ftp_listing.FTP_CONNECTIONS # Per server
+        self.ftp_pools = {} # host -> FtpPool
+        self.ftp_executor = None # Threads running the blocking ftplib calls
+        self.snapshot_executor = None # Thread compressing and writing snapshots off the event loop
+        self.max_depth = 10
+        self.fold_case = True # Treat /Movies/ and /movies/ as one folder (the servers don't care)
+        self.bloom_capacity = None # Expected directories; set to use a Bloom filter for the visited set
+        self.loop = None
+        self.tasks = []
+        self.visited = VisitedSet()
+        self.queues = {} # root -> PriorityQueue of (priority, seq, url)
+        self.pending = {} # root -> {url: (priority, depth, attempt)} for every queued directory
+        self.sequence = itertools.count() # FIFO order within a priority
+        self.boosts = [] # Canonical folder URLs the user is looking at
+        self.boost_terms = [] # Lower-case folder name fragments the user searched for
+        self.metrics = CrawlMetrics() # All roots
+        self.root_metrics = {} # root -> CrawlMetrics feeding into self.metrics
+        self.last_summary = 0.0
+        self.failed_urls = [] # Directories that could not be listed in the last scan
+
+    # Hooks; the defaults print, subclasses forward them (Qt signals, JSON lines)
+    def on_progress(self, message):
+        print(message)
+
+    def on_file(self, data):
+        pass
+
+    def on_directory_done(self, root, url, ok, children):
+        """children is [(subdir_url, depth), ...] queued from this directory."""
+        pass
+
+    def on_directory_failed(self, root, url, depth, status, error):
+        pass
+
+    def on_summary(self):
+        """Called every SUMMARY_INTERVAL while crawling."""
+        if len(self.root_metrics) > 1:
+            for root, metrics in self.root_metrics.items():
+                self.on_progress(f"{root_label(root)}: {metrics.summary_text()}")
+        self.on_progress(f"{self.metrics.summary_text()}, {self.concurrency_text()}")
+
+    def on_finished(self):
+        pass
+
+    def scan_server(self, resume=None):
+        """
+        Crawls every root concurrently. resume maps root -> (pending [(url, depth)],
+        visited {url}) for roots continuing an interrupted crawl; when it is given
+        only those roots are crawled.
+        """
+        roots = list(resume) if resume else self.roots
+        resume = resume or {}
+        self.stop_requested = False
+        self.aborted = False
+        self.tasks = []
+        self.failed_urls = []
+        self.visited = VisitedSet(fold_case=self.fold_case, bloom_capacity=self.bloom_capacity)
+        self.queues = {}
+        self.pending = {}
+        self.boosts = []
+        self.boost_terms = []
+        self.metrics = CrawlMetrics()
+        self.root_metrics = {root: CrawlMetrics(parent=self.metrics) for root in roots}
+        self.last_summary = time.monotonic()
+        for root in roots:
+            if root in resume:
+                self.on_progress(f"Resuming scan of {root} ({len(resume[root][0])} folders left)...")
+            else:
+                self.on_progress(f"Starting async scan of {root}...")
+        
+        try:
+            asyncio.run(self._run_crawl(roots, resume))
+        except asyncio.CancelledError:
+             self.on_progress("Scan cancelled.")
+        except Exception as e:
+            # Whatever was not reached is not gone from the server; don't let the index sweep it
+            self.aborted = True
+            self.on_progress(f"Error: {e}")
+        
+        self.metrics.finish()
+        if len(roots) > 1:
+            for root in roots:
+                self.on_progress(f"{root_label(root)}: {self.root_metrics[root].summary_text()}")
+        self.on_progress(f"Scan complete. {self.metrics.summary_text()}, {self.concurrency_text()}")
+        self.on_finished()
+
+    def _open_session(self, roots):
+        """Session and per-host controllers for a crawl of roots; call from the event loop."""
+        self.loop = asyncio.get_running_loop()
+        # One controller per host so two roots on one server share its budget
+        self.controllers = {}
+        for root in roots:
+            host = urllib.parse.urlsplit(root).netloc
+            if host not in self.controllers:
+                self.controllers[host] = AimdController(initial=self.concurrency, maximum=self.per_host_limit)
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.per_host_limit,
+                                         keepalive_timeout=KEEPALIVE_SECS, ttl_dns_cache=DNS_CACHE_SECS)
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    def _close_crawl(self):
+        self.loop = None
+        if self.snapshot_executor:
+            self.snapshot_executor.shutdown(wait=True) # Every fetched listing reaches the store
+            self.snapshot_executor = None
+        if self.snapshot_store is not None:
+            self.snapshot_store.flush()
+        if self.parse_pool:
+            self.parse_pool.shutdown(wait=False, cancel_futures=True)
+            self.parse_pool = None
+        for pool in self.ftp_pools.values():
+            pool.close()
+        self.ftp_pools = {}
+        if self.ftp_executor:
+            self.ftp_executor.shutdown(wait=False, cancel_futures=True)
+            self.ftp_executor = None
+
+    async def _run_crawl(self, roots, resume):
+        try:
+            async with self._open_session(roots) as session:
+                await asyncio.gather(*(self._crawl_root(session, root, *resume.get(root, ([(root, 0)], ())))
+                                       for root in roots))
+        finally:
+            self._close_crawl()
+
+    def refresh_subtree(self, url, depth=1, cache=None):
+        """
+        Re-lists url and its subfolders down to depth levels below it, leaving
+        the rest of the index alone. cache (an IndexWriter) supplies each
+        folder's ETag/Last-Modified for conditional requests, plus the known
+        subfolders of folders that come back unchanged. Returns one dict per
+        folder: url, status ("listed", "not_modified" or "failed"), files,
+        subdirs, etag, last_modified and digest.
+        """
+        root = next((r for r in self.roots if url.startswith(r)), url)
+        self.stop_requested = False
+        self.tasks = []
+        self.failed_urls = []
+        self.metrics = CrawlMetrics()
+        self.root_metrics = {root: CrawlMetrics(parent=self.metrics)}
+        try:
+            results = asyncio.run(self._run_refresh(root, url, depth, cache))
+        except asyncio.CancelledError:
+            self.on_progress("Refresh cancelled.")
+            results = []
+        self.metrics.finish()
+        return results
+
+    async def _run_refresh(self, root, url, depth, cache):
+        metrics = self.root_metrics[root]
+        root_prefix = canonical_url(root)
+        visited = VisitedSet(fold_case=self.fold_case)
+        visited.add(url)
+        results = []
+        try:
+            async with self._open_session([root]) as session:
+                level = [url]
+                for level_depth in range(depth + 1):
+                    # One level at a time; the host controller still caps requests in flight
+                    batch = asyncio.gather(*(self._refresh_directory(session, root, u, metrics, cache) for u in level))
+                    self.tasks.append(batch)
+                    listings = await batch
+                    results.extend(listings)
+                    if level_depth == depth:
+                        break
+                    level = []
+                    for listing in listings:
+                        for sub_url in listing["subdirs"]:
+                            if canonical_url(sub_url).startswith(root_prefix) and visited.add(sub_url):
+                                level.append(sub_url)
+                    if not level:
+                        break
+        finally:
+            self._close_crawl()
+        return results
+
+    async def _refresh_directory(self, session, root, url, metrics, cache):
+        validators = cache.validators(url) if cache else None
+        listing = {"url": url, "status": "failed", "files": [], "subdirs": [],
+                   "etag": None, "last_modified": None, "digest": None}
+        for attempt in range(self.max_retries + 1):
+            try:
+                body, encoding, (etag, last_modified) = await self._get_listing(session, url, metrics, attempt,
+                                                                                 validators)
+                break
+            except FetchError as e:
+                if not e.retriable or attempt == self.max_retries:
+                    self.failed_urls.append(url)
+                    listing["error"] = str(e)
+                    return listing
+                await asyncio.sleep(self.retry_delay(attempt))
+        listing["etag"], listing["last_modified"] = etag, last_modified
+        if body is not None:
+            listing["digest"] = hashlib.sha1(body).hexdigest()
+        # Servers without validators still send the same bytes for an unchanged folder
+        if body is None or (validators and listing["digest"] == validators[2]):
+            listing["status"] = "not_modified"
+            listing["digest"] = listing["digest"] or validators[2]
+            listing["subdirs"] = sorted(cache.subdirs(url)) if cache else []
+        else:
+            listing["status"] = "listed"
+            listing["files"], listing["subdirs"] = await self._listing_entries(root, url, body, encoding, metrics)
+        return listing
+
+    async def _crawl_root(self, session, root, frontier, visited):
+        """Runs a pool of workers over one root's queue until it drains or the scan stops."""
+        metrics = self.root_metrics[root]
+        self.visited.update(visited)
+        queue = self.queues[root] = asyncio.PriorityQueue()
+        self.pending[root] = {}
+        for url, depth in frontier:
+            self.visited.add(url)
+            self._enqueue(root, url, depth)
+        # Enough workers for the highest limit; the host's controller decides how many fetch at once
+        workers = [asyncio.create_task(self._worker(session, root, queue, metrics))
+                   for _ in range(self.per_host_limit)]
+        self.tasks.extend(workers)
+        drained = asyncio.create_task(queue.join())
+        await asyncio.wait(workers + [drained], return_when=asyncio.FIRST_COMPLETED)
+        drained.cancel()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(drained, *workers, return_exceptions=True)
+        metrics.finish()
+
+    def _get_parse_pool(self):
+        if self.parse_pool is None:
+            if self.parse_pool_kind == "process":
+                try:
+                    # spawn: never fork a process that has Qt threads running
+                    self.parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                                          mp_context=multiprocessing.get_context("spawn"))
+                except (OSError, ValueError) as e:
+                    print(f"Process pool unavailable ({e}), parsing in threads")
+            if self.parse_pool is None:
+                self.parse_pool = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+        return self.parse_pool
+
+    async def _parse(self, body, encoding, url):
+        if self.parse_pool_kind and len(body) >= self.offload_threshold:
+            # Keep network I/O flowing while a huge listing is parsed elsewhere
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_parse_pool(), extract_entries,
+                                              body, encoding, url, self.parser_backend)
+        return extract_entries(body, encoding, url, self.parser_backend)
+
+    async def _worker(self, session, root, queue, metrics):
+        root_prefix = canonical_url(root)
+        pending = self.pending[root]
+        while not self.stop_requested:
+            priority, _, url = await queue.get()
+            entry = pending.get(url)
+            if entry is None or entry[0] != priority:
+                queue.task_done() # Stale copy of a directory that was boosted after it was queued
+                continue
+            del pending[url]
+            _, depth, attempt = entry
+            handed_off = False
+            try:
+                listings = await self._crawl_directory(session, root, url, metrics, attempt)
+                # An h5ai batch also lists the subfolders; those are done, not queued
+                covered = {canonical_url(dir_url) for dir_url, _ in listings[1:]}
+                accepted = {}
+                for dir_url, subdirs in listings:
+                    dir_depth = depth if dir_url == url else accepted.get(canonical_url(dir_url))
+                    if dir_depth is None:
+                        continue # Beyond max_depth or already reached another way
+                    children = []
+                    for sub_url in subdirs:
+                        # Fetched and stored as the server spells it; the canonical form only
+                        # decides whether './x/', 'x/' and '%78/' are one folder
+                        key = canonical_url(sub_url)
+                        # Stay inside this root; sibling roots have their own workers
+                        if not key.startswith(root_prefix) or dir_depth + 1 > self.max_depth:
+                            continue
+                        if not self.visited.add(sub_url):
+                            metrics.record_duplicate()
+                            continue
+                        children.append((sub_url, dir_depth + 1))
+                        if key in covered:
+                            accepted[key] = dir_depth + 1
+                        else:
+                            self._enqueue(root, sub_url, dir_depth + 1)
+                    # Persisted by the listener so a stopped crawl can resume from here
+                    self.on_directory_done(root, dir_url, True, children)
+            except FetchError as e:
+                if e.retriable and attempt < self.max_retries:
+                    delay = self.retry_delay(attempt)
+                    print(f"Retrying {url} in {delay:.1f}s ({e})")
+                    handed_off = True
+                    self.tasks.append(asyncio.create_task(
+                        self._retry_later(root, url, depth, attempt + 1, delay)))
+                else:
+                    self._give_up(root, url, depth, e.status, str(e))
+            except Exception as e:
+                print(f"Failed to crawl {url}: {e}")
+                self._give_up(root, url, depth, 0, str(e))
+            finally:
+                if not handed_off:
+                    queue.task_done()
+
+    def retry_delay(self, attempt):
+        """Exponential backoff with full jitter, so retries from one outage spread out."""
+        return random.uniform(0, min(RETRY_MAX_DELAY, self.retry_base_delay * 2 ** attempt))
+
+    async def _retry_later(self, root, url, depth, attempt, delay):
+        try:
+            await asyncio.sleep(delay)
+            self._enqueue(root, url, depth, attempt)
+        finally:
+            # The failed attempt stays unfinished until its retry is queued, so the root can't drain early
+            self.queues[root].task_done()
+
+    def _enqueue(self, root, url, depth, attempt=0):
+        priority = BOOSTED if self._is_boosted(url) else NORMAL
+        self.pending[root][url] = (priority, depth, attempt)
+        self.queues[root].put_nowait((priority, next(self.sequence), url))
+
+    def _is_boosted(self, url):
+        key = canonical_url(url)
+        if self.fold_case:
+            key = key.lower()
+        # Ancestors of a boosted folder are on the way to it; descendants are what the user wants to see
+        if any(key.startswith(boost) or boost.startswith(key) for boost in self.boosts):
+            return True
+        if self.boost_terms:
+            name = urllib.parse.unquote(url.rstrip('/').rsplit('/', 1)[-1]).lower()
+            if any(term in name for term in self.boost_terms):
+                self._add_boost(url) # Its subtree follows it
+                return True
+        return False
+
+    def boost(self, url):
+        """
+        Crawls the folder at url (and the way to it) ahead of the rest of the
+        frontier, e.g. when the user expands it. Safe to call from any thread;
+        does nothing when no crawl is running.
+        """
+        self._call_in_loop(self._apply_boost, url, None)
+
+    def boost_matching(self, text):
+        """Like boost() for every folder whose name contains text (a search the user typed)."""
+        text = text.strip().lower()
+        if text:
+            self._call_in_loop(self._apply_boost, None, text)
+
+    def _call_in_loop(self, callback, *args):
+        loop = self.loop
+        if loop:
+            try:
+                loop.call_soon_threadsafe(callback, *args)
+            except RuntimeError:
+                pass # Loop already closed
+
+    def _add_boost(self, url):
+        key = canonical_url(url)
+        if self.fold_case:
+            key = key.lower()
+        if key in self.boosts:
+            self.boosts.remove(key)
+        self.boosts.append(key)
+        del self.boosts[:-MAX_BOOSTS]
+
+    def _apply_boost(self, url, term):
+        if url is not None:
+            self._add_boost(url)
+        else:
+            if term in self.boost_terms:
+                self.boost_terms.remove(term)
+            self.boost_terms.append(term)
+            del self.boost_terms[:-MAX_BOOSTS]
+        # Re-queue what is already waiting; the old copies are skipped when they come up
+        moved = 0
+        for root, pending in self.pending.items():
+            for queued_url, (priority, depth, attempt) in list(pending.items()):
+                if priority != BOOSTED and self._is_boosted(queued_url):
+                    self._enqueue(root, queued_url, depth, attempt)
+                    moved += 1
+        self.on_progress(f"Prioritizing {urllib.parse.unquote(url or term)} ({moved} queued folders moved up)")
+
+    def _give_up(self, root, url, depth, status, error):
+        self.failed_urls.append(url)
+        self.on_directory_failed(root, url, depth, status, error)
+        self.on_directory_done(root, url, False, [])
+
+    async def _get_listing(self, session, url, metrics, attempt=0, validators=None, data=None, quiet=False):
+        """
+        Returns (body, encoding, (etag, last_modified)); raises FetchError when
+        the directory could not be listed. With validators (etag,
+        last_modified, ...) from an earlier listing the request is
+        conditional, and body is None when the server answers 304.
+        data turns it into a JSON POST (the h5ai API); quiet leaves error
+        statuses to the caller to report.
+        """
+        # print(f"Crawling {url}") # Debug
+        controller = self.controllers[urllib.parse.urlsplit(url).netloc]
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        if validators:
+            if validators[0]:
+                headers["If-None-Match"] = validators[0]
+            if validators[1]:
+                headers["If-Modified-Since"] = validators[1]
+        await controller.acquire()
+        metrics.fetch_started()
+        started = time.perf_counter()
+        status, size = 0, 0
+        try:
+            async with session.request("GET" if data is None else "POST", url, headers=headers,
+                                       data=data) as response:
+                status = response.status
+                response_validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                if response.status == 304 and validators:
+                    return None, None, response_validators
+                if response.status != 200:
+                    if not quiet:
+                        print(f"Status {response.status} for {url}")
+                    raise FetchError(response.status, f"HTTP {response.status}")
+                body = await response.read()
+                size = len(body)
+                # print(f"Fetched {size} bytes from {url}") # Debug
+                return body, response.get_encoding(), response_validators
+        except FetchError:
+            raise
+        except Exception as e:
+            print(f"Failed to fetch {url}: {e}")
+            status = 0
+            raise FetchError(0, str(e) or type(e).__name__) from e
+        finally:
+            seconds = time.perf_counter() - started
+            metrics.fetch_finished(url, seconds, size, status, retries=1 if attempt else 0)
+            # Timeouts, refused connections and 5xx mean the server is overloaded
+            await controller.release(seconds, status == 0 or status >= 500)
+
+    def _replay_listing(self, url, metrics):
+        """Like _get_listing, but reads the body recorded by an earlier crawl."""
+        metrics.fetch_started()
+        started = time.perf_counter()
+        listing = self.replay_store.get(url)
+        size = len(listing[0]) if listing else 0
+        metrics.fetch_finished(url, time.perf_counter() - started, size, 200 if listing else 404)
+        if listing is None:
+            raise FetchError(404, "Not in snapshots")
+        return listing
+
+    async def _get_h5ai_listing(self, session, url, metrics, attempt=0):
+        """
+        Lists url through the h5ai JSON API when its server has one. Returns
+        the body, or None when the server should be listed as HTML instead.
+        """
+        host = urllib.parse.urlsplit(url).netloc
+        if self.listing_mode == "html" or self.h5ai_hosts.get(host) is False:
+            return None
+        probing = host not in self.h5ai_hosts and self.listing_mode == "auto"
+        # A refused probe is expected on plain autoindex servers; _get_http_listing reports the fallback
+        body, _, _ = await self._get_listing(session, url, metrics, attempt, data=h5ai.request_body(url),
+                                             quiet=probing)
+        if probing:
+            try:
+                h5ai.parse_items(body, url)
+                self.h5ai_hosts[host] = True
+                self.on_progress(f"{host} has the h5ai API, listing folders as JSON")
+            except ValueError:
+                self._no_h5ai(host)
+                return None
+        return body
+
+    def _no_h5ai(self, host):
+        """Lists host's folders as HTML from now on; says so once."""
+        if host not in self.h5ai_hosts:
+            self.on_progress(f"{host} has no h5ai API, listing folders as HTML")
+        self.h5ai_hosts[host] = False
+
+    async def _get_ftp_listing(self, url, metrics, attempt=0):
+        """Like _get_listing, but lists url's path with MLSD over a pooled FTP connection to its host."""
+        parts = urllib.parse.urlsplit(url)
+        controller = self.controllers[parts.netloc]
+        pool = self.ftp_pools.get(parts.netloc)
+        if pool is None:
+            pool = self.ftp_pools[parts.netloc] = ftp_listing.FtpPool(parts.hostname, self.ftp_port,
+                                                                      self.ftp_connections)
+        if self.ftp_executor is None:
+            self.ftp_executor = ThreadPoolExecutor(max_workers=self.ftp_connections * len(self.controllers))
+        await controller.acquire()
+        metrics.fetch_started()
+        started = time.perf_counter()
+        status, size = 0, 0
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(
+                self.ftp_executor, pool.list_dir, urllib.parse.unquote(parts.path) or "/")
+            status, size = 200, len(body)
+            return body
+        # FTP replies mapped onto the HTTP statuses the rest of the crawler knows
+        except ftplib.error_perm as e:
+            status = 404 # 5xx reply (no such folder, no access, no MLSD): asking again won't help
+            print(f"FTP {e} for {url}")
+            raise FetchError(status, f"FTP {e}") from e
+        except ftplib.error_temp as e:
+            status = 503
+            print(f"FTP {e} for {url}")
+            raise FetchError(status, f"FTP {e}") from e
+        except Exception as e:
+            print(f"Failed to list {url} over FTP: {e}")
+            raise FetchError(0, str(e) or type(e).__name__) from e
+        finally:
+            seconds = time.perf_counter() - started
+            metrics.fetch_finished(url, seconds, size, status, retries=1 if attempt else 0)
+            await controller.release(seconds, status == 0 or status >= 500)
+
+    async def _fetch_listing(self, session, url, metrics, attempt=0):
+        """Returns (body, encoding) from the snapshots, the FTP server, the h5ai API or the HTML page."""
+        if self.replay_store is not None:
+            return self._replay_listing(url, metrics)
+        if self.protocol == "ftp":
+            body, encoding = await self._get_ftp_listing(url, metrics, attempt), ftp_listing.SNAPSHOT_ENCODING
+        else:
+            body, encoding = await self._get_http_listing(session, url, metrics, attempt)
+        if self.snapshot_store is not None:
+            # Compression, hashing and the file write would stall every other fetch
+            if self.snapshot_executor is None:
+                self.snapshot_executor = ThreadPoolExecutor(max_workers=1)
+            await asyncio.get_running_loop().run_in_executor(self.snapshot_executor, self.snapshot_store.put,
+                                                             url, body, encoding)
+        return body, encoding
+
+    async def _get_http_listing(self, session, url, metrics, attempt=0):
+        """Returns (body, encoding) from the h5ai API where the server has it, else the HTML page."""
+        host = urllib.parse.urlsplit(url).netloc
+        probing = self.listing_mode == "auto" and host not in self.h5ai_hosts # The probe doesn't log statuses
+        try:
+            body = await self._get_h5ai_listing(session, url, metrics, attempt)
+        except FetchError as e:
+            # Plain autoindex servers refuse the POST (405, 501); unless the API answered before, list as HTML
+            if self.listing_mode != "auto" or self.h5ai_hosts.get(host) or (e.retriable and e.status != 501):
+                if probing and e.status:
+                    print(f"Status {e.status} for {url}")
+                raise
+            self._no_h5ai(host)
+            body = None
+        if body is not None:
+            return body, h5ai.SNAPSHOT_ENCODING
+        body, encoding, _ = await self._get_listing(session, url, metrics, attempt)
+        return body, encoding
+
+    async def _crawl_directory(self, session, root, url, metrics, attempt=0):
+        """
+        Lists one directory, emits its files and returns [(folder_url, subdirectory URLs), ...]:
+        url first, then any subfolders listed by the same request (h5ai batches).
+        """
+        body, encoding = await self._fetch_listing(session, url, metrics, attempt)
+        if encoding == h5ai.SNAPSHOT_ENCODING:
+            parse_started = time.perf_counter()
+            try:
+                batch = h5ai.parse_items(body, url)
+            except ValueError as e:
+                raise FetchError(200, f"Bad h5ai response: {e}") from e
+            metrics.record_parse(time.perf_counter() - parse_started, sum(len(links) for _, links in batch))
+            listings = [(dir_url, self._split_entries(root, dir_url, links)) for dir_url, links in batch]
+            metrics.record_batched(len(batch) - 1)
+        elif encoding == ftp_listing.SNAPSHOT_ENCODING:
+            parse_started = time.perf_counter()
+            links = ftp_listing.parse_mlsd(body, url) # A line split per entry; cheap enough for the loop
+            metrics.record_parse(time.perf_counter() - parse_started, len(links))
+            listings = [(url, self._split_entries(root, url, links))]
+        else:
+            listings = [(url, await self._listing_entries(root, url, body, encoding, metrics))]
+
+        emit_started = time.perf_counter()
+        files = 0
+        for _, (found_files, _) in listings:
+            for data in found_files:
+                self.on_file(data)
+            files += len(found_files)
+        metrics.record_files(files, time.perf_counter() - emit_started)
+        self.emit_live_summary()
+        return [(dir_url, subdirs) for dir_url, (_, subdirs) in listings]
+
+    async def _listing_entries(self, root, url, body, encoding, metrics):
+        """Parses an HTML listing into (file dicts, subdirectory URLs)."""
+        parse_started = time.perf_counter()
+        links = await self._parse(body, encoding, url)
+        # print(f"Found {len(links)} links in {url}") # Debug
+        metrics.record_parse(time.perf_counter() - parse_started, len(links))
+        return self._split_entries(root, url, links)
+
+    def _split_entries(self, root, url, links):
+        subdirs = []
+        found_files = []
+
+        for full_url, name, is_dir, size, mtime in links:
+            if is_dir:
+                subdirs.append(full_url)
+            else:
+                # File
+                if any(name.lower().endswith(ext) for ext in ['.mkv', '.mp4', '.avi', '.mp3', '.flac']):
+                    found_files.append({
+                        "path": full_url,
+                        "filename": name,
+                        "parent_dir": url,
+                        "size": size,
+                        "mtime": mtime,
+                        "root": root
+                    })
+        return found_files, subdirs
+
+    def crawl_complete(self):
+        """True when the last scan ran to the end (failed directories are listed in failed_urls)."""
+        return not self.stop_requested and not self.aborted
+
+    def sweep_safe(self):
+        """
+        True when a complete scan may remove what it didn't see: a Bloom
+        filter visited set can skip an unseen folder as already queued.
+        """
+        return self.crawl_complete() and self.visited.bloom is None
+
+    def emit_live_summary(self):
+        now = time.monotonic()
+        if now - self.last_summary >= SUMMARY_INTERVAL:
+            self.last_summary = now
+            self.on_summary()
+
+    def concurrency_text(self):
+        return "limits " + ", ".join(f"{host}={c.current_limit()}" for host, c in self.controllers.items())
+
+    def stop(self):
+        self.stop_requested = True
+        # Cancel all running tasks (stop() is called from the UI thread)
+        self._call_in_loop(self._cancel_tasks)
+
+    def _cancel_tasks(self):
+        for task in self.tasks:
+            task.cancel()
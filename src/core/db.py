@@ -1,5 +1,10 @@
 import sqlite3
 import os
+import time
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else '\U0010ffff'
 
 class DatabaseHandler:
     def __init__(self, db_path="index.db"):
@@ -24,19 +29,86 @@ class DatabaseHandler:
                     category TEXT,
                     parent_dir TEXT,
                     local_path TEXT,
-                    downloaded BOOLEAN DEFAULT 0
+                    downloaded BOOLEAN DEFAULT 0,
+                    size INTEGER,
+                    mtime INTEGER,
+                    generation INTEGER DEFAULT 0,
+                    server TEXT
+                )
+            ''')
+            # One row per crawl; its id is the generation stamped on every file it saw
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    root TEXT,
+                    started REAL,
+                    finished REAL,
+                    status TEXT DEFAULT 'running',
+                    partial BOOLEAN DEFAULT 0
+                )
+            ''')
+            # Directories of a crawl still to list, so a stopped crawl can resume
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_frontier (
+                    generation INTEGER,
+                    url TEXT,
+                    depth INTEGER,
+                    status TEXT DEFAULT 'pending',
+                    PRIMARY KEY (generation, url)
+                )
+            ''')
+            # Directories that kept failing after retries ("dead letters")
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_failures (
+                    url TEXT PRIMARY KEY,
+                    root TEXT,
+                    depth INTEGER,
+                    status INTEGER,
+                    error TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    last_attempt REAL
+                )
+            ''')
+            # Validators of each refreshed directory, for conditional re-listing
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS directories (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    digest TEXT,
+                    checked REAL
                 )
             ''')
+            self.migrate(cursor)
+            # Cheap "newest" / "largest" queries
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_mtime ON files(mtime)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_size ON files(size)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_server ON files(server)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_parent ON files(parent_dir)')
             self.conn.commit()
             cursor.close()
         except sqlite3.Error as e:
             print(f"DB Init Error: {e}")
 
+    def migrate(self, cursor):
+        """Adds columns introduced after the first release to existing databases."""
+        added = {
+            'files': [('size', 'INTEGER'), ('mtime', 'INTEGER'), ('generation', 'INTEGER DEFAULT 0'),
+                      ('server', 'TEXT')],
+            'crawls': [('partial', 'BOOLEAN DEFAULT 0')],
+        }
+        for table, new_columns in added.items():
+            cursor.execute(f'PRAGMA table_info({table})')
+            columns = {row[1] for row in cursor.fetchall()}
+            for name, definition in new_columns:
+                if name not in columns:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
     def clear_index(self):
         with self.conn:
             self.conn.execute('DELETE FROM files')
 
-    def add_file(self, path, filename, parent_dir):
+    def add_file(self, path, filename, parent_dir, size=None, mtime=None, generation=0, server=None):
         try:
             # Simple category detection
             category = "Other"
@@ -48,14 +120,140 @@ class DatabaseHandler:
                 category = "Series"
                 
             cursor = self.conn.cursor()
+            # Re-crawls refresh size/mtime so changed files are visible
             cursor.execute('''
-                INSERT OR IGNORE INTO files (path, filename, category, parent_dir)
-                VALUES (?, ?, ?, ?)
-            ''', (path, filename, category, parent_dir))
+                INSERT INTO files (path, filename, category, parent_dir, size, mtime, generation, server)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = COALESCE(excluded.size, size),
+                    mtime = COALESCE(excluded.mtime, mtime),
+                    generation = MAX(generation, excluded.generation),
+                    server = COALESCE(excluded.server, server)
+            ''', (path, filename, category, parent_dir, size, mtime, generation, server))
             cursor.close()
         except sqlite3.Error as e:
             print(f"Error adding file {filename}: {e}")
 
+    def begin_crawl(self, root, seeds=None):
+        """
+        Registers a new crawl of root and returns its generation id. seeds,
+        a list of (url, depth), limits it to those directories; such a partial
+        crawl never sweeps, and leaves a stopped full crawl resumable.
+        """
+        with self.conn:
+            if seeds is None:
+                # A fresh full crawl supersedes any unfinished one of the same root
+                self.conn.execute('''
+                    DELETE FROM crawl_frontier WHERE generation IN
+                        (SELECT id FROM crawls WHERE root = ? AND status != 'complete')
+                ''', (root,))
+                self.conn.execute("UPDATE crawls SET status = 'abandoned' WHERE root = ? AND status != 'complete'",
+                                  (root,))
+            cursor = self.conn.execute('INSERT INTO crawls (root, started, partial) VALUES (?, ?, ?)',
+                                       (root, time.time(), seeds is not None))
+            self.conn.executemany('INSERT OR IGNORE INTO crawl_frontier (generation, url, depth) VALUES (?, ?, ?)',
+                                  [(cursor.lastrowid, url, depth) for url, depth in (seeds or [(root, 0)])])
+        return cursor.lastrowid
+
+    def get_resumable_crawl(self, root):
+        """Returns (generation, pending_count) of the latest unfinished crawl of root, or None."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT c.id, COUNT(f.url) FROM crawls c
+            JOIN crawl_frontier f ON f.generation = c.id AND f.status = 'pending'
+            WHERE c.root = ? AND c.status IN ('running', 'incomplete')
+            GROUP BY c.id ORDER BY c.id DESC LIMIT 1
+        ''', (root,))
+        res = cursor.fetchone()
+        cursor.close()
+        return res
+
+    def resume_crawl(self, generation):
+        """Returns (pending [(url, depth)], visited {url}) for an unfinished crawl."""
+        with self.conn:
+            self.conn.execute("UPDATE crawls SET status = 'running', finished = NULL WHERE id = ?", (generation,))
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT url, depth, status FROM crawl_frontier WHERE generation = ?', (generation,))
+        pending, visited = [], set()
+        for url, depth, status in cursor.fetchall():
+            if status == 'pending':
+                pending.append((url, depth))
+            else:
+                visited.add(url)
+        cursor.close()
+        return pending, visited
+
+    def frontier_done(self, generation, url, ok, children):
+        """Marks a directory listed (or failed) and queues its subdirectories, in one transaction."""
+        # Also commits the files emitted for this directory before the frontier moves on
+        with self.conn:
+            self.conn.execute('UPDATE crawl_frontier SET status = ? WHERE generation = ? AND url = ?',
+                              ('done' if ok else 'failed', generation, url))
+            self.conn.executemany('INSERT OR IGNORE INTO crawl_frontier (generation, url, depth) VALUES (?, ?, ?)',
+                                  [(generation, child, depth) for child, depth in children])
+            if ok:
+                self.conn.execute('DELETE FROM crawl_failures WHERE url = ?', (url,))
+
+    def record_failure(self, root, url, depth, status, error):
+        """Files a directory that still failed after its retries."""
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO crawl_failures (url, root, depth, status, error, attempts, last_attempt)
+                VALUES (?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status, error = excluded.error,
+                    attempts = attempts + 1, last_attempt = excluded.last_attempt
+            ''', (url, root, depth, status, error, time.time()))
+
+    def get_failures(self, root=None):
+        """Returns [(root, url, depth, status, error, attempts), ...]."""
+        cursor = self.conn.cursor()
+        if root:
+            cursor.execute('SELECT root, url, depth, status, error, attempts FROM crawl_failures WHERE root = ?', (root,))
+        else:
+            cursor.execute('SELECT root, url, depth, status, error, attempts FROM crawl_failures')
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
+    def finish_crawl(self, generation, complete, skip=(), sweep=True):
+        """
+        Closes a crawl. A complete crawl sweeps rows under its root that it did
+        not see, unless sweep is False; subtrees listed in skip (directories
+        that failed) are left alone. Returns the number of rows removed.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT root, partial FROM crawls WHERE id = ?', (generation,))
+        row = cursor.fetchone()
+        # Failures from earlier runs of a resumed crawl count too
+        cursor.execute("SELECT url FROM crawl_frontier WHERE generation = ? AND status = 'failed'", (generation,))
+        skip = set(skip) | {r[0] for r in cursor.fetchall()}
+        cursor.close()
+        removed = 0
+        if row and complete and sweep and not row[1]:
+            removed = self.sweep(row[0], generation, skip)
+        with self.conn:
+            self.conn.execute('UPDATE crawls SET finished = ?, status = ? WHERE id = ?',
+                              (time.time(), 'complete' if complete else 'incomplete', generation))
+            if complete:
+                self.conn.execute('DELETE FROM crawl_frontier WHERE generation = ?', (generation,))
+        return removed
+
+    def sweep(self, root, generation, skip=()):
+        """
+        Deletes files under root stamped by an older crawl in one statement.
+        Downloaded files are kept so their local copies stay reachable.
+        """
+        # Prefix ranges instead of LIKE so the unique index on path is used
+        clauses = ['path >= ? AND path < ?', 'generation < ?', 'downloaded = 0']
+        params = [root, prefix_upper_bound(root), generation]
+        for prefix in skip:
+            clauses.append('NOT (path >= ? AND path < ?)')
+            params += [prefix, prefix_upper_bound(prefix)]
+        with self.conn:
+            cursor = self.conn.execute(f'DELETE FROM files WHERE {" AND ".join(clauses)}', params)
+        return cursor.rowcount
+
     def commit(self):
         try:
             self.conn.commit()
@@ -64,9 +262,10 @@ class DatabaseHandler:
     def search(self, query):
         cursor = self.conn.cursor()
         if not query:
+            # Newest on the server first; rows without an mtime fall back to index order
             cursor.execute('''
                 SELECT path, filename, category, local_path, downloaded FROM files 
-                ORDER BY id DESC LIMIT 100
+                ORDER BY mtime DESC, id DESC LIMIT 100
             ''')
         else:
             cursor.execute('''
@@ -81,7 +280,7 @@ class DatabaseHandler:
 
     def get_all_files(self):
         cursor = self.conn.cursor()
-        cursor.execute('SELECT path, filename, category, parent_dir, downloaded FROM files')
+        cursor.execute('SELECT path, filename, category, parent_dir, downloaded, size, mtime FROM files')
         results = cursor.fetchall()
         cursor.close()
         return results
@@ -99,6 +298,138 @@ class DatabaseHandler:
         cursor.close()
         return res[0] if res else None
 
+    def get_file_info(self, url):
+        """Returns (size, mtime) as listed by the server, or (None, None)."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT size, mtime FROM files WHERE path = ?', (url,))
+        res = cursor.fetchone()
+        cursor.close()
+        return res if res else (None, None)
+
+    def get_recent(self, since=None, limit=100):
+        """Files with the newest server mtime, optionally only those newer than since."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT path, filename, category, local_path, downloaded, size, mtime FROM files
+            WHERE mtime IS NOT NULL AND mtime > ?
+            ORDER BY mtime DESC LIMIT ?
+        ''', (since or 0, limit))
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
+    def get_largest(self, limit=100):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT path, filename, category, local_path, downloaded, size, mtime FROM files
+            WHERE size IS NOT NULL
+            ORDER BY size DESC LIMIT ?
+        ''', (limit,))
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
+    def get_folder_size(self, parent_dir):
+        """Total listed size of a folder, e.g. for a disk-space check before a batch download."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COALESCE(SUM(size), 0) FROM files WHERE parent_dir = ?', (parent_dir,))
+        total = cursor.fetchone()[0]
+        cursor.close()
+        return total
+
+    def get_folder_files(self, parent_dir):
+        """Files listed directly in parent_dir, as get_all_files rows."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path, filename, category, parent_dir, downloaded, size, mtime FROM files '
+                       'WHERE parent_dir = ?', (parent_dir,))
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
+    def get_downloaded_paths(self, parent_dir):
+        """{url: local_path} for the downloaded files directly in parent_dir."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path, local_path FROM files WHERE parent_dir = ? AND downloaded = 1', (parent_dir,))
+        results = dict(cursor.fetchall())
+        cursor.close()
+        return results
+
+    def get_subfolders(self, url):
+        """Immediate subfolders of url that have indexed files somewhere below them."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT DISTINCT parent_dir FROM files WHERE parent_dir > ? AND parent_dir < ?',
+                       (url, prefix_upper_bound(url)))
+        subfolders = {url + row[0][len(url):].split('/', 1)[0] + '/' for row in cursor.fetchall()}
+        cursor.close()
+        return subfolders
+
+    def get_subtree_files(self, url):
+        """Files anywhere below the folder url, as (path, filename, parent_dir, local_path, downloaded)."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path, filename, parent_dir, local_path, downloaded FROM files '
+                       'WHERE parent_dir >= ? AND parent_dir < ?', (url, prefix_upper_bound(url)))
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
+    def get_parent_dirs(self):
+        """Every folder with indexed files directly in it."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT DISTINCT parent_dir FROM files')
+        results = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        return results
+
+    def get_matching_files(self, query):
+        """Every file search(query) would match (no 100 row cap), as get_subtree_files rows."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path, filename, parent_dir, local_path, downloaded FROM files '
+                       'WHERE filename LIKE ? OR parent_dir LIKE ?', (f'%{query}%', f'%{query}%'))
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
+    def remove_files(self, paths):
+        """Deletes the given files unless downloaded; returns the paths removed."""
+        removed = []
+        with self.conn:
+            for path in paths:
+                if self.conn.execute('DELETE FROM files WHERE path = ? AND downloaded = 0', (path,)).rowcount:
+                    removed.append(path)
+        return removed
+
+    def remove_subtree(self, url):
+        """Deletes every file below url (except downloads) and its stored validators; returns the paths removed."""
+        upper = prefix_upper_bound(url)
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT path FROM files WHERE path >= ? AND path < ? AND downloaded = 0', (url, upper))
+        removed = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        with self.conn:
+            self.conn.execute('DELETE FROM files WHERE path >= ? AND path < ? AND downloaded = 0', (url, upper))
+            self.conn.execute('DELETE FROM directories WHERE url >= ? AND url < ?', (url, upper))
+        return removed
+
+    def get_directory_validators(self, url):
+        """Returns (etag, last_modified, digest) from the last refresh of url, or None."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT etag, last_modified, digest FROM directories WHERE url = ?', (url,))
+        res = cursor.fetchone()
+        cursor.close()
+        return res
+
+    def set_directory_validators(self, url, etag, last_modified, digest):
+        self.conn.execute('INSERT OR REPLACE INTO directories (url, etag, last_modified, digest, checked) '
+                          'VALUES (?, ?, ?, ?, ?)', (url, etag, last_modified, digest, time.time()))
+
+    def get_server_counts(self):
+        """Returns [(server, file_count), ...] for every crawled root."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT server, COUNT(*) FROM files GROUP BY server ORDER BY server')
+        results = cursor.fetchall()
+        cursor.close()
+        return results
+
     def get_all_categories(self):
         cursor = self.conn.cursor()
         cursor.execute('SELECT DISTINCT category FROM files')
@@ -1,6 +1,9 @@
 import os
 import requests
 from PyQt6.QtCore import QThread, pyqtSignal, QObject
+from src.core.sparse_file import SparseFileMap
+
+FLUSH_INTERVAL = 1024 * 1024 # Publish written bytes to readers every 1 MiB
 
 class DownloadWorker(QThread):
     progress = pyqtSignal(str, float) # url, percentage
@@ -12,6 +15,8 @@ class DownloadWorker(QThread):
         self.url = url
         self.dest_path = dest_path
         self.is_cancelled = False
+        self.total_size = 0
+        self.ranges = SparseFileMap() # Bytes already on disk, shared with the stream proxy
 
     def run(self):
         try:
@@ -20,7 +25,9 @@ class DownloadWorker(QThread):
             response.raise_for_status()
             
             total_size = int(response.headers.get('content-length', 0))
+            self.total_size = total_size
             downloaded = 0
+            flushed = 0
             
             with open(self.dest_path, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
@@ -29,9 +36,15 @@ class DownloadWorker(QThread):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
+                        if downloaded - flushed >= FLUSH_INTERVAL:
+                            f.flush()
+                            self.ranges.add(flushed, downloaded)
+                            flushed = downloaded
                         if total_size > 0:
                             percent = (downloaded / total_size) * 100
                             self.progress.emit(self.url, percent)
+                f.flush()
+                self.ranges.add(flushed, downloaded)
             
             if not self.is_cancelled:
                 self.finished.emit(self.url, self.dest_path)
@@ -46,6 +59,7 @@ class DownloadManager(QObject):
         super().__init__()
         self.download_dir = download_dir
         self.active_downloads = {} # url -> worker
+        self.partial_files = {} # url -> worker, kept after completion for playback
 
     def start_download(self, url, filename):
         if url in self.active_downloads:
@@ -58,6 +72,7 @@ class DownloadManager(QObject):
         worker.error.connect(self.on_error)
         
         self.active_downloads[url] = worker
+        self.partial_files[url] = worker
         worker.start()
         return worker
 
@@ -66,6 +81,14 @@ class DownloadManager(QObject):
             self.active_downloads[url].is_cancelled = True
             self.active_downloads[url].wait()
             del self.active_downloads[url]
+            self.partial_files.pop(url, None)
+
+    def get_partial(self, url):
+        """Returns (path, ranges, total_size) for a file being (or just) downloaded, else None."""
+        worker = self.partial_files.get(url)
+        if not worker or not worker.total_size or not os.path.exists(worker.dest_path):
+            return None
+        return worker.dest_path, worker.ranges, worker.total_size
 
     def print_progress(self, url, percent):
         print(f"Downloading {url}: {percent:.1f}%")
@@ -79,3 +102,4 @@ class DownloadManager(QObject):
         print(f"Download error {url}: {msg}")
         if url in self.active_downloads:
             del self.active_downloads[url]
+        self.partial_files.pop(url, None)
@@ -0,0 +1,117 @@
+"""
+FTP directory listings. The DhakaFlix servers also answer anonymous FTP
+(see probe_ftp.py); FtpPool keeps a few logged-in connections per server
+so folders are listed in parallel, and uses MLSD, whose machine-readable
+facts give exact sizes and UTC mtimes where the HTML pages round them.
+Listings map back to the HTTP URLs of the same paths, so an index built
+over FTP is the same as one built over HTTP.
+"""
+
+import calendar
+import ftplib
+import queue
+import threading
+import time
+import urllib.parse
+
+SNAPSHOT_ENCODING = "mlsd" # Marks MLSD bodies in the snapshot store
+FTP_PORT = 21
+FTP_CONNECTIONS = 8 # Per server; FTP daemons often cap connections per client
+FTP_TIMEOUT = 15
+HREF_SAFE = "()[]&'!$*+,;=:@~" # Left unencoded in the servers' index page links
+
+class FtpPool:
+    """Up to size logged-in connections to one FTP server, shared by threads."""
+
+    def __init__(self, host, port=FTP_PORT, size=FTP_CONNECTIONS, timeout=FTP_TIMEOUT, user="", password=""):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.user = user
+        self.password = password
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue() # Most recently used first, so a burst keeps few connections warm
+        self.closed = False
+
+    def _connect(self):
+        ftp = ftplib.FTP(timeout=self.timeout, encoding="utf-8")
+        try:
+            ftp.connect(self.host, self.port)
+            ftp.login(self.user, self.password) # Anonymous by default
+        except BaseException:
+            ftp.close()
+            raise
+        return ftp
+
+    def _release(self, ftp, reuse):
+        if reuse and not self.closed:
+            self.idle.put(ftp)
+        else:
+            ftp.close()
+
+    def list_dir(self, path):
+        """Raw MLSD reply for path as UTF-8 bytes, one fact line per entry. Blocks; run it in a thread."""
+        with self.slots:
+            try:
+                ftp = self.idle.get_nowait()
+            except queue.Empty:
+                ftp = self._connect()
+            lines = []
+            try:
+                ftp.retrlines("MLSD " + path, lines.append)
+            except ftplib.error_perm:
+                self._release(ftp, True) # The server said no; the connection is fine
+                raise
+            except BaseException:
+                self._release(ftp, False)
+                raise
+            self._release(ftp, True)
+            return "\n".join(lines).encode("utf-8")
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                ftp = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ftp.quit()
+            except (OSError, EOFError, ftplib.Error):
+                ftp.close()
+
+def parse_mtime(value):
+    """MLSD modify fact (YYYYMMDDHHMMSS[.sss], UTC) to a Unix timestamp."""
+    try:
+        return calendar.timegm(time.strptime(value[:14], "%Y%m%d%H%M%S"))
+    except ValueError:
+        return None
+
+def parse_mlsd(body, page_url):
+    """
+    Turns an MLSD body for the folder at page_url into (url, name, is_dir,
+    size, mtime) entries like listing_parser.extract_entries; url is the
+    HTTP URL of the entry.
+    """
+    entries = []
+    for line in body.decode("utf-8", errors="replace").splitlines():
+        facts, _, name = line.partition(' ')
+        if not name or name in ('.', '..'):
+            continue
+        values = {}
+        for fact in facts.split(';'):
+            key, _, value = fact.partition('=')
+            if key:
+                values[key.lower()] = value
+        kind = values.get("type", "").lower()
+        if kind not in ("dir", "file"): # cdir/pdir are the folder itself and its parent; links are skipped
+            continue
+        is_dir = kind == "dir"
+        size = None
+        if not is_dir and values.get("size", "").isdigit():
+            size = int(values["size"])
+        mtime = parse_mtime(values["modify"]) if "modify" in values else None
+        # Spelled like the HTTP listings' hrefs, so both protocols index a file under the same URL
+        url = urllib.parse.urljoin(page_url, urllib.parse.quote(name, safe=HREF_SAFE) + ('/' if is_dir else ''))
+        entries.append((url, name, is_dir, size, mtime))
+    return entries
@@ -0,0 +1,60 @@
+"""
+h5ai JSON listing API. h5ai answers a POST of
+    {"action": "get", "items": {"href": "/DHAKA-FLIX-9/Anime/", "what": 2}}
+to any folder URL (or /_h5ai/public/index.php) with the folder's items as
+JSON: no HTML to render or parse. what=1 lists the folder, what=2 also lists
+every subfolder, so one request covers two directory levels.
+"""
+
+import json
+import urllib.parse
+from src.core.url_dedup import canonical_url
+
+SNAPSHOT_ENCODING = "h5ai+json" # Marks JSON bodies in the snapshot store
+BATCH_WHAT = 2
+
+def request_body(url, what=BATCH_WHAT):
+    href = urllib.parse.urlsplit(url).path or "/"
+    return json.dumps({"action": "get", "items": {"href": href, "what": what}}).encode("utf-8")
+
+def parse_items(body, page_url):
+    """
+    Turns an items response for page_url into [(folder_url, entries), ...]:
+    page_url first, then each subfolder whose content came with it, spelled
+    as the server links it. entries are (url, name, is_dir, size, mtime) like
+    listing_parser.extract_entries.
+    Raises ValueError when body is not an h5ai items response.
+    """
+    data = json.loads(body)
+    items = data.get("items") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("Not an h5ai items response")
+
+    folder = canonical_url(page_url)
+    # Group by the server's own spelling of the parent; only folder hrefs
+    # (a few per response) go through canonical_url, not every file
+    groups = {} # parent href -> [item, ...]
+    for item in items:
+        href = item.get("href") if isinstance(item, dict) else None
+        if href:
+            groups.setdefault(href[:href.rstrip('/').rfind('/') + 1], []).append(item)
+
+    listed = {} # canonical folder url -> entries
+    covered = []
+    for parent_href, members in groups.items():
+        parent = canonical_url(urllib.parse.urljoin(page_url, parent_href))
+        # The response also holds the folder's parents and their contents
+        if parent != folder and not (parent.startswith(folder) and parent.count('/') == folder.count('/') + 1):
+            continue
+        entries = listed.setdefault(parent, [])
+        for item in members:
+            href = item["href"]
+            is_dir = href.endswith('/')
+            url = urllib.parse.urljoin(page_url, href)
+            if is_dir and parent == folder and item.get("fetched"):
+                covered.append(url)
+            name = urllib.parse.unquote(href.rstrip('/').rsplit('/', 1)[-1])
+            size = None if is_dir else item.get("size")
+            mtime = item["time"] // 1000 if item.get("time") else None # Milliseconds
+            entries.append((url, name, is_dir, size, mtime))
+    return [(page_url, listed.get(folder, []))] + [(url, listed.get(canonical_url(url), [])) for url in covered]
@@ -0,0 +1,119 @@
+import time
+from src.core.url_dedup import canonical_url
+
+COMMIT_EVERY = 50 # Files between commits while crawling
+
+class IndexWriter:
+    """
+    Writes crawl results into the index. Shared by the GUI and the headless
+    indexer so both stamp generations, persist the frontier and sweep the
+    same way. crawler is optional and only used to time the DB writes.
+    """
+
+    def __init__(self, db, crawler=None):
+        self.db = db
+        self.crawler = crawler
+        self.generations = {} # root -> generation of the crawl in progress
+        self.root_files = {}
+        self.files = 0
+
+    def resumable(self, roots):
+        """Returns root -> (generation, pending_count) for unfinished crawls."""
+        found = {root: self.db.get_resumable_crawl(root) for root in roots}
+        return {root: r for root, r in found.items() if r}
+
+    def start_full(self, roots):
+        """New crawl of every root. Returns the resume map for Crawler.scan_server (None)."""
+        self._start({root: self.db.begin_crawl(root) for root in roots})
+        return None
+
+    def start_resume(self, generations):
+        """Continues root -> generation crawls from their stored frontier."""
+        self._start(generations)
+        return {root: self.db.resume_crawl(generation) for root, generation in generations.items()}
+
+    def start_retry(self):
+        """Partial crawl of the directories in crawl_failures; None when there are none."""
+        seeds = {}
+        for root, url, depth, status, error, attempts in self.db.get_failures():
+            seeds.setdefault(root, []).append((url, depth))
+        if not seeds:
+            return None
+        return self.start_resume({root: self.db.begin_crawl(root, seeds=urls) for root, urls in seeds.items()})
+
+    def _start(self, generations):
+        self.generations = generations
+        self.root_files = {root: 0 for root in generations}
+        self.files = 0
+
+    def add_file(self, data):
+        """Stores one file; returns True when this write also committed."""
+        started = time.perf_counter()
+        root = data.get('root')
+        self.db.add_file(data['path'], data['filename'], data['parent_dir'],
+                         size=data.get('size'), mtime=data.get('mtime'),
+                         generation=self.generations.get(root, 0), server=root)
+        self.root_files[root] = self.root_files.get(root, 0) + 1
+        self.files += 1
+        if self.crawler:
+            self.crawler.root_metrics.get(root, self.crawler.metrics).record_db(time.perf_counter() - started)
+        if self.files % COMMIT_EVERY == 0:
+            self.db.commit()
+            return True
+        return False
+
+    def directory_done(self, root, url, ok, children):
+        self.db.frontier_done(self.generations[root], url, ok, children)
+
+    def directory_failed(self, root, url, depth, status, error):
+        self.db.record_failure(root, url, depth, status, error)
+
+    def finish(self, complete, failed_urls=(), sweep=True):
+        """Commits and closes every crawl; returns the number of files swept."""
+        self.db.commit()
+        return sum(self.db.finish_crawl(generation, complete, skip=failed_urls, sweep=sweep)
+                   for generation in self.generations.values())
+
+    # Subtree refresh: the writer is also the crawler's validator/subfolder cache
+    def validators(self, url):
+        return self.db.get_directory_validators(url)
+
+    def subdirs(self, url):
+        return self.db.get_subfolders(url)
+
+    def refresh(self, crawler, url, depth=1):
+        """Re-lists one folder subtree and applies the changes; see apply_refresh."""
+        return self.apply_refresh(crawler.refresh_subtree(url, depth, cache=self))
+
+    def apply_refresh(self, listings):
+        """
+        Applies Crawler.refresh_subtree results to the index and returns the
+        diff for the UI: added/updated rows (get_all_files order), removed
+        paths and the number of folders listed, not_modified and failed.
+        """
+        diff = {"added": [], "updated": [], "removed": [], "listed": 0, "not_modified": 0, "failed": 0}
+        for listing in listings:
+            diff[listing["status"]] += 1
+            if listing["status"] == "failed":
+                continue # Keep what we had rather than drop a folder the server failed to list
+            url = listing["url"]
+            if listing["status"] == "listed":
+                before = {row[0]: row for row in self.db.get_folder_files(url)}
+                for data in listing["files"]:
+                    self.db.add_file(data['path'], data['filename'], data['parent_dir'],
+                                     size=data.get('size'), mtime=data.get('mtime'), server=data.get('root'))
+                listed = {data['path'] for data in listing["files"]}
+                for path, row in ((row[0], row) for row in self.db.get_folder_files(url)):
+                    if path not in before:
+                        diff["added"].append(row)
+                    elif row[5:] != before[path][5:]:
+                        diff["updated"].append(row)
+                diff["removed"] += self.db.remove_files([path for path in before if path not in listed])
+                # Folders missing from the new listing take their subtree with them
+                still_listed = {canonical_url(sub) for sub in listing["subdirs"]}
+                for gone in self.subdirs(url):
+                    if canonical_url(gone) not in still_listed:
+                        diff["removed"] += self.db.remove_subtree(gone)
+            self.db.set_directory_validators(url, listing["etag"], listing["last_modified"], listing["digest"])
+        self.db.commit()
+        return diff
@@ -0,0 +1,249 @@
+"""
+Directory listing parsers for Apache autoindex, nginx and h5ai fallback pages.
+
+Every backend returns the same compact entries:
+    (href, name, size, mtime)
+size is in bytes and mtime in epoch seconds (UTC), both None when the
+listing does not show them. A trailing '/' on href marks a directory.
+"""
+
+import re
+import html
+import calendar
+import urllib.parse
+from html.parser import HTMLParser
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+DEFAULT_BACKEND = "regex"
+TRAILING_LIMIT = 2000 # Max characters after an anchor searched for date/size
+
+ANCHOR_RE = re.compile(r'<a\s[^>]*?href\s*=\s*(["\'])(.*?)\1[^>]*>(.*?)</a\s*>', re.I | re.S)
+TAG_RE = re.compile(r'<[^>]*>')
+DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})[ T]+(\d{1,2}):(\d{2})(?::(\d{2}))?'
+                     r'|(\d{1,2})-([A-Za-z]{3})-(\d{4})[ T]+(\d{1,2}):(\d{2})(?::(\d{2}))?')
+SIZE_RE = re.compile(r'(?<![\w.:-])(\d+(?:\.\d+)?)\s*([KMGT]i?B?|B|bytes)?(?![\w.:-])', re.I)
+
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def parse_meta(text):
+    """Extracts (size, mtime) from the text that follows an entry's link."""
+    match = DATE_RE.search(text)
+    if not match:
+        return None, None
+    g = match.groups()
+    try:
+        if g[0]:
+            mtime = calendar.timegm((int(g[0]), int(g[1]), int(g[2]), int(g[3]), int(g[4]), int(g[5] or 0)))
+        else:
+            month = MONTHS.get(g[7].lower())
+            if not month:
+                return None, None
+            mtime = calendar.timegm((int(g[8]), month, int(g[6]), int(g[9]), int(g[10]), int(g[11] or 0)))
+    except ValueError:
+        mtime = None
+
+    size = None
+    size_match = SIZE_RE.search(text, match.end())
+    if size_match:
+        unit = (size_match.group(2) or "")[:1].upper()
+        size = int(float(size_match.group(1)) * UNITS.get(unit, 1))
+    return size, mtime
+
+def entry_name(href, text):
+    name = html.unescape(TAG_RE.sub('', text)).strip()
+    if name.endswith(('..>', '...')):
+        # Apache truncates long names in the link text; the href is complete
+        name = urllib.parse.unquote(href.rstrip('/').rsplit('/', 1)[-1])
+        if href.endswith('/'):
+            name += '/'
+    return name
+
+def parse_regex(text):
+    """Single regex pass over the page: fastest pure-Python backend."""
+    entries = []
+    matches = list(ANCHOR_RE.finditer(text))
+    for i, match in enumerate(matches):
+        href = html.unescape(match.group(2))
+        end = matches[i + 1].start() if i + 1 < len(matches) else match.end() + TRAILING_LIMIT
+        trailing = TAG_RE.sub(' ', text[match.end():min(end, match.end() + TRAILING_LIMIT)])
+        size, mtime = parse_meta(trailing)
+        entries.append((href, entry_name(href, match.group(3)), size, mtime))
+    return entries
+
+class _StreamingListingParser(HTMLParser):
+    """Streaming extractor: collects each link and the text after it in one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.entries = []
+        self.current = None # [href, name_parts, trailing_parts]
+        self.in_anchor = False
+
+    def _flush(self):
+        if self.current:
+            href, name_parts, trailing_parts = self.current
+            size, mtime = parse_meta(' '.join(trailing_parts))
+            self.entries.append((href, entry_name(href, ''.join(name_parts)), size, mtime))
+            self.current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = dict(attrs).get('href')
+        if href is None:
+            return
+        self._flush()
+        self.current = [href, [], []]
+        self.in_anchor = True
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self.in_anchor = False
+
+    def handle_data(self, data):
+        if not self.current:
+            return
+        if self.in_anchor:
+            self.current[1].append(data)
+        elif sum(len(p) for p in self.current[2]) < TRAILING_LIMIT:
+            self.current[2].append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+def parse_htmlparser(text):
+    parser = _StreamingListingParser()
+    parser.feed(text)
+    parser.close()
+    return parser.entries
+
+def _row_trailing_text(cells, anchor_cell):
+    """Text of the table cells after the one holding the link."""
+    found = False
+    parts = []
+    for cell in cells:
+        if found:
+            parts.append(cell)
+        elif cell is anchor_cell:
+            found = True
+    return parts
+
+def parse_bs4(text):
+    soup = BeautifulSoup(text, 'html.parser')
+    entries = []
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if href is None:
+            continue
+        row = link.find_parent('tr')
+        if row is not None:
+            cell = link.find_parent('td')
+            cells = row.find_all('td')
+            trailing = ' '.join(c.get_text() for c in _row_trailing_text(cells, cell))
+        else:
+            trailing = str(link.next_sibling or '')
+        size, mtime = parse_meta(trailing)
+        entries.append((href, entry_name(href, link.get_text()), size, mtime))
+    return entries
+
+def parse_lxml(text):
+    root = lxml.html.fromstring(text)
+    entries = []
+    for link in root.iter('a'):
+        href = link.get('href')
+        if href is None:
+            continue
+        rows = list(link.iterancestors('tr'))
+        if rows:
+            cells = list(rows[0].iter('td'))
+            cell = next(link.iterancestors('td'), None)
+            trailing = ' '.join(c.text_content() for c in _row_trailing_text(cells, cell))
+        else:
+            trailing = link.tail or ''
+        size, mtime = parse_meta(trailing)
+        entries.append((href, entry_name(href, link.text_content()), size, mtime))
+    return entries
+
+def parse_selectolax(text):
+    tree = SelectolaxParser(text)
+    entries = []
+    for link in tree.css('a'):
+        href = link.attributes.get('href')
+        if href is None:
+            continue
+        cell = link.parent
+        while cell is not None and cell.tag not in ('td', 'body'):
+            cell = cell.parent
+        if cell is not None and cell.tag == 'td':
+            parts = []
+            sibling = cell.next
+            while sibling is not None:
+                if sibling.tag == 'td':
+                    parts.append(sibling.text())
+                sibling = sibling.next
+            trailing = ' '.join(parts)
+        else:
+            sibling = link.next
+            trailing = sibling.text() if sibling is not None and sibling.tag == '-text' else ''
+        size, mtime = parse_meta(trailing or '')
+        entries.append((href, entry_name(href, link.text()), size, mtime))
+    return entries
+
+BACKENDS = {
+    "regex": parse_regex,
+    "htmlparser": parse_htmlparser,
+}
+if BS4_AVAILABLE:
+    BACKENDS["bs4"] = parse_bs4
+if LXML_AVAILABLE:
+    BACKENDS["lxml"] = parse_lxml
+if SELECTOLAX_AVAILABLE:
+    BACKENDS["selectolax"] = parse_selectolax
+
+def available_backends():
+    return list(BACKENDS)
+
+def parse_listing(text, backend=DEFAULT_BACKEND):
+    """Returns [(href, name, size, mtime), ...] for every link in a listing page."""
+    parser = BACKENDS.get(backend)
+    if parser is None:
+        print(f"Listing parser '{backend}' not available, using {DEFAULT_BACKEND}")
+        parser = BACKENDS[DEFAULT_BACKEND]
+    return parser(text)
+
+def extract_entries(body, encoding, page_url, backend=DEFAULT_BACKEND):
+    """
+    Decodes a raw listing and returns [(url, name, is_dir, size, mtime), ...]
+    with parent/sort links dropped and hrefs resolved against page_url.
+    Takes and returns plain picklable values so it can run in a worker process.
+    """
+    text = body.decode(encoding or 'utf-8', errors='replace')
+    entries = []
+    for href, name, size, mtime in parse_listing(text, backend):
+        if name in ['Parent Directory', '../', './'] or href in ['../', './'] or not href:
+            continue
+        if '?' in href:
+            continue
+        # Handle relative URLs correctly
+        entries.append((urllib.parse.urljoin(page_url, href), name, href.endswith('/'), size, mtime))
+    return entries
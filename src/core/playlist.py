@@ -0,0 +1,106 @@
+"""
+M3U/M3U8 playlists straight from index.db: every file below a folder
+(optionally only some of its seasons) or every file matching a search, in
+natural episode order (Episode 2 before Episode 10). No network access, so
+a playlist takes milliseconds however big the show.
+"""
+
+import os
+import re
+import urllib.parse
+from src.core.url_dedup import canonical_url
+
+SEASON_PATTERN = re.compile(r'\bSeason\s*(\d+)|\bS(\d+)\b', re.IGNORECASE)
+DIGITS = re.compile(r'(\d+)')
+
+def natural_key(text):
+    """Sort key comparing digit runs as numbers: "Season 9" < "Season 10"."""
+    return [int(part) if part.isdigit() else part.lower() for part in DIGITS.split(text)]
+
+def season_number(name):
+    """16 for "Season 16" or "S16", None when the folder name has no season."""
+    match = SEASON_PATTERN.search(name)
+    return int(match.group(1) or match.group(2)) if match else None
+
+def parse_seasons(text):
+    """
+    Season range from the command line: "16" is (16, 16), "16-" (16, None)
+    for everything from 16 on, "3-5" (3, 5). Raises ValueError.
+    """
+    first, dash, last = text.partition('-')
+    first = int(first) if first.strip() else 1
+    last = (int(last) if last.strip() else None) if dash else first
+    if first < 0 or (last is not None and last < first):
+        raise ValueError(f"Bad season range: {text}")
+    return first, last
+
+def folder_segments(parent_dir, skip=0):
+    """Decoded folder names of parent_dir after its first skip '/'-separated parts."""
+    return [urllib.parse.unquote(segment) for segment in parent_dir.split('/')[skip:] if segment]
+
+def subtree_files(db, folder):
+    """
+    get_subtree_files rows below folder. The index keeps the server's own
+    spelling, so a URL typed or pasted differently ('(' vs '%28') falls back
+    to comparing canonical forms against every indexed folder.
+    """
+    rows = db.get_subtree_files(folder)
+    if rows:
+        return rows
+    key = canonical_url(folder)
+    parts = key.count('/')
+    spellings = {'/'.join(parent_dir.split('/')[:parts]) + '/' for parent_dir in db.get_parent_dirs()
+                 if canonical_url(parent_dir).startswith(key)}
+    return [row for spelling in spellings for row in db.get_subtree_files(spelling)]
+
+def collect(db, folder=None, seasons=None, query=None):
+    """
+    Playlist rows (url, filename, local_path) for the files below folder or
+    matching query, naturally sorted. seasons (first, last) keeps files in
+    season folders of that range below folder; last None is open-ended.
+    """
+    if folder is not None:
+        folder = folder if folder.endswith('/') else folder + '/'
+        rows = subtree_files(db, folder)
+        skip = canonical_url(folder).count('/')
+    else:
+        skip = 0
+        rows = db.get_matching_files(query or "")
+
+    folders = {} # parent_dir -> folder sort key, or None when outside the seasons; shows have few folders
+    keyed = []
+    for path, filename, parent_dir, local_path, downloaded in rows:
+        if parent_dir not in folders:
+            segments = folder_segments(parent_dir, skip)
+            folders[parent_dir] = [natural_key(segment) for segment in segments]
+            if seasons is not None:
+                # The outermost season folder counts, so Season 16/Extras/ stays in season 16
+                season = next((n for n in map(season_number, segments) if n is not None), None)
+                if season is None or season < seasons[0] or (seasons[1] is not None and season > seasons[1]):
+                    folders[parent_dir] = None
+        folder_key = folders[parent_dir]
+        if folder_key is not None:
+            keyed.append(((folder_key, natural_key(filename)), path, filename, local_path if downloaded else None))
+    keyed.sort(key=lambda row: row[0])
+    return [(path, filename, local_path) for _, path, filename, local_path in keyed]
+
+def write_m3u(rows, output, prefer_local=False, title=None):
+    """
+    Writes rows from collect() as an extended M3U (UTF-8, so also valid as
+    .m3u8) to the path output; with prefer_local downloaded files that are
+    still on disk are played from there. Returns the number of entries.
+    """
+    lines = ["#EXTM3U"]
+    if title:
+        lines.append(f"#PLAYLIST:{title}")
+    for url, filename, local_path in rows:
+        location = local_path if prefer_local and local_path and os.path.exists(local_path) else url
+        lines.append(f"#EXTINF:-1,{os.path.splitext(filename)[0]}") # Duration unknown until played
+        lines.append(location)
+    with open(output, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(lines) + "\n")
+    return len(rows)
+
+def export_playlist(db, output, folder=None, seasons=None, query=None, prefer_local=False, title=None):
+    """collect() then write_m3u(); returns the number of entries written."""
+    return write_m3u(collect(db, folder, seasons, query), output, prefer_local, title)
@@ -0,0 +1,93 @@
+import time
+import threading
+
+PREFETCH_MB = 32 # Head of the next episode to warm up
+PREFETCH_RATE = 4 * 1024 * 1024 # Bytes/s, leaves headroom for the current stream
+
+class Prefetcher:
+    """
+    Warms the stream proxy cache with the start of the next playlist item
+    while the current one plays, so episode transitions start from disk.
+    """
+
+    def __init__(self, stream_proxy, prefetch_mb=PREFETCH_MB, max_rate=PREFETCH_RATE):
+        self.proxy = stream_proxy
+        self.prefetch_bytes = prefetch_mb * 1024 * 1024
+        self.max_rate = max_rate
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.pending_url = None
+        self.generation = 0 # Bumped on every request so stale work stops early
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def prefetch(self, url):
+        if not url or not url.startswith(('http://', 'https://')):
+            return # Local files need no warming
+        with self.lock:
+            self.pending_url = url
+            self.generation += 1
+            self.wakeup.notify()
+
+    def cancel(self):
+        with self.lock:
+            self.pending_url = None
+            self.generation += 1
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            self.generation += 1
+            self.wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self.pending_url and not self.stopped:
+                    self.wakeup.wait()
+                if self.stopped:
+                    return
+                url, generation = self.pending_url, self.generation
+                self.pending_url = None
+            try:
+                self._warm(url, generation)
+            except Exception as e:
+                print(f"Prefetch failed for {url}: {e}")
+
+    def _is_current(self, generation):
+        return generation == self.generation and not self.stopped
+
+    def _busy(self):
+        # The player's own fetches take priority over warming the next item
+        with self.proxy.inflight_lock:
+            return len(self.proxy.inflight) > 0
+
+    def _warm(self, url, generation):
+        meta = self.proxy.get_meta(url)
+        if not meta["ranges"] or not meta["size"]:
+            return
+
+        chunk_size = self.proxy.chunk_size
+        last_index = (meta["size"] - 1) // chunk_size
+        head_chunks = min(max(self.prefetch_bytes // chunk_size, 1), last_index + 1)
+        # Containers like mp4 may keep their index at the end of the file
+        indexes = list(range(head_chunks))
+        if last_index >= head_chunks:
+            indexes.append(last_index)
+
+        for index in indexes:
+            if not self._is_current(generation):
+                return
+            if self.proxy.cache.has(url, index):
+                continue
+            while self._busy() and self._is_current(generation):
+                time.sleep(0.2)
+
+            started = time.monotonic()
+            data = self.proxy.get_chunk(url, index)
+            # Pace the transfer so it never exceeds max_rate
+            min_duration = len(data) / self.max_rate if self.max_rate else 0
+            remaining = min_duration - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
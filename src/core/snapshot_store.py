@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+GZIP_LEVEL = 5 # Listings are small; favour speed over the last few percent
+ZSTD_LEVEL = 3
+COMMIT_EVERY = 200 # Manifest rows between commits
+
+class SnapshotStore:
+    """
+    Raw directory listing bodies, compressed (zstd when available, else gzip)
+    and stored by the SHA-256 of their content so identical listings are kept
+    once. manifest.db maps each listing URL to its latest body, which lets a
+    crawl be replayed offline with new parsing rules or as a benchmark input.
+
+    Layout:
+        <root>/manifest.db
+        <root>/objects/ab/abcdef....gz (or .zst)
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.objects_dir = os.path.join(root_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root_dir, "manifest.db"), check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS listings (
+                url TEXT PRIMARY KEY,
+                digest TEXT,
+                encoding TEXT,
+                fetched REAL
+            )
+        ''')
+        self.conn.commit()
+        self.pending = 0
+        self.stored = 0 # New objects written by this instance
+        self.deduplicated = 0
+
+    def object_path(self, digest, ext):
+        return os.path.join(self.objects_dir, digest[:2], digest + ext)
+
+    def _find_object(self, digest):
+        for ext in (".zst", ".gz"):
+            path = self.object_path(digest, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put(self, url, body, encoding=None):
+        """Stores a listing body for url and returns its digest."""
+        digest = hashlib.sha256(body).hexdigest()
+        if self._find_object(digest):
+            self.deduplicated += 1
+        else:
+            if ZSTD_AVAILABLE:
+                path, data = self.object_path(digest, ".zst"), zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+            else:
+                path, data = self.object_path(digest, ".gz"), gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path) # Readers never see half an object
+            self.stored += 1
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO listings (url, digest, encoding, fetched) VALUES (?, ?, ?, ?)',
+                              (url, digest, encoding, time.time()))
+            self.pending += 1
+            if self.pending >= COMMIT_EVERY:
+                self.conn.commit()
+                self.pending = 0
+        return digest
+
+    def read_object(self, digest):
+        path = self._find_object(digest)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(".zst"):
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"{path} needs the zstandard package")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def get(self, url):
+        """Returns (body, encoding) of the latest snapshot of url, or None."""
+        with self.lock:
+            row = self.conn.execute('SELECT digest, encoding FROM listings WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        body = self.read_object(row[0])
+        return (body, row[1]) if body is not None else None
+
+    def has(self, url):
+        with self.lock:
+            return self.conn.execute('SELECT 1 FROM listings WHERE url = ?', (url,)).fetchone() is not None
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM listings').fetchone()[0]
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,55 @@
+import bisect
+import threading
+
+class SparseFileMap:
+    """
+    Thread-safe set of byte ranges [start, end) that are already on disk.
+    The downloader adds ranges as it flushes; readers ask what is missing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.starts = []
+        self.ends = []
+
+    def add(self, start, end):
+        if end <= start:
+            return
+        with self.lock:
+            # Merge with every range that overlaps or touches [start, end)
+            i = bisect.bisect_left(self.ends, start)
+            j = bisect.bisect_right(self.starts, end)
+            if i < j:
+                start = min(start, self.starts[i])
+                end = max(end, self.ends[j - 1])
+            self.starts[i:j] = [start]
+            self.ends[i:j] = [end]
+
+    def covers(self, start, end):
+        with self.lock:
+            i = bisect.bisect_right(self.starts, start) - 1
+            return i >= 0 and self.ends[i] >= end
+
+    def missing(self, start, end):
+        """Returns the sub-ranges of [start, end) that are not on disk yet."""
+        gaps = []
+        position = start
+        with self.lock:
+            i = max(bisect.bisect_right(self.starts, start) - 1, 0)
+            while position < end and i < len(self.starts):
+                if self.ends[i] <= position:
+                    i += 1
+                    continue
+                if self.starts[i] >= end:
+                    break
+                if self.starts[i] > position:
+                    gaps.append((position, self.starts[i]))
+                position = self.ends[i]
+                i += 1
+        if position < end:
+            gaps.append((position, end))
+        return gaps
+
+    def total(self):
+        with self.lock:
+            return sum(e - s for s, e in zip(self.starts, self.ends))
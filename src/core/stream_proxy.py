@@ -0,0 +1,433 @@
+import os
+import json
+import base64
+import hashlib
+import threading
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+
+CHUNK_SIZE = 1024 * 1024 # 1 MiB per cached chunk
+DEFAULT_CACHE_LIMIT = 2 * 1024 * 1024 * 1024 # 2 GiB on disk
+READ_AHEAD_CHUNKS = 8 # Chunks fetched ahead of the playhead
+
+class ChunkCache:
+    """On-disk store of fixed-size chunks keyed by (url, index) with LRU eviction."""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_LIMIT):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict() # chunk filename -> size, oldest first
+        self.total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        # Rebuild LRU order from mtimes so repeat viewing survives restarts
+        chunks = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.chunk'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            chunks.append((st.st_mtime, name, st.st_size))
+        for _mtime, name, size in sorted(chunks):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def url_key(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _chunk_name(self, url, index):
+        return f"{self.url_key(url)}_{index}.chunk"
+
+    def has(self, url, index):
+        with self.lock:
+            return self._chunk_name(url, index) in self.entries
+
+    def get(self, url, index):
+        name = self._chunk_name(url, index)
+        with self.lock:
+            if name not in self.entries:
+                return None
+            self.entries.move_to_end(name)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path) # Persist recency for the next session
+            return data
+        except OSError:
+            with self.lock:
+                size = self.entries.pop(name, 0)
+                self.total_bytes -= size
+            return None
+
+    def put(self, url, index, data):
+        name = self._chunk_name(url, index)
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Cache write failed for {name}: {e}")
+            return
+        with self.lock:
+            self.total_bytes -= self.entries.pop(name, 0)
+            self.entries[name] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def drop(self, url):
+        """Deletes every cached chunk of url (the file changed on the server)."""
+        prefix = f"{self.url_key(url)}_"
+        with self.lock:
+            names = [name for name in self.entries if name.startswith(prefix)]
+            for name in names:
+                self.total_bytes -= self.entries.pop(name)
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+        return len(names)
+
+    def load_meta(self, url):
+        path = os.path.join(self.cache_dir, f"{self.url_key(url)}.meta")
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_meta(self, url, meta):
+        path = os.path.join(self.cache_dir, f"{self.url_key(url)}.meta")
+        try:
+            with open(path, 'w') as f:
+                json.dump(meta, f)
+        except OSError:
+            pass
+
+class StreamProxy:
+    """
+    Localhost HTTP proxy that mpv streams through.
+    Range requests are answered from the chunk cache; misses are fetched from
+    the upstream server once, even when several readers ask for them together.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_LIMIT, chunk_size=CHUNK_SIZE,
+                 read_ahead=READ_AHEAD_CHUNKS):
+        self.cache = ChunkCache(cache_dir, max_bytes)
+        self.chunk_size = chunk_size
+        self.read_ahead = read_ahead
+        self.session = requests.Session()
+        self.meta = {} # url -> {"size", "ranges", "content_type", "etag", "last_modified"}, checked this session
+        self.meta_lock = threading.Lock()
+        self.inflight = {} # (url, index) -> threading.Event
+        self.inflight_lock = threading.Lock()
+        self.playheads = {} # url -> last chunk index requested by the player
+        # Optional callable url -> (path, SparseFileMap, total_size) for files being downloaded
+        self.partial_source = None
+        self.read_ahead_pool = ThreadPoolExecutor(max_workers=2)
+        self.server = None
+        self.thread = None
+        self.port = None
+
+    def start(self):
+        if self.server:
+            return
+        proxy = self
+
+        class Handler(ProxyRequestHandler):
+            pass
+        Handler.proxy = proxy
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.read_ahead_pool.shutdown(wait=False, cancel_futures=True)
+
+    def url_for(self, url):
+        """Returns the local proxy URL mpv should open instead of url."""
+        if not self.server or not url.startswith(('http://', 'https://')):
+            return url
+        token = base64.urlsafe_b64encode(url.encode('utf-8')).decode('ascii').rstrip('=')
+        # Keep the original file name so mpv can still guess the format
+        name = urllib.parse.quote(os.path.basename(urllib.parse.urlparse(url).path) or "stream")
+        return f"http://127.0.0.1:{self.port}/s/{token}/{name}"
+
+    @staticmethod
+    def decode_token(token):
+        padded = token + '=' * (-len(token) % 4)
+        return base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+
+    def get_meta(self, url):
+        meta = self.meta.get(url)
+        if meta:
+            return meta
+        with self.meta_lock:
+            if url not in self.meta:
+                self.meta[url] = self._probe_meta(url)
+            return self.meta[url]
+
+    def _probe_meta(self, url):
+        """
+        Asks the server for url's size and validators once per session. Chunks
+        cached by an earlier session are dropped if the file has changed since.
+        """
+        stored = self.cache.load_meta(url)
+        try:
+            # One-byte range request: size, range support and validators in one round trip
+            response = self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=10)
+        except (requests.ConnectionError, requests.Timeout):
+            if stored:
+                return stored # Server unreachable: play what the cache has
+            raise
+        try:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', 'application/octet-stream')
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[1]
+                meta = {"size": int(total) if total.isdigit() else 0, "ranges": True,
+                        "content_type": content_type}
+            else:
+                meta = {"size": int(response.headers.get('Content-Length', 0)), "ranges": False,
+                        "content_type": content_type}
+            meta["etag"] = response.headers.get('ETag')
+            meta["last_modified"] = response.headers.get('Last-Modified')
+        finally:
+            response.close()
+
+        # .meta files written before validators were kept only have the size to compare
+        if stored and any(key in stored and stored[key] != meta[key] for key in ("size", "etag", "last_modified")):
+            dropped = self.cache.drop(url)
+            print(f"{url} changed on the server, dropped {dropped} cached chunks")
+        if meta["ranges"] and meta["size"]:
+            self.cache.save_meta(url, meta)
+        return meta
+
+    def _fetch_range(self, url, start, end):
+        response = self.session.get(url, headers={'Range': f'bytes={start}-{end}'}, timeout=10)
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise IOError(f"Server ignored range request for {url}")
+        return response.content
+
+    def _fetch_chunk(self, url, index):
+        meta = self.get_meta(url)
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, meta["size"]) - 1
+        return self._fetch_range(url, start, end)
+
+    def _read_partial(self, url, index):
+        """Serves a chunk from a file the downloader is still writing, fetching only the gaps."""
+        partial = self.partial_source(url) if self.partial_source else None
+        if not partial:
+            return None
+        path, ranges, total_size = partial
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, total_size)
+        gaps = ranges.missing(start, end)
+        if start >= end or gaps == [(start, end)]:
+            return None # Nothing useful on disk yet
+
+        parts = []
+        position = start
+        try:
+            with open(path, 'rb') as f:
+                for gap_start, gap_end in gaps + [(end, end)]:
+                    if gap_start > position:
+                        f.seek(position)
+                        parts.append(f.read(gap_start - position))
+                    if gap_end > gap_start:
+                        parts.append(self._fetch_range(url, gap_start, gap_end - 1))
+                    position = gap_end
+        except OSError:
+            return None # Download was cancelled and the file removed
+        return b''.join(parts)
+
+    def get_chunk(self, url, index):
+        data = self.cache.get(url, index)
+        if data is not None:
+            return data
+
+        # Share bytes with an active download instead of transferring them twice
+        data = self._read_partial(url, index)
+        if data is not None:
+            return data
+
+        key = (url, index)
+        with self.inflight_lock:
+            event = self.inflight.get(key)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self.inflight[key] = event
+
+        if not owner:
+            # Someone else is already fetching this chunk; share their result
+            event.wait()
+            data = self.cache.get(url, index)
+            if data is not None:
+                return data
+            return self._fetch_chunk(url, index)
+
+        try:
+            data = self._fetch_chunk(url, index)
+            self.cache.put(url, index, data)
+            return data
+        finally:
+            with self.inflight_lock:
+                del self.inflight[key]
+            event.set()
+
+    def note_playhead(self, url, index):
+        self.playheads[url] = index
+        last_index = (self.get_meta(url)["size"] - 1) // self.chunk_size
+        for ahead in range(index + 1, min(index + 1 + self.read_ahead, last_index + 1)):
+            if self.cache.has(url, ahead):
+                continue
+            with self.inflight_lock:
+                if (url, ahead) in self.inflight:
+                    continue
+            self.read_ahead_pool.submit(self._read_ahead, url, ahead)
+
+    def _read_ahead(self, url, index):
+        # Drop stale work left behind by a seek
+        playhead = self.playheads.get(url, 0)
+        if not playhead < index <= playhead + self.read_ahead:
+            return
+        try:
+            self.get_chunk(url, index)
+        except Exception as e:
+            print(f"Read-ahead failed for {url} chunk {index}: {e}")
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    proxy = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass # mpv issues a request per seek; keep the console quiet
+
+    def _resolve(self):
+        parts = self.path.split('/')
+        if len(parts) < 3 or parts[1] != 's':
+            self.send_error(404)
+            return None, None
+        try:
+            url = self.proxy.decode_token(parts[2])
+            meta = self.proxy.get_meta(url)
+        except Exception as e:
+            print(f"Proxy upstream error: {e}")
+            self.send_error(502)
+            return None, None
+
+        if not meta["ranges"] or not meta["size"]:
+            # Upstream cannot serve ranges, let mpv talk to it directly
+            self.send_response(302)
+            self.send_header('Location', url)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None, None
+        return url, meta
+
+    def _parse_range(self, size):
+        header = self.headers.get('Range')
+        if not header or not header.startswith('bytes='):
+            return None
+        spec = header[len('bytes='):].split(',')[0].strip()
+        start_s, _, end_s = spec.partition('-')
+        if not start_s:
+            # Suffix range: last N bytes
+            length = int(end_s)
+            return max(size - length, 0), size - 1
+        start = int(start_s)
+        end = int(end_s) if end_s else size - 1
+        if end < start:
+            return None # Invalid range (bytes=500-100): ignored, the whole file is served
+        return start, min(end, size - 1)
+
+    def _send_headers(self, url, meta):
+        size = meta["size"]
+        try:
+            byte_range = self._parse_range(size)
+        except ValueError:
+            byte_range = None
+
+        if byte_range and byte_range[0] >= size:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        start, end = byte_range if byte_range else (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', meta.get("content_type", 'application/octet-stream'))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        return start, end
+
+    def do_HEAD(self):
+        url, meta = self._resolve()
+        if url:
+            self._send_headers(url, meta)
+
+    def do_GET(self):
+        url, meta = self._resolve()
+        if not url:
+            return
+        span = self._send_headers(url, meta)
+        if not span:
+            return
+
+        start, end = span
+        chunk_size = self.proxy.chunk_size
+        index = start // chunk_size
+        position = start
+        try:
+            while position <= end:
+                self.proxy.note_playhead(url, index)
+                data = self.proxy.get_chunk(url, index)
+                offset = position - index * chunk_size
+                piece = data[offset:offset + (end - position + 1)]
+                if not piece:
+                    break
+                self.wfile.write(piece)
+                position += len(piece)
+                index += 1
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Player seeked or closed the stream
+        except Exception as e:
+            print(f"Proxy stream error for {url}: {e}")
+            self.close_connection = True
@@ -0,0 +1,113 @@
+MB = 1024 * 1024
+
+MEMORY_BUDGET = 512 * MB # Upper bound for demuxer-max-bytes
+MIN_CACHE_BYTES = 32 * MB
+SPEED_SMOOTHING = 0.3 # EWMA weight of the newest cache-speed sample
+CHANGE_THRESHOLD = 0.25 # Relative change needed before settings are re-applied
+FILLING_FRACTION = 0.8 # Below this share of the read-ahead target the cache is still filling
+
+# (headroom below, demuxer-readahead-secs, cache-secs)
+# headroom = measured bandwidth / stream bitrate
+PROFILES = [
+    (1.2, 300, 600), # Barely keeping up: buffer as deep as the budget allows
+    (2.0, 120, 300),
+    (4.0, 60, 120),
+    (float('inf'), 20, 60), # Plenty of bandwidth: keep memory use low
+]
+
+class AdaptiveCacheTuner:
+    """
+    Chooses mpv cache/demuxer settings per file from the measured bandwidth
+    and the stream bitrate, within a fixed memory budget.
+    """
+
+    def __init__(self, memory_budget=MEMORY_BUDGET, min_bytes=MIN_CACHE_BYTES):
+        self.memory_budget = memory_budget
+        self.min_bytes = min_bytes
+        self.reset()
+
+    def reset(self):
+        """Forget measurements; call on every new file."""
+        self.speed = None # Smoothed bytes/s
+        self.applied = None
+
+    @staticmethod
+    def filling(demuxer_cache_state, readahead_secs=None):
+        """
+        True while the demuxer reads as fast as the link allows. Once the
+        read-ahead target is reached mpv only reads at the playback rate,
+        so cache-speed then measures the bitrate, not the bandwidth.
+        """
+        if demuxer_cache_state.get('eof') or demuxer_cache_state.get('idle'):
+            return False # Whole file cached, or nothing left to read
+        if demuxer_cache_state.get('underrun'):
+            return True
+        duration = demuxer_cache_state.get('cache-duration')
+        if duration is None or not readahead_secs:
+            return True
+        return duration < FILLING_FRACTION * readahead_secs
+
+    def observe(self, cache_speed=None, demuxer_cache_state=None, readahead_secs=None):
+        """
+        Adds a bandwidth sample. With demuxer_cache_state (and mpv's current
+        demuxer-readahead-secs) samples taken while the cache is full are skipped.
+        """
+        if demuxer_cache_state and not self.filling(demuxer_cache_state, readahead_secs):
+            return
+        sample = cache_speed
+        if not sample and demuxer_cache_state:
+            sample = demuxer_cache_state.get('raw-input-rate')
+        if not sample:
+            return
+        if self.speed is None:
+            self.speed = float(sample)
+        else:
+            self.speed = SPEED_SMOOTHING * sample + (1 - SPEED_SMOOTHING) * self.speed
+
+    @staticmethod
+    def stream_bitrate(video_bitrate=None, audio_bitrate=None, file_size=None, duration=None):
+        """Returns the stream rate in bytes/s, preferring the container average."""
+        if file_size and duration:
+            return file_size / duration
+        bits = (video_bitrate or 0) + (audio_bitrate or 0)
+        return bits / 8 if bits else None
+
+    def decide(self, bitrate):
+        """
+        Returns (settings, reason) when the settings should change, else None.
+        bitrate is in bytes/s.
+        """
+        if not self.speed or not bitrate:
+            return None
+
+        headroom = self.speed / bitrate
+        for limit, readahead_secs, cache_secs in PROFILES:
+            if headroom < limit:
+                break
+
+        wanted_bytes = int(bitrate * cache_secs)
+        max_bytes = max(self.min_bytes, min(wanted_bytes, self.memory_budget))
+        if max_bytes < wanted_bytes:
+            # Budget bound: only promise what fits in memory
+            cache_secs = int(max_bytes / bitrate)
+            readahead_secs = min(readahead_secs, cache_secs)
+
+        settings = {
+            'demuxer-max-bytes': max_bytes,
+            'demuxer-readahead-secs': readahead_secs,
+            'cache-secs': cache_secs,
+        }
+        if self.applied and not self._significant(settings):
+            return None
+
+        self.applied = settings
+        reason = (f"speed={self.speed / MB:.2f}MB/s bitrate={bitrate / MB:.2f}MB/s "
+                  f"headroom={headroom:.1f}x")
+        return settings, reason
+
+    def _significant(self, settings):
+        for key, value in settings.items():
+            old = self.applied.get(key)
+            if not old or abs(value - old) / old > CHANGE_THRESHOLD:
+                return True
+        return False
@@ -0,0 +1,100 @@
+import hashlib
+import math
+import posixpath
+import urllib.parse
+
+DIGEST_BYTES = 16 # blake2b digest kept per visited URL
+
+def canonical_url(url):
+    """
+    Normal form of a directory/file URL: lower-case scheme and host, no
+    default port, query or fragment, dot segments and repeated slashes
+    resolved, and every path segment percent-encoded the same way
+    (so 'Tom%20%26%20Jerry', 'Tom & Jerry' and 'Tom%20&%20Jerry' agree).
+    """
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80 or scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    trailing = path.endswith("/")
+    path = posixpath.normpath(path) if path != "/" else "/"
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/") # normpath keeps a leading '//'
+    # Segment-wise so an encoded '/' (%2F) inside a name stays encoded
+    path = "/".join(urllib.parse.quote(urllib.parse.unquote(segment), safe="") for segment in path.split("/"))
+    if trailing and not path.endswith("/"):
+        path += "/"
+    return urllib.parse.urlunsplit((scheme, host, path, "", ""))
+
+class BloomFilter:
+    """Fixed-size bit array; may report a URL as seen that wasn't (at error_rate), never the reverse."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, digest):
+        """Sets digest's bits; returns True if any was unset (definitely new)."""
+        new = False
+        for pos in self._positions(digest):
+            byte, bit = divmod(pos, 8)
+            if not self.array[byte] & (1 << bit):
+                self.array[byte] |= 1 << bit
+                new = True
+        return new
+
+    def __contains__(self, digest):
+        return all(self.array[pos // 8] & (1 << (pos % 8)) for pos in self._positions(digest))
+
+class VisitedSet:
+    """
+    URLs already queued in a crawl, kept as 16-byte digests of their
+    canonical form instead of full strings. With bloom_capacity set it uses
+    a Bloom filter instead (about 2 bytes per URL at 0.1% false positives),
+    for million-directory crawls where even digests add up. A false
+    positive skips a folder unseen, so such crawls never sweep the index.
+    """
+
+    def __init__(self, fold_case=True, bloom_capacity=None, error_rate=0.001):
+        self.fold_case = fold_case # DhakaFlix links differ in case only when pointing at the same folder
+        self.bloom = BloomFilter(bloom_capacity, error_rate) if bloom_capacity else None
+        self.digests = set()
+        self.size = 0
+
+    def _digest(self, url):
+        key = canonical_url(url)
+        if self.fold_case:
+            key = key.lower()
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=DIGEST_BYTES).digest()
+
+    def add(self, url):
+        """Records url; returns False if it (or an equivalent spelling of it) was already there."""
+        digest = self._digest(url)
+        if self.bloom is not None:
+            new = self.bloom.add(digest)
+        else:
+            new = digest not in self.digests
+            self.digests.add(digest)
+        if new:
+            self.size += 1
+        return new
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        digest = self._digest(url)
+        return digest in self.bloom if self.bloom is not None else digest in self.digests
+
+    def __len__(self):
+        return self.size
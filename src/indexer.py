@@ -0,0 +1,205 @@
+"""
+Headless indexer: crawls DhakaFlix roots into index.db without Qt, for cron
+jobs and server boxes.
+
+    python -m src.indexer                          # full crawl of DEFAULT_ROOTS
+    python -m src.indexer --resume                 # continue a stopped crawl if there is one
+    python -m src.indexer --retry-failed           # only the folders in crawl_failures
+    python -m src.indexer --roots http://172.16.50.7/DHAKA-FLIX-7/ --concurrency 4
+    python -m src.indexer --snapshots snapshots/        # also keep the raw listings
+    python -m src.indexer --from-snapshots snapshots/   # rebuild the index offline from them
+    python -m src.indexer --protocol ftp --ftp-connections 8   # list folders over FTP (MLSD)
+
+Progress goes to stdout as JSON lines ({"event": ...}); diagnostics go to stderr.
+
+Exit codes:
+    0  crawl complete, every directory listed
+    1  crawl complete, some directories failed (see crawl_failures / --retry-failed)
+    2  bad arguments
+    3  nothing to do or fatal error (no failures to retry, database unusable, crawl crashed)
+    130 interrupted (SIGINT/SIGTERM); run again with --resume
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import signal
+import sqlite3
+import sys
+import time
+
+from src.core.crawler import Crawler, DEFAULT_ROOTS, MAX_RETRIES, PER_HOST_LIMIT, root_label
+from src.core.crawl_concurrency import INITIAL_LIMIT
+from src.core.ftp_listing import FTP_CONNECTIONS, FTP_PORT
+from src.core.db import DatabaseHandler
+from src.core.index_writer import IndexWriter
+from src.core.listing_parser import DEFAULT_BACKEND, available_backends
+from src.core.snapshot_store import SnapshotStore
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+EXIT_INTERRUPTED = 130
+
+class JsonLinesCrawler(Crawler):
+    """Crawler that writes every hook as one JSON object per line and stores results via an IndexWriter."""
+
+    def __init__(self, out, **kwargs):
+        super().__init__(**kwargs)
+        self.out = out
+        self.writer = None
+
+    def emit(self, event, **fields):
+        fields["event"] = event
+        fields["t"] = round(time.time(), 3)
+        self.out.write(json.dumps(fields) + "\n")
+        self.out.flush()
+
+    def on_progress(self, message):
+        self.emit("log", message=message)
+
+    def on_file(self, data):
+        self.writer.add_file(data)
+
+    def on_directory_done(self, root, url, ok, children):
+        self.writer.directory_done(root, url, ok, children)
+
+    def on_directory_failed(self, root, url, depth, status, error):
+        if self.replay_store is None: # A listing missing from the snapshots is not a server failure
+            self.writer.directory_failed(root, url, depth, status, error)
+        self.emit("directory_failed", root=root, url=url, depth=depth, status=status, error=error)
+
+    def on_summary(self):
+        self.emit("progress", total=self.metrics.summary(),
+                  roots={root: m.summary() for root, m in self.root_metrics.items()},
+                  limits={host: c.current_limit() for host, c in self.controllers.items()})
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.indexer", description="Headless DhakaFlix indexer")
+    parser.add_argument("--db", default="index.db", help="Index database (default: index.db)")
+    parser.add_argument("--roots", nargs="+", default=DEFAULT_ROOTS, metavar="URL",
+                        help="Root listing URLs to crawl (default: all DhakaFlix roots)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true", help="Continue the last stopped crawl if there is one")
+    mode.add_argument("--retry-failed", action="store_true", help="Only crawl folders that failed before")
+    parser.add_argument("--concurrency", type=int, default=INITIAL_LIMIT,
+                        help=f"Starting requests per server (default: {INITIAL_LIMIT})")
+    parser.add_argument("--max-concurrency", type=int, default=PER_HOST_LIMIT,
+                        help=f"Ceiling for the adaptive per-server limit (default: {PER_HOST_LIMIT})")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help="Retries per failed directory")
+    parser.add_argument("--bloom-capacity", type=int, metavar="N",
+                        help="Track visited folders in a Bloom filter sized for N folders (huge crawls; "
+                             "nothing is removed from the index, as a false positive skips a folder)")
+    parser.add_argument("--parser", default=DEFAULT_BACKEND, choices=available_backends(),
+                        help="Listing parser backend")
+    parser.add_argument("--listing", default="auto", choices=["auto", "h5ai", "html"],
+                        help="Directory listing format: h5ai JSON API, HTML pages, or auto-detect (default)")
+    parser.add_argument("--protocol", default="http", choices=["http", "ftp"],
+                        help="List folders over HTTP (default) or FTP with MLSD; files are indexed by HTTP URL")
+    parser.add_argument("--ftp-port", type=int, default=FTP_PORT, help=f"FTP port (default: {FTP_PORT})")
+    parser.add_argument("--ftp-connections", type=int, default=FTP_CONNECTIONS,
+                        help=f"Parallel FTP connections per server (default: {FTP_CONNECTIONS})")
+    parser.add_argument("--report", metavar="PATH", help="Also write the crawl metrics report here")
+    snapshots = parser.add_mutually_exclusive_group()
+    snapshots.add_argument("--snapshots", metavar="DIR", help="Store raw listings here while crawling")
+    snapshots.add_argument("--from-snapshots", metavar="DIR",
+                           help="Re-index from listings stored with --snapshots instead of the network")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.max_concurrency < 1 or args.retries < 0:
+        parser.error("--concurrency and --max-concurrency must be >= 1, --retries >= 0")
+    if args.bloom_capacity is not None and args.bloom_capacity < 1:
+        parser.error("--bloom-capacity must be >= 1")
+    if args.ftp_connections < 1:
+        parser.error("--ftp-connections must be >= 1")
+    if args.from_snapshots and (args.resume or args.retry_failed):
+        parser.error("--from-snapshots always rebuilds; it can't be combined with --resume/--retry-failed")
+    out = sys.stdout
+
+    crawler = JsonLinesCrawler(out, roots=args.roots, parser_backend=args.parser)
+    crawler.concurrency = args.concurrency
+    crawler.per_host_limit = args.max_concurrency
+    crawler.max_retries = args.retries
+    crawler.bloom_capacity = args.bloom_capacity
+    crawler.listing_mode = args.listing
+    crawler.protocol = args.protocol
+    crawler.ftp_port = args.ftp_port
+    crawler.ftp_connections = args.ftp_connections
+
+    try:
+        db = DatabaseHandler(args.db)
+        db.conn.execute('SELECT 1 FROM files LIMIT 1')
+    except sqlite3.Error as e:
+        crawler.emit("error", message=f"Cannot open {args.db}: {e}")
+        return EXIT_FATAL
+    writer = IndexWriter(db, crawler)
+    crawler.writer = writer
+
+    roots = args.roots
+    if args.snapshots:
+        crawler.snapshot_store = SnapshotStore(args.snapshots)
+    elif args.from_snapshots:
+        crawler.replay_store = SnapshotStore(args.from_snapshots)
+        roots = [root for root in roots if crawler.replay_store.has(root)]
+        if not roots:
+            crawler.emit("error", message=f"No snapshots of the requested roots in {args.from_snapshots}")
+            db.close()
+            return EXIT_FATAL
+
+    if args.retry_failed:
+        resume = writer.start_retry()
+        if resume is None:
+            crawler.emit("finished", complete=True, message="No failed folders to retry")
+            db.close()
+            return EXIT_FATAL
+    else:
+        resumable = writer.resumable(roots) if args.resume else {}
+        if resumable:
+            resume = writer.start_resume({root: r[0] for root, r in resumable.items()})
+        else:
+            resume = writer.start_full(roots)
+    mode = "retry" if args.retry_failed else "resume" if resume else "replay" if args.from_snapshots else "full"
+    crawler.emit("start", db=args.db, roots=list(writer.generations), mode=mode)
+
+    # Ctrl+C / kill stop the crawl cleanly so the frontier is saved for --resume
+    def request_stop(signum, frame):
+        crawler.stop()
+    previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+
+    # Engine diagnostics are plain prints; keep stdout for JSON lines only
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            crawler.scan_server(resume=resume)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    complete = crawler.crawl_complete()
+    removed = writer.finish(complete, crawler.failed_urls, sweep=crawler.sweep_safe())
+    if complete and not crawler.sweep_safe():
+        print("Bloom filter visited set: nothing removed, run without --bloom-capacity to drop stale files",
+              file=sys.stderr)
+    if args.report:
+        crawler.metrics.write_report(args.report)
+    crawler.emit("finished", complete=complete, removed=removed, failed=len(crawler.failed_urls),
+                 summary=crawler.metrics.summary(),
+                 roots={root_label(root): count for root, count in writer.root_files.items()})
+    db.close()
+    for store in (crawler.snapshot_store, crawler.replay_store):
+        if store is not None:
+            store.close()
+
+    if crawler.aborted:
+        return EXIT_FATAL # Died on an error, not stopped; --resume continues from the saved frontier
+    if not complete:
+        return EXIT_INTERRUPTED
+    return EXIT_PARTIAL if crawler.failed_urls else EXIT_OK
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support() # Listing parser worker processes
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import traceback
 import datetime
 import locale
+import multiprocessing
 import sys
 
 # Fix for MPV on Linux (Segmentation Fault)
@@ -9,11 +10,12 @@ try:
 except Exception as e:
     print(f"Warning: Could not set locale: {e}")
 
-from PyQt6.QtWidgets import QMessageBox, QApplication
-from src.ui.mainwindow import MainWindow
+# Qt and the UI are imported inside the functions: spawned listing parser workers
+# re-import this script (as __mp_main__) and must not load them
 
 def exception_hook(exctype, value, tb):
     """Global exception handler to log crashes."""
+    from PyQt6.QtWidgets import QMessageBox, QApplication
     error_msg = "".join(traceback.format_exception(exctype, value, tb))
     print("Uncaught exception:", error_msg)
     
@@ -38,6 +40,9 @@ def exception_hook(exctype, value, tb):
     sys.exit(1)
 
 def main():
+    from PyQt6.QtWidgets import QApplication
+    from src.ui.mainwindow import MainWindow
+
     # Fix for MPV on Linux (Segmentation Fault)
     try:
         locale.setlocale(locale.LC_NUMERIC, 'C')
@@ -54,4 +59,5 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Listing parser worker processes in the frozen build
     main()
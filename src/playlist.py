@@ -0,0 +1,72 @@
+"""
+Playlist export: writes an M3U/M3U8 for a folder, some of its seasons or a
+search, straight from index.db (build it first with the app's "Update
+Index" or python -m src.indexer).
+
+    python -m src.playlist --folder http://172.16.50.9/DHAKA-FLIX-9/Anime/Show/ -o show.m3u
+    python -m src.playlist --folder URL --seasons 16- -o later.m3u8   # season 16 onwards
+    python -m src.playlist --search "naruto" --local -o naruto.m3u    # downloaded episodes from disk
+
+Exit codes:
+    0  playlist written
+    2  bad arguments
+    3  nothing matched, or the database or output file is unusable
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from src.core.db import DatabaseHandler
+from src.core import playlist
+
+EXIT_OK = 0
+EXIT_USAGE = 2
+EXIT_FATAL = 3
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.playlist", description="Export an M3U playlist from the index")
+    parser.add_argument("--db", default="index.db", help="Index database (default: index.db)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--folder", metavar="URL", help="Every file below this folder")
+    source.add_argument("--search", metavar="TEXT", help="Every file the search box would find for TEXT")
+    parser.add_argument("--seasons", metavar="RANGE", help="With --folder: only these seasons, e.g. 3, 2-5 or 16-")
+    parser.add_argument("--local", action="store_true", help="Play downloaded files from disk")
+    parser.add_argument("--title", help="Playlist title (#PLAYLIST)")
+    parser.add_argument("-o", "--output", required=True, help="Playlist file to write (.m3u or .m3u8)")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    seasons = None
+    if args.seasons:
+        if not args.folder:
+            parser.error("--seasons needs --folder")
+        try:
+            seasons = playlist.parse_seasons(args.seasons)
+        except ValueError:
+            parser.error(f"--seasons: expected N, N-M or N-, got {args.seasons!r}")
+
+    started = time.perf_counter()
+    try:
+        db = DatabaseHandler(args.db)
+        rows = playlist.collect(db, args.folder, seasons, args.search)
+        db.close()
+    except sqlite3.Error as e:
+        print(f"Cannot read {args.db}: {e}", file=sys.stderr)
+        return EXIT_FATAL
+    if not rows:
+        print("No indexed files match; update the index or check the folder URL.", file=sys.stderr)
+        return EXIT_FATAL
+    try:
+        count = playlist.write_m3u(rows, args.output, args.local, args.title)
+    except OSError as e:
+        print(f"Cannot write {args.output}: {e}", file=sys.stderr)
+        return EXIT_FATAL
+    print(f"Wrote {count} entries to {args.output} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
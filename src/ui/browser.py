@@ -6,6 +6,21 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLineEdit, QListWidget,
                              QTreeWidget, QTreeWidgetItem, QTabWidget, QTreeWidgetItemIterator)
 from PyQt6.QtCore import pyqtSignal, Qt, QThread, QTimer
 
+FOLDER_ROLE = Qt.ItemDataRole.UserRole + 1 # Folder URL on folder nodes (UserRole marks files)
+
+def format_size(size):
+    """Human readable byte count, '' when unknown."""
+    if size is None:
+        return ""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def format_mtime(mtime):
+    return time.strftime("%Y-%m-%d %H:%M", time.gmtime(mtime)) if mtime else ""
+
 class SearchThread(QThread):
     results_ready = pyqtSignal(list)
     
@@ -25,6 +40,10 @@ class SearchThread(QThread):
 class FileBrowser(QWidget):
     file_selected = pyqtSignal(str) # Emits file path
     download_requested = pyqtSignal(str, str) # url, filename
+    folder_expanded = pyqtSignal(str) # folder url
+    folder_refresh_requested = pyqtSignal(str) # folder url
+    search_performed = pyqtSignal(str) # query
+    playlist_requested = pyqtSignal(str, str) # folder url or "", search query or ""
     
     def __init__(self, db_handler):
         super().__init__()
@@ -62,9 +81,12 @@ class FileBrowser(QWidget):
         tree_layout.addWidget(self.tree_search_bar)
         
         self.file_tree = QTreeWidget()
-        self.file_tree.setHeaderLabels(["Name", "Type"])
+        self.file_tree.setHeaderLabels(["Name", "Type", "Size", "Modified"])
         self.file_tree.setColumnWidth(0, 400)
         self.file_tree.itemDoubleClicked.connect(self.on_tree_item_double_click)
+        self.file_tree.itemExpanded.connect(self.on_tree_item_expanded)
+        self.file_tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.file_tree.customContextMenuRequested.connect(self.open_tree_context_menu)
         tree_layout.addWidget(self.file_tree)
         
         self.tabs.addTab(self.tree_widget, "Browse")
@@ -99,12 +121,12 @@ class FileBrowser(QWidget):
         # Organize: Category -> ParentDir -> Files
         structure = {}
         
-        for path, filename, category, parent_dir, downloaded in files:
+        for path, filename, category, parent_dir, downloaded, size, mtime in files:
             if category not in structure:
                 structure[category] = {}
             if parent_dir not in structure[category]:
                 structure[category][parent_dir] = []
-            structure[category][parent_dir].append((filename, path, downloaded))
+            structure[category][parent_dir].append((filename, path, downloaded, size, mtime))
             
         # Build Tree (Sorted)
         for category in sorted(structure.keys()):
@@ -118,15 +140,71 @@ class FileBrowser(QWidget):
             for folder, file_list in sorted_folders:
                 folder_name = self.get_folder_name(folder)
                 folder_item = QTreeWidgetItem(cat_item, [folder_name, "Folder"])
+                folder_item.setData(0, FOLDER_ROLE, folder)
                 folder_item.setExpanded(False) # Collapse by default to keep clean
                 
                 # Sort Files
                 sorted_files = sorted(file_list, key=lambda x: x[0].lower())
                 
-                for fname, fpath, downloaded in sorted_files:
-                    name_display = f"[OFFLINE] {fname}" if downloaded else fname
-                    file_item = QTreeWidgetItem(folder_item, [name_display, "File"])
-                    file_item.setData(0, Qt.ItemDataRole.UserRole, fpath)
+                for fname, fpath, downloaded, size, mtime in sorted_files:
+                    self.add_file_item(folder_item, fname, fpath, downloaded, size, mtime)
+
+    def add_file_item(self, folder_item, fname, fpath, downloaded, size, mtime):
+        name_display = f"[OFFLINE] {fname}" if downloaded else fname
+        file_item = QTreeWidgetItem(folder_item, [name_display, "File", format_size(size), format_mtime(mtime)])
+        file_item.setData(0, Qt.ItemDataRole.UserRole, fpath)
+        return file_item
+
+    def find_folder_item(self, category, folder, create=False):
+        cat_item = None
+        for i in range(self.file_tree.topLevelItemCount()):
+            if self.file_tree.topLevelItem(i).text(0) == category:
+                cat_item = self.file_tree.topLevelItem(i)
+                break
+        if cat_item is not None:
+            for j in range(cat_item.childCount()):
+                if cat_item.child(j).data(0, FOLDER_ROLE) == folder:
+                    return cat_item.child(j)
+        if not create:
+            return None
+        if cat_item is None:
+            cat_item = QTreeWidgetItem(self.file_tree, [category, "Category"])
+            cat_item.setExpanded(True)
+        folder_item = QTreeWidgetItem(cat_item, [self.get_folder_name(folder), "Folder"])
+        folder_item.setData(0, FOLDER_ROLE, folder)
+        return folder_item
+
+    def apply_diff(self, diff):
+        """Updates the tree in place from an IndexWriter.apply_refresh diff instead of reloading it."""
+        self.file_tree.setUpdatesEnabled(False)
+        removed = set(diff["removed"])
+        changed = {row[0]: row for row in diff["updated"]}
+        iterator = QTreeWidgetItemIterator(self.file_tree)
+        doomed = []
+        while iterator.value():
+            item = iterator.value()
+            path = item.data(0, Qt.ItemDataRole.UserRole)
+            if path in removed:
+                doomed.append(item)
+            elif path in changed:
+                size, mtime = changed[path][5:]
+                item.setText(2, format_size(size))
+                item.setText(3, format_mtime(mtime))
+            iterator += 1
+        for item in doomed:
+            folder_item = item.parent()
+            folder_item.removeChild(item)
+            if folder_item.childCount() == 0:
+                folder_item.parent().removeChild(folder_item)
+
+        touched = {}
+        for path, filename, category, parent_dir, downloaded, size, mtime in diff["added"]:
+            folder_item = self.find_folder_item(category, parent_dir, create=True)
+            self.add_file_item(folder_item, filename, path, downloaded, size, mtime)
+            touched[id(folder_item)] = folder_item
+        for folder_item in touched.values():
+            folder_item.sortChildren(0, Qt.SortOrder.AscendingOrder)
+        self.file_tree.setUpdatesEnabled(True)
 
     def filter_tree(self, text):
         query = text.lower()
@@ -169,6 +247,8 @@ class FileBrowser(QWidget):
         if len(query) > 0 and len(query) < 3:
             return 
         self.search_thread.search(query)
+        if query:
+            self.search_performed.emit(query)
 
     def on_search_results(self, results):
         self.file_list.clear()
@@ -202,6 +282,11 @@ class FileBrowser(QWidget):
              local_path = self.db.get_local_path(url)
              self.play_media(url, local_path)
 
+    def on_tree_item_expanded(self, item):
+        folder = item.data(0, FOLDER_ROLE)
+        if folder:
+            self.folder_expanded.emit(folder)
+
     def play_media(self, url, local_path):
         if local_path and os.path.exists(local_path):
             self.file_selected.emit(local_path)
@@ -210,6 +295,18 @@ class FileBrowser(QWidget):
                 QMessageBox.warning(self, "File Missing", "Local file not found. Streaming from server instead.")
             self.file_selected.emit(url)
 
+    def open_tree_context_menu(self, position):
+        item = self.file_tree.itemAt(position)
+        folder = item.data(0, FOLDER_ROLE) if item else None
+        if not folder: return
+
+        menu = QMenu()
+        refresh_action = menu.addAction("Refresh this folder")
+        refresh_action.triggered.connect(lambda: self.folder_refresh_requested.emit(folder))
+        playlist_action = menu.addAction("Export playlist...")
+        playlist_action.triggered.connect(lambda: self.playlist_requested.emit(folder, ""))
+        menu.exec(self.file_tree.viewport().mapToGlobal(position))
+
     def open_context_menu(self, position):
         item = self.file_list.itemAt(position)
         if not item: return
@@ -219,6 +316,10 @@ class FileBrowser(QWidget):
         menu = QMenu()
         download_action = menu.addAction("Download")
         download_action.triggered.connect(lambda: self.download_requested.emit(url, item.data(101)))
+        query = self.search_bar.text().strip()
+        if query:
+            playlist_action = menu.addAction("Export results as playlist...")
+            playlist_action.triggered.connect(lambda: self.playlist_requested.emit("", query))
         menu.exec(self.file_list.mapToGlobal(position))
         
     def get_current_items(self):
@@ -230,30 +331,33 @@ class FileBrowser(QWidget):
                 # Skip "No results found" which has no URL
                 if item.flags() & Qt.ItemFlag.ItemIsEnabled and item.data(100): 
                     items.append((item.data(100), item.data(102)))
-        else: # Tree View
-             iterator = QTreeWidgetItemIterator(self.file_tree)
-             while iterator.value():
-                 item = iterator.value()
-                 url = item.data(0, Qt.ItemDataRole.UserRole)
-                 if url:
-                     local_path = self.db.get_local_path(url)
-                     items.append((url, local_path))
-                 iterator += 1
+        else: # Tree View: the folder of the selected file, not the whole tree
+            item = self.file_tree.currentItem()
+            folder_item = item.parent() if item else None
+            folder = folder_item.data(0, FOLDER_ROLE) if folder_item else None
+            if folder:
+                local_paths = self.db.get_downloaded_paths(folder)
+                for i in range(folder_item.childCount()):
+                    child = folder_item.child(i)
+                    url = child.data(0, Qt.ItemDataRole.UserRole)
+                    if url and not child.isHidden():
+                        items.append((url, local_paths.get(url)))
         return items
 
-    def get_next_file(self, current_path):
-        items = self.get_current_items()
-        for i, (url, local_path) in enumerate(items):
-            if url == current_path or local_path == current_path:
-                if i + 1 < len(items):
-                    return items[i+1][1] if items[i+1][1] and os.path.exists(items[i+1][1]) else items[i+1][0]
-        return None
-
-    def get_prev_file(self, current_path):
-        items = self.get_current_items()
-        for i, (url, local_path) in enumerate(items):
-            if url == current_path or local_path == current_path:
-                if i - 1 >= 0:
-                     return items[i-1][1] if items[i-1][1] and os.path.exists(items[i-1][1]) else items[i-1][0]
-        return None
+    def select_url(self, url):
+        """Highlights the item for url in the current view (keeps playlist and browser in sync)."""
+        if self.tabs.currentIndex() == 0: # List View
+            for i in range(self.file_list.count()):
+                item = self.file_list.item(i)
+                if item.data(100) == url:
+                    self.file_list.setCurrentItem(item)
+                    return
+        else: # Tree View
+            iterator = QTreeWidgetItemIterator(self.file_tree)
+            while iterator.value():
+                item = iterator.value()
+                if item.data(0, Qt.ItemDataRole.UserRole) == url:
+                    self.file_tree.setCurrentItem(item)
+                    return
+                iterator += 1
 
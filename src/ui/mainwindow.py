@@ -1,12 +1,17 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QStackedWidget, QMessageBox, QLabel, QProgressBar)
-from PyQt6.QtCore import QThread, QTimer, Qt
+                             QPushButton, QStackedWidget, QMessageBox, QLabel, QProgressBar, QFileDialog)
+from PyQt6.QtCore import QThread, QTimer, Qt, pyqtSignal
 import os
+import shutil
 import time
 from src.core.db import DatabaseHandler
-from src.core.http_client import HttpClient
+from src.core.http_client import HttpClient, DEFAULT_ROOTS, root_label
+from src.core.index_writer import IndexWriter
+from src.core import playlist
 from src.core.downloader import DownloadManager
-from src.ui.browser import FileBrowser
+from src.core.stream_proxy import StreamProxy
+from src.core.prefetcher import Prefetcher
+from src.ui.browser import FileBrowser, format_size
 from src.ui.player import PlayerWidget
 from src.ui.downloads import DownloadsWidget
 
@@ -14,9 +19,28 @@ class IndexerThread(QThread):
     def __init__(self, client):
         super().__init__()
         self.client = client
+        self.resume = None # root -> (pending, visited) when resuming a stopped crawl
 
     def run(self):
-        self.client.scan_server()
+        self.client.scan_server(resume=self.resume)
+
+REFRESH_DEPTH = 2 # Folder levels re-listed below a refreshed folder (show -> season -> episodes)
+
+class RefreshThread(QThread):
+    refreshed = pyqtSignal(list) # Crawler.refresh_subtree listings
+    failed = pyqtSignal(str)
+
+    def __init__(self, client, writer, url):
+        super().__init__()
+        self.client = client
+        self.writer = writer
+        self.url = url
+
+    def run(self):
+        try:
+            self.refreshed.emit(self.client.refresh_subtree(self.url, REFRESH_DEPTH, cache=self.writer))
+        except Exception as e:
+            self.failed.emit(str(e))
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -26,8 +50,13 @@ class MainWindow(QMainWindow):
         
         # Core Components
         self.db = DatabaseHandler()
-        self.client = HttpClient()
+        self.client = HttpClient(roots=DEFAULT_ROOTS)
+        self.writer = IndexWriter(self.db, self.client)
         self.downloader = DownloadManager(download_dir=os.path.join(os.getcwd(), "downloads"))
+        self.stream_proxy = StreamProxy(cache_dir=os.path.join(os.getcwd(), "cache", "stream"))
+        self.stream_proxy.partial_source = self.downloader.get_partial
+        self.stream_proxy.start()
+        self.prefetcher = Prefetcher(self.stream_proxy)
         
         # UI Components
         from src.ui.log_window import LogWindow
@@ -35,9 +64,12 @@ class MainWindow(QMainWindow):
         
         # Threading for Indexer
         self.indexer_thread = IndexerThread(self.client)
+        self.refresh_thread = None
         self.client.progress_signal.connect(self.update_status)
         self.client.file_found_signal.connect(self.on_file_found)
         self.client.finished_signal.connect(self.on_scan_finished)
+        self.client.directory_done_signal.connect(self.on_directory_done)
+        self.client.directory_failed_signal.connect(self.on_directory_failed)
         
         # State
         self.files_processed = 0
@@ -73,6 +105,10 @@ class MainWindow(QMainWindow):
         self.btn_update.clicked.connect(self.toggle_indexing)
         layout.addWidget(self.btn_update)
         
+        self.btn_retry = QPushButton("Retry Failed Folders")
+        self.btn_retry.clicked.connect(self.retry_failed)
+        layout.addWidget(self.btn_retry)
+        
         self.btn_log = QPushButton("Live Log")
         self.btn_log.clicked.connect(self.show_log_window)
         layout.addWidget(self.btn_log)
@@ -101,12 +137,17 @@ class MainWindow(QMainWindow):
         self.browser = FileBrowser(self.db)
         self.browser.file_selected.connect(self.play_file)
         self.browser.download_requested.connect(self.start_download)
+        self.browser.folder_expanded.connect(self.prioritize_folder)
+        self.browser.search_performed.connect(self.prioritize_search)
+        self.browser.folder_refresh_requested.connect(self.refresh_folder)
+        self.browser.playlist_requested.connect(self.export_playlist)
         self.stack.addWidget(self.browser)
         
         # View 1: Player
-        self.player = PlayerWidget()
+        self.player = PlayerWidget(stream_proxy=self.stream_proxy)
         self.player.next_requested.connect(self.play_next_file)
         self.player.prev_requested.connect(self.play_prev_file)
+        self.player.playlist_pos_changed.connect(self.on_playlist_pos_changed)
         self.player.playlist_requested.connect(lambda: self.switch_view(0))
         self.stack.addWidget(self.player)
         
@@ -132,26 +173,67 @@ class MainWindow(QMainWindow):
             self.start_indexing()
 
     def start_indexing(self):
-        reply = QMessageBox.question(self, "Full Rescan", 
-                                     "This will re-scan the entire server (172.16.50.9).\nContinue?",
-                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if self.refresh_thread and self.refresh_thread.isRunning():
+            self.status_label.setText("A folder refresh is running; try again in a moment.")
+            return
+        resume = {}
+        resumable = self.writer.resumable(self.client.roots)
+        if resumable:
+            pending = sum(r[1] for r in resumable.values())
+            reply = QMessageBox.question(self, "Resume Scan",
+                                         f"The last scan stopped with {pending} folders left on "
+                                         f"{len(resumable)} server(s).\n"
+                                         "Resume it? (No starts a full rescan)",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No |
+                                         QMessageBox.StandardButton.Cancel)
+            if reply == QMessageBox.StandardButton.Cancel:
+                return
+            if reply == QMessageBox.StandardButton.Yes:
+                resume = {root: r[0] for root, r in resumable.items()}
+
+        if not resume:
+            servers = ", ".join(root_label(root) for root in self.client.roots)
+            reply = QMessageBox.question(self, "Full Rescan", 
+                                         f"This will re-scan every server ({servers}).\nContinue?",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
         
-        if reply == QMessageBox.StandardButton.Yes:
-            # self.db.clear_index() # Keep additive loop
-            self.indexer_thread.start()
-            
-            self.is_indexing = True
-            self.btn_update.setText("Stop Indexing")
-            self.btn_update.setStyleSheet("background-color: #8B0000; color: white;") # Dark Red
-            
-            self.progress_bar.show()
-            self.start_time = time.time()
-            self.timer.start(1000)
-            self.status_label.setText("Scanning server... Please wait.")
-            
-            self.log_window.clear_log()
-            self.log_window.show()
-            self.files_processed = 0
+        # self.db.clear_index() # Keep additive loop
+        if resume:
+            # Same generation: directories finished before the stop are skipped
+            self.start_crawl(self.writer.start_resume(resume))
+        else:
+            # Rows a crawl doesn't re-stamp are swept once it completes
+            self.start_crawl(self.writer.start_full(self.client.roots))
+
+    def retry_failed(self):
+        if self.is_indexing:
+            return
+        # A partial crawl of just the failed folders (and whatever lies below them)
+        resume = self.writer.start_retry()
+        if resume is None:
+            QMessageBox.information(self, "Retry Failed Folders", "No failed folders to retry.")
+            return
+        self.start_crawl(resume)
+
+    def start_crawl(self, resume):
+        """Starts the indexer; resume is the root -> (pending, visited) map from the IndexWriter."""
+        self.indexer_thread.resume = resume
+        self.indexer_thread.start()
+        
+        self.is_indexing = True
+        self.btn_update.setText("Stop Indexing")
+        self.btn_update.setStyleSheet("background-color: #8B0000; color: white;") # Dark Red
+        
+        self.progress_bar.show()
+        self.start_time = time.time()
+        self.timer.start(1000)
+        self.status_label.setText("Scanning server... Please wait.")
+        
+        self.log_window.clear_log()
+        self.log_window.show()
+        self.files_processed = 0
 
     def stop_indexing(self):
         self.client.stop()
@@ -165,20 +247,83 @@ class MainWindow(QMainWindow):
     def update_timer(self):
         elapsed = int(time.time() - self.start_time)
         mins, secs = divmod(elapsed, 60)
-        self.status_label.setText(f"Scanning... {mins:02d}:{secs:02d} (Files: {self.files_processed})")
+        per_root = ", ".join(f"{root_label(root)} {count}" for root, count in self.writer.root_files.items())
+        self.status_label.setText(f"Scanning... {mins:02d}:{secs:02d} (Files: {self.files_processed} - {per_root})")
 
     def on_file_found(self, data):
-        self.db.add_file(data['path'], data['filename'], data['parent_dir'])
-        self.files_processed += 1
-        self.log_window.append_log(f"[FOUND] {data['filename']}")
-        
         # Periodic Commit (Save progress every 50 files)
-        if self.files_processed % 50 == 0:
-            self.db.commit()
+        if self.writer.add_file(data):
             self.log_window.append_log("[DB] Auto-saved progress...")
+        self.files_processed += 1
+        self.log_window.append_log(f"[FOUND] {data['filename']}")
+
+    def on_directory_done(self, root, url, ok, children):
+        self.writer.directory_done(root, url, ok, children)
+
+    def refresh_folder(self, url):
+        # Shares the crawler with the indexer, so one at a time
+        if self.is_indexing or (self.refresh_thread and self.refresh_thread.isRunning()):
+            self.status_label.setText("Busy indexing; try refreshing the folder again later.")
+            return
+        self.status_label.setText(f"Refreshing {self.browser.get_folder_name(url)}...")
+        self.refresh_started = time.perf_counter()
+        self.refresh_thread = RefreshThread(self.client, self.writer, url)
+        self.refresh_thread.refreshed.connect(self.on_folder_refreshed)
+        self.refresh_thread.failed.connect(lambda error: self.status_label.setText(f"Refresh failed: {error}"))
+        self.refresh_thread.start()
+
+    def on_folder_refreshed(self, listings):
+        # DB writes stay on the UI thread like the crawl's
+        diff = self.writer.apply_refresh(listings)
+        self.browser.apply_diff(diff)
+        elapsed_ms = (time.perf_counter() - self.refresh_started) * 1000
+        self.status_label.setText(f"Refreshed {diff['listed'] + diff['not_modified']} folders in {elapsed_ms:.0f} ms: "
+                                  f"{len(diff['added'])} new, {len(diff['updated'])} changed, "
+                                  f"{len(diff['removed'])} removed"
+                                  + (f", {diff['failed']} failed" if diff['failed'] else ""))
+
+    def export_playlist(self, folder, query):
+        name = self.browser.get_folder_name(folder) if folder else query
+        path, _ = QFileDialog.getSaveFileName(self, "Export Playlist", f"{name}.m3u",
+                                              "Playlists (*.m3u *.m3u8)")
+        if not path:
+            return
+        started = time.perf_counter()
+        try:
+            # Index only, no network; downloaded episodes play from disk
+            count = playlist.export_playlist(self.db, path, folder or None, query=query or None,
+                                             prefer_local=True, title=name)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Playlist", f"Could not write {path}: {e}")
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.status_label.setText(f"Exported {count} files to {os.path.basename(path)} in {elapsed_ms:.0f} ms")
+
+    def prioritize_folder(self, url):
+        # Crawl what the user is browsing before the rest of the servers
+        if self.is_indexing:
+            self.client.boost(url)
+
+    def prioritize_search(self, query):
+        if self.is_indexing:
+            self.client.boost_matching(query)
+
+    def on_directory_failed(self, root, url, depth, status, error):
+        self.writer.directory_failed(root, url, depth, status, error)
+        self.log_window.append_log(f"[FAILED] {url} ({error})")
 
     def on_scan_finished(self):
-        self.db.commit() # Final commit
+        complete = self.client.crawl_complete()
+        removed = self.writer.finish(complete, self.client.failed_urls, sweep=self.client.sweep_safe()) # Final commit
+        if complete and not self.client.sweep_safe():
+            self.log_window.append_log("[DB] Bloom filter visited set may have skipped folders, nothing removed")
+        elif complete:
+            self.log_window.append_log(f"[DB] Removed {removed} files no longer on the server"
+                                       f" ({len(self.client.failed_urls)} folders failed and were kept)")
+        else:
+            self.log_window.append_log("[DB] Crawl stopped early, nothing removed")
+        self.client.metrics.write_report(os.path.join(os.getcwd(), "crawl_report.json"))
+        self.log_window.append_log(f"[METRICS] {self.client.metrics.summary_text()}")
         self.timer.stop()
         self.progress_bar.hide()
         
@@ -191,32 +336,53 @@ class MainWindow(QMainWindow):
         self.btn_update.setText("Update Index")
         self.btn_update.setStyleSheet("") # Reset style
         self.btn_update.setEnabled(True)
+        failures = len(self.db.get_failures())
+        self.btn_retry.setText(f"Retry Failed Folders ({failures})" if failures else "Retry Failed Folders")
         
         self.browser.load_files() # Refresh view with new files
         self.log_window.append_log("[DONE] Indexing finished or stopped.")
 
     def play_file(self, path):
+        # Hand mpv the whole current view so it can open the next entry early
+        self.playlist_items = self.browser.get_current_items()
+        playlist = [local_path if local_path and os.path.exists(local_path) else url
+                    for url, local_path in self.playlist_items]
+        if path not in playlist:
+            self.playlist_items = [(path, None)]
+            playlist = [path]
+
         self.current_playing_path = path
         self.switch_view(1)
-        self.player.play(path)
+        self.player.play_playlist(playlist, playlist.index(path))
+
+    def on_playlist_pos_changed(self, pos):
+        if pos >= len(self.player.playlist):
+            return
+        self.current_playing_path = self.player.playlist[pos]
+        self.browser.select_url(self.playlist_items[pos][0])
+        # Warm the cache with the next item so the transition starts instantly
+        next_path = self.player.playlist[pos + 1] if pos + 1 < len(self.player.playlist) else None
+        self.prefetcher.prefetch(next_path)
 
     def play_next_file(self):
-        if hasattr(self, 'current_playing_path') and self.current_playing_path:
-            next_path = self.browser.get_next_file(self.current_playing_path)
-            if next_path:
-                self.play_file(next_path)
-            else:
-                self.status_label.setText("End of playlist.")
+        if not self.player.playlist_next():
+            self.status_label.setText("End of playlist.")
 
     def play_prev_file(self):
-        if hasattr(self, 'current_playing_path') and self.current_playing_path:
-            prev_path = self.browser.get_prev_file(self.current_playing_path)
-            if prev_path:
-                self.play_file(prev_path)
-            else:
-                self.status_label.setText("Start of playlist.")
+        if not self.player.playlist_prev():
+            self.status_label.setText("Start of playlist.")
 
     def start_download(self, url, filename):
+        # Size comes from the listing, so a full disk is caught before any bytes move
+        size, _ = self.db.get_file_info(url)
+        if size:
+            os.makedirs(self.downloader.download_dir, exist_ok=True)
+            free = shutil.disk_usage(self.downloader.download_dir).free
+            if size > free:
+                QMessageBox.warning(self, "Not Enough Space",
+                                    f"{filename} needs {format_size(size)} but only {format_size(free)} is free.")
+                return
+            self.log_window.append_log(f"[DOWNLOAD] {filename} ({format_size(size)})")
         self.switch_view(2) # Switch to downloads view
         worker = self.downloader.start_download(url, filename)
         if worker:
@@ -249,5 +415,7 @@ class MainWindow(QMainWindow):
             self.indexer_thread.wait()
         self.db.close()
         self.player.terminate()
+        self.prefetcher.stop()
+        self.stream_proxy.stop()
         self.log_window.close()
         event.accept()
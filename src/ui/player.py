@@ -1,6 +1,8 @@
 import locale
+import threading
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QFrame, QLabel, QMessageBox
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QObject
+from src.core.stream_tuning import AdaptiveCacheTuner
 
 # Set locale for MPV compatibility
 try:
@@ -15,6 +17,44 @@ except (ImportError, OSError):
     MPV_AVAILABLE = False
     print("MPV not available")
 
+UI_RATE_HZ = 4 # Max UI updates per second for high-frequency mpv properties
+
+class PropertyThrottle(QObject):
+    """
+    Coalesces mpv property updates: the mpv event thread only stores the
+    latest value, and a timer delivers it on the GUI thread at a fixed rate.
+    """
+
+    def __init__(self, rate_hz=UI_RATE_HZ, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.latest = {} # name -> newest value not yet delivered
+        self.delivered = {} # name -> last value handed to the callback
+        self.callbacks = {}
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / rate_hz))
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def observe(self, mpv_instance, name, callback):
+        self.callbacks[name] = callback
+        mpv_instance.observe_property(name, self._on_change)
+
+    def _on_change(self, name, value):
+        with self.lock:
+            self.latest[name] = value
+
+    def flush(self):
+        with self.lock:
+            if not self.latest:
+                return
+            pending, self.latest = self.latest, {}
+        for name, value in pending.items():
+            if value is None or self.delivered.get(name) == value:
+                continue
+            self.delivered[name] = value
+            self.callbacks[name](value)
+
 class PlayerWidget(QWidget):
     # Signals
     position_changed = pyqtSignal(float)
@@ -22,9 +62,12 @@ class PlayerWidget(QWidget):
     next_requested = pyqtSignal()
     prev_requested = pyqtSignal()
     playlist_requested = pyqtSignal()
+    playlist_pos_changed = pyqtSignal(int)
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, stream_proxy=None, ui_rate=UI_RATE_HZ):
         super().__init__(parent)
+        self.stream_proxy = stream_proxy # Optional local caching proxy for network streams
+        self.playlist = [] # Original paths/URLs loaded into mpv's playlist
         self.setLayout(QVBoxLayout())
         self.layout().setContentsMargins(0, 0, 0, 0)
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
@@ -34,6 +77,11 @@ class PlayerWidget(QWidget):
         self.layout().addWidget(self.container)
         
         self.mpv = None
+        self.tuner = AdaptiveCacheTuner()
+        self.throttle = PropertyThrottle(ui_rate, self)
+        # Per-file caches, refreshed on 'file-loaded' instead of on every OSD event
+        self.tracks = {} # (type, id) -> track dict
+        self.chapters = []
         
         if MPV_AVAILABLE:
             try:
@@ -41,20 +89,31 @@ class PlayerWidget(QWidget):
                 self.mpv = mpv.MPV(wid=str(int(self.container.winId())), 
                                    input_default_bindings=True, 
                                    input_vo_keyboard=True,
-                                   osc=True)
+                                   osc=True,
+                                   prefetch_playlist=True) # Open the next entry before this one ends
                 
                 self.setup_bindings()
 
-                # MPV Property observers
-                @self.mpv.property_observer('time-pos')
-                def time_observer(_name, value):
-                    if value is not None:
-                        self.position_changed.emit(value)
+                # Re-evaluate cache settings from live bandwidth measurements
+                self.tuning_timer = QTimer(self)
+                self.tuning_timer.setInterval(2000)
+                self.tuning_timer.timeout.connect(self.tune_cache)
+                self.tuning_timer.start()
+
+                # MPV Property observers (coalesced to the UI rate)
+                self.throttle.observe(self.mpv, 'time-pos', self.position_changed.emit)
+                self.throttle.observe(self.mpv, 'duration', self.duration_changed.emit)
 
-                @self.mpv.property_observer('duration')
-                def duration_observer(_name, value):
-                    if value is not None:
-                        self.duration_changed.emit(value)
+                @self.mpv.event_callback('file-loaded')
+                def on_file_loaded(_event):
+                    self.refresh_file_info()
+
+                @self.mpv.property_observer('playlist-pos')
+                def playlist_pos_observer(_name, value):
+                    if value is not None and value >= 0:
+                        self.tuner.reset() # New file, new bitrate
+                        self.tracks, self.chapters = {}, []
+                        self.playlist_pos_changed.emit(value)
 
             except Exception as e:
                 print(f"Failed to initialize MPV: {e}")
@@ -172,11 +231,8 @@ class PlayerWidget(QWidget):
             if value is not None:
                 # Try to get chapter title
                 title = ""
-                try:
-                    chapters = self.mpv.chapter_list
-                    if chapters and 0 <= value < len(chapters):
-                        title = chapters[value].get('title', '')
-                except: pass
+                if 0 <= value < len(self.chapters):
+                    title = self.chapters[value].get('title', '')
                 
                 msg = f"Chapter: {value+1}"
                 if title: msg += f" - {title}"
@@ -187,28 +243,54 @@ class PlayerWidget(QWidget):
             self.show_osd(f"{label}: Off")
             return
         
-        try:
-            # We must be careful accessing mpv properties from callback thread
-            # but track_list should be safe enough usually
-            tracks = self.mpv.track_list
-            for t in tracks:
-                if t['type'] == type_name and t['id'] == track_id:
-                    lang = t.get('lang', 'unk').upper()
-                    title = t.get('title', '')
-                    msg = f"{label}: {lang}"
-                    if title: msg += f" - {title}"
-                    self.show_osd(msg)
-                    return
-        except Exception as e:
-            print(f"OSD Error: {e}")
+        if not self.tracks:
+            self.refresh_file_info() # Track switched before 'file-loaded' arrived
+        t = self.tracks.get((type_name, track_id))
+        if t:
+            lang = t.get('lang', 'unk').upper()
+            title = t.get('title', '')
+            msg = f"{label}: {lang}"
+            if title: msg += f" - {title}"
+            self.show_osd(msg)
+            return
         
         self.show_osd(f"{label}: {track_id}")
 
+    def refresh_file_info(self):
+        try:
+            self.tracks = {(t['type'], t['id']): t for t in (self.mpv.track_list or [])}
+            self.chapters = self.mpv.chapter_list or []
+        except Exception as e:
+            print(f"Track list error: {e}")
+            self.tracks, self.chapters = {}, []
+
     def show_osd(self, text, duration=2000):
         try:
             self.mpv.command('show-text', text, duration)
         except: pass
 
+    def tune_cache(self):
+        if not self.mpv or self.mpv.idle_active:
+            return
+        try:
+            self.tuner.observe(cache_speed=self.mpv['cache-speed'],
+                               demuxer_cache_state=self.mpv['demuxer-cache-state'],
+                               readahead_secs=self.mpv['demuxer-readahead-secs'])
+            bitrate = self.tuner.stream_bitrate(video_bitrate=self.mpv['video-bitrate'],
+                                                audio_bitrate=self.mpv['audio-bitrate'],
+                                                file_size=self.mpv['file-size'],
+                                                duration=self.mpv['duration'])
+        except Exception:
+            return # Properties are unavailable until the file is loaded
+
+        decision = self.tuner.decide(bitrate)
+        if decision:
+            settings, reason = decision
+            for name, value in settings.items():
+                try: self.mpv[name] = value
+                except Exception as e: print(f"Cache tuning: could not set {name}: {e}")
+            print(f"[CACHE] {reason} -> " + ", ".join(f"{k}={v}" for k, v in settings.items()))
+
     def show_error_placeholder(self):
         msg = QLabel("MPV Library not found.\nPlease install 'mpv' and 'libmpv-dev'.\nOn Ubuntu: sudo apt install mpv libmpv-dev")
         msg.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -220,12 +302,38 @@ class PlayerWidget(QWidget):
     # mouseDoubleClickEvent and keyPressEvent removed in favor of MPV bindings
 
     def play(self, url):
-        if self.mpv:
-            self.mpv.play(url)
+        self.play_playlist([url])
+
+    def play_playlist(self, urls, start_index=0):
+        """Loads urls as mpv's internal playlist so entries chain without reopening."""
+        if not self.mpv or not urls:
+            return
+        self.playlist = list(urls)
+        self.mpv.stop() # Clears the previous playlist
+        for url in self.playlist:
+            if self.stream_proxy:
+                url = self.stream_proxy.url_for(url)
+            self.mpv.loadfile(url, 'append')
+        self.mpv.playlist_pos = start_index
+
+    def playlist_next(self):
+        if not self.mpv or self.mpv.playlist_pos is None:
+            return False
+        if self.mpv.playlist_pos + 1 >= len(self.playlist):
+            return False
+        self.mpv.playlist_next()
+        return True
+
+    def playlist_prev(self):
+        if not self.mpv or not self.mpv.playlist_pos:
+            return False
+        self.mpv.playlist_prev()
+        return True
 
     def stop(self):
         if self.mpv:
             self.mpv.stop()
+            self.playlist = []
 
     def pause(self):
         if self.mpv:
@@ -0,0 +1,390 @@
+"""
+Benchmark suite for crawl, snapshot replay, h5ai JSON vs HTML listing, HTTP vs FTP listing,
+listing parse, ingest, search, tree build and download.
+
+Runs offline against tests/synthetic_server.py and temporary databases, and
+writes the results as JSON so runs can be compared for regressions.
+
+Usage:
+    python tests/benchmark.py                       # all benchmarks
+    python tests/benchmark.py --only crawl,search   # a subset
+    python tests/benchmark.py --only h5ai --latency 0.02
+    python tests/benchmark.py --only ftp --latency 0.02   # needs pyftpdlib
+    python tests/benchmark.py --only parse --backends regex,lxml
+    python tests/benchmark.py --quick               # small sizes, for smoke runs
+    python tests/benchmark.py --out new.json --compare old.json
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from synthetic_server import SyntheticServer, SyntheticFtpServer, SyntheticConfig, SyntheticTree, FTP_AVAILABLE
+
+BENCHMARKS = {} # name -> function(args) -> dict of metrics
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def populate(db, rows):
+    """Fills db with rows synthetic index entries spread over series folders."""
+    categories = ["Anime", "Movies", "Series"]
+    for i in range(rows):
+        folder = f"http://127.0.0.1/DHAKA-FLIX-9/{categories[i % 3]}/Show {i // 100:05d}/"
+        filename = f"Show {i // 100:05d} Episode {i % 100:03d}.mkv"
+        db.add_file(folder + filename.replace(' ', '%20'), filename, folder)
+    db.commit()
+
+@benchmark("crawl")
+def bench_crawl(args):
+    from PyQt6.QtCore import QCoreApplication
+    from src.core.http_client import HttpClient
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    fanout, depth, files = (4, 2, 200) if args.quick else (8, 3, 20000)
+    config = SyntheticConfig(fanout=fanout, depth=depth, files=files, latency=args.latency)
+    server = SyntheticServer(config, mode="asyncio").start()
+    try:
+        client = HttpClient(base_url=server.base_url)
+        found = []
+        client.file_found_signal.connect(lambda data: found.append(data))
+        started = time.perf_counter()
+        client.scan_server()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+
+    directories = sum(fanout ** level for level in range(depth + 1))
+    return {
+        "directories": directories,
+        "files": len(found),
+        "seconds": elapsed,
+        "directories_per_s": directories / elapsed,
+        "files_per_s": len(found) / elapsed,
+    }
+
+@benchmark("replay")
+def bench_replay(args):
+    """Records a crawl into a snapshot store, then re-indexes from it without the network."""
+    from src.core.crawler import Crawler
+    from src.core.snapshot_store import SnapshotStore
+
+    fanout, depth, files = (4, 2, 200) if args.quick else (8, 3, 20000)
+    config = SyntheticConfig(fanout=fanout, depth=depth, files=files, latency=args.latency)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        store = SnapshotStore(os.path.join(tmp_dir, "snapshots"))
+        server = SyntheticServer(config, mode="asyncio").start()
+        try:
+            crawler = Crawler(base_url=server.base_url)
+            crawler.on_progress = lambda message: None
+            crawler.snapshot_store = store
+            started = time.perf_counter()
+            crawler.scan_server()
+            record_seconds = time.perf_counter() - started
+        finally:
+            server.stop()
+
+        timings = []
+        for _ in range(args.repeat):
+            crawler = Crawler(base_url=server.base_url)
+            crawler.on_progress = lambda message: None
+            crawler.replay_store = store
+            found = []
+            crawler.on_file = found.append
+            started = time.perf_counter()
+            crawler.scan_server()
+            timings.append(time.perf_counter() - started)
+        store.close()
+        stored_bytes = sum(os.path.getsize(os.path.join(d, f))
+                           for d, _, names in os.walk(store.objects_dir) for f in names)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    directories = sum(fanout ** level for level in range(depth + 1))
+    best = min(timings)
+    return {
+        "directories": directories,
+        "files": len(found),
+        "record_seconds": record_seconds,
+        "replay_seconds": best,
+        "replay_directories_per_s": directories / best,
+        "snapshot_kb": stored_bytes / 1024,
+    }
+
+@benchmark("h5ai")
+def bench_h5ai(args):
+    """Crawls one h5ai-style server through its JSON API and through its HTML pages."""
+    from src.core.crawler import Crawler
+
+    fanout, depth, files = (4, 2, 200) if args.quick else (8, 3, 20000)
+    config = SyntheticConfig(fanout=fanout, depth=depth, files=files, style="h5ai", latency=args.latency)
+    directories = sum(fanout ** level for level in range(depth + 1))
+    results = {"directories": directories}
+    for mode in ("html", "h5ai"):
+        server = SyntheticServer(config, mode="asyncio").start()
+        try:
+            crawler = Crawler(base_url=server.base_url)
+            crawler.on_progress = lambda message: None
+            crawler.listing_mode = mode
+            found = []
+            crawler.on_file = found.append
+            started = time.perf_counter()
+            crawler.scan_server()
+            elapsed = time.perf_counter() - started
+        finally:
+            server.stop()
+        results[mode] = {
+            "files": len(found),
+            "requests": server.app.requests,
+            "seconds": elapsed,
+            "directories_per_s": directories / elapsed,
+            "bytes": crawler.metrics.bytes,
+        }
+    results["speedup"] = results["html"]["seconds"] / results["h5ai"]["seconds"]
+    return results
+
+@benchmark("ftp")
+def bench_ftp(args):
+    """Crawls the same tree listed over HTTP and over pooled FTP connections (MLSD)."""
+    from src.core.crawler import Crawler
+    if not FTP_AVAILABLE:
+        return {"skipped": "pyftpdlib is not installed"}
+
+    fanout, depth, files = (4, 2, 200) if args.quick else (8, 3, 20000)
+    config = SyntheticConfig(fanout=fanout, depth=depth, files=files, latency=args.latency)
+    directories = sum(fanout ** level for level in range(depth + 1))
+    results = {"directories": directories}
+    http_server = SyntheticServer(config, mode="asyncio").start()
+    ftp_server = SyntheticFtpServer(config).start()
+    try:
+        for protocol in ("http", "ftp"):
+            crawler = Crawler(base_url=http_server.base_url)
+            crawler.on_progress = lambda message: None
+            crawler.protocol = protocol
+            crawler.ftp_port = ftp_server.port
+            found = []
+            crawler.on_file = found.append
+            started = time.perf_counter()
+            crawler.scan_server()
+            elapsed = time.perf_counter() - started
+            results[protocol] = {
+                "files": len(found),
+                "failed": len(crawler.failed_urls),
+                "seconds": elapsed,
+                "directories_per_s": directories / elapsed,
+                "fetch_p95_ms": crawler.metrics.summary()["fetch_p95_ms"],
+            }
+    finally:
+        ftp_server.stop()
+        http_server.stop()
+    results["ftp_speedup"] = results["http"]["seconds"] / results["ftp"]["seconds"]
+    return results
+
+@benchmark("parse")
+def bench_parse(args):
+    from src.core.listing_parser import BACKENDS
+    backends = args.backends.split(',') if args.backends else list(BACKENDS)
+    sizes = [1000] if args.quick else [1000, 10000]
+    results = {}
+    for style in ("apache", "h5ai"):
+        for entries in sizes:
+            page = SyntheticTree(SyntheticConfig(depth=0, files=entries, style=style)).listing([]).decode()
+            for backend in backends:
+                if backend not in BACKENDS:
+                    continue
+                timings = []
+                for _ in range(args.repeat if backend != "bs4" else 1): # bs4 is very slow on big pages
+                    started = time.perf_counter()
+                    BACKENDS[backend](page)
+                    timings.append(time.perf_counter() - started)
+                best = min(timings)
+                results[f"{style}.{entries}.{backend}"] = {
+                    "seconds": best,
+                    "entries_per_s": entries / best,
+                    "page_kb": len(page) / 1024,
+                }
+    return results
+
+@benchmark("ingest")
+def bench_ingest(args):
+    from src.core.db import DatabaseHandler
+    rows = 10000 if args.quick else 200000
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db = DatabaseHandler(os.path.join(tmp_dir, "bench.db"))
+        started = time.perf_counter()
+        populate(db, rows)
+        elapsed = time.perf_counter() - started
+        db.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return {"rows": rows, "seconds": elapsed, "rows_per_s": rows / elapsed}
+
+@benchmark("search")
+def bench_search(args):
+    from src.core.db import DatabaseHandler
+    sizes = [1000, 10000] if args.quick else [10000, 100000, 1000000]
+    queries = ["Episode 042", "Show 00012", "Anime", "nothing matches this", "mkv"]
+    results = {}
+    for rows in sizes:
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            db = DatabaseHandler(os.path.join(tmp_dir, "bench.db"))
+            populate(db, rows)
+            timings = []
+            for _ in range(args.repeat):
+                for query in queries:
+                    started = time.perf_counter()
+                    db.search(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+            db.close()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        results[str(rows)] = {
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "mean_ms": statistics.mean(timings),
+        }
+    return results
+
+@benchmark("tree")
+def bench_tree(args):
+    from PyQt6.QtWidgets import QApplication
+    from src.core.db import DatabaseHandler
+    from src.ui.browser import FileBrowser
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    rows = 5000 if args.quick else 100000
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db = DatabaseHandler(os.path.join(tmp_dir, "bench.db"))
+        populate(db, rows)
+        browser = FileBrowser(db)
+        browser.search_thread.wait()
+
+        timings = []
+        peak = 0
+        for _ in range(args.repeat):
+            gc.collect()
+            tracemalloc.start()
+            started = time.perf_counter()
+            browser.load_tree()
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        db.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return {
+        "rows": rows,
+        "seconds_p50": percentile(timings, 50),
+        "seconds_min": min(timings),
+        "python_peak_mb": peak / (1024 * 1024),
+    }
+
+@benchmark("download")
+def bench_download(args):
+    from src.core.downloader import DownloadWorker
+    file_size = (8 if args.quick else 256) * 1024 * 1024
+    config = SyntheticConfig(depth=0, files=1, file_size=file_size)
+    server = SyntheticServer(config).start()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        worker = DownloadWorker(server.base_url + "Episode%2000000.mkv", os.path.join(tmp_dir, "bench.mkv"))
+        errors = []
+        worker.error.connect(lambda url, msg: errors.append(msg))
+        started = time.perf_counter()
+        worker.run() # Synchronous, no event loop needed
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise RuntimeError(errors[0])
+    finally:
+        server.stop()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return {"bytes": file_size, "seconds": elapsed, "mb_per_s": file_size / (1024 * 1024) / elapsed}
+
+def compare(previous, current):
+    """Prints relative changes of every numeric metric present in both runs."""
+    def walk(prefix, old, new):
+        for key, value in new.items():
+            name = f"{prefix}.{key}" if prefix else key
+            if isinstance(value, dict) and isinstance(old.get(key), dict):
+                walk(name, old[key], value)
+            elif isinstance(value, (int, float)) and isinstance(old.get(key), (int, float)) and old[key]:
+                change = (value - old[key]) / old[key] * 100
+                print(f"  {name:45s} {old[key]:>14.3f} -> {value:>14.3f} ({change:+.1f}%)")
+    walk("", previous.get("results", {}), current.get("results", {}))
+
+def main():
+    parser = argparse.ArgumentParser(description="DhakaFlix benchmark suite")
+    parser.add_argument("--only", help="Comma separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for smoke runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected server latency (s)")
+    parser.add_argument("--backends", help="Listing parser backends for the parse benchmark")
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": {},
+    }
+    failed = False
+    for name in names:
+        print(f"[BENCH] {name}...")
+        sys.stdout.flush()
+        try:
+            report["results"][name] = BENCHMARKS[name](args)
+        except Exception as e:
+            failed = True
+            report["results"][name] = {"error": str(e)}
+        print(f"  {json.dumps(report['results'][name])}")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"Changes vs {args.compare}:")
+        compare(previous, report)
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
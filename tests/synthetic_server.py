@@ -0,0 +1,588 @@
+"""
+Synthetic DhakaFlix server for load and benchmark testing.
+
+Serves a virtual Apache/h5ai-style directory tree computed from the request
+path, so listings with up to millions of entries need no files on disk.
+Latency, bandwidth caps, error rates and Range requests can be injected,
+and the same handler runs on a threaded or an asyncio server. In h5ai style
+it also answers the h5ai JSON API (POST {"action": "get", "items": ...}).
+SyntheticFtpServer serves the same tree over anonymous FTP (needs pyftpdlib).
+
+Run standalone:
+    python tests/synthetic_server.py --fanout 10 --depth 3 --files 100000 --mode asyncio
+Or from code:
+    server = SyntheticServer(SyntheticConfig(files=1000)).start()
+    ... crawl server.base_url ...
+    server.stop()
+"""
+
+import argparse
+import asyncio
+import hashlib
+import html
+import json
+import logging
+import os
+import random
+import tempfile
+import shutil
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+    FTP_AVAILABLE = True
+except ImportError:
+    FTP_AVAILABLE = False
+
+CATEGORIES = ["Anime", "Movies", "Series", "Music"]
+HREF_SAFE = "()[]&'!$*+,;=:@~" # Like the real servers: only spaces and non-ASCII get encoded
+BLOCK_SIZE = 64 * 1024
+BASE_MTIME = 1672531200 # 2023-01-01 00:00 UTC
+PATTERN = bytes(range(251)) * (BLOCK_SIZE // 251 + 2) # 251 is prime, offsets never align
+
+@dataclass
+class SyntheticConfig:
+    root: str = "DHAKA-FLIX-9"
+    fanout: int = 4 # Sub-directories per directory
+    depth: int = 2 # Directory levels below the root; files live in the leaves
+    files: int = 100 # Total files spread over the leaves (up to ~1M)
+    file_size: int = 1024 * 1024 # Bytes per file
+    style: str = "apache" # Listing flavour: "apache" or "h5ai"
+    latency: float = 0.0 # Seconds added to every request
+    jitter: float = 0.0 # Extra random latency, up to this many seconds
+    bandwidth: int = 0 # Bytes/s per response body, 0 = unlimited
+    error_rate: float = 0.0 # Fraction of requests answered with 503
+    etags: bool = False # ETag on listings; If-None-Match answered with 304
+    release_names: bool = False # Folder names like "Folder (1999) [Dual] & Tom's 000"
+    seed: int = 0
+
+def format_size(size):
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024 or unit == "G":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024.0
+
+class SyntheticTree:
+    """Maps URL paths to virtual directories and files without materialising them."""
+
+    def __init__(self, config):
+        self.config = config
+        self.leaves = config.fanout ** config.depth
+
+    def dir_name(self, level, index):
+        if level == 0:
+            return f"{CATEGORIES[index % len(CATEGORIES)]} {index:03d}"
+        if self.config.release_names:
+            return f"Folder (1999) [Dual] & Tom's {index:03d}"
+        return f"Folder {index:03d}"
+
+    @staticmethod
+    def file_name(index):
+        return f"Episode {index:05d}.mkv"
+
+    def files_in_leaf(self, leaf):
+        base, extra = divmod(self.config.files, self.leaves)
+        return base + (1 if leaf < extra else 0)
+
+    def resolve(self, path):
+        """
+        Returns ("dir", indexes), ("file", (indexes, file_index)) or None.
+        indexes is the list of directory indexes from the root down.
+        """
+        parts = [urllib.parse.unquote(p) for p in path.split('?', 1)[0].split('/')]
+        is_dir = path.endswith('/')
+        parts = [p for p in parts if p]
+        if not parts or parts[0] != self.config.root:
+            return None
+
+        indexes = []
+        names = parts[1:]
+        dir_names = names if is_dir else names[:-1]
+        for level, name in enumerate(dir_names):
+            if level >= self.config.depth:
+                return None
+            try:
+                index = int(name.rsplit(' ', 1)[-1])
+            except ValueError:
+                return None
+            if index >= self.config.fanout or name != self.dir_name(level, index):
+                return None
+            indexes.append(index)
+
+        if is_dir:
+            return ("dir", indexes)
+
+        if len(indexes) != self.config.depth or not names[-1].startswith("Episode "):
+            return None
+        try:
+            file_index = int(names[-1][len("Episode "):].split('.')[0])
+        except ValueError:
+            return None
+        if file_index >= self.files_in_leaf(self.leaf_number(indexes)) or names[-1] != self.file_name(file_index):
+            return None
+        return ("file", (indexes, file_index))
+
+    def leaf_number(self, indexes):
+        number = 0
+        for index in indexes:
+            number = number * self.config.fanout + index
+        return number
+
+    @staticmethod
+    def quote(name):
+        return urllib.parse.quote(name, safe=HREF_SAFE)
+
+    def dir_path(self, indexes):
+        names = [self.config.root] + [self.dir_name(level, i) for level, i in enumerate(indexes)]
+        return "/" + "/".join(self.quote(n) for n in names) + "/"
+
+    def entries(self, indexes):
+        """Yields (name, is_dir, size, mtime) for a directory."""
+        level = len(indexes)
+        if level < self.config.depth:
+            for i in range(self.config.fanout):
+                yield self.dir_name(level, i), True, 0, BASE_MTIME + i * 60
+        else:
+            leaf = self.leaf_number(indexes)
+            for i in range(self.files_in_leaf(leaf)):
+                yield self.file_name(i), False, self.config.file_size, BASE_MTIME + leaf * 3600 + i
+
+    def items(self, indexes, what):
+        """
+        h5ai "get items" response: the folder's content (and with what >= 2
+        its subfolders' content), plus every parent folder and its content.
+        """
+        out = []
+
+        def add_content(folder, fetch_subfolders):
+            path = self.dir_path(folder)
+            for i, (name, is_dir, size, mtime) in enumerate(self.entries(folder)):
+                if is_dir:
+                    fetched = fetch_subfolders
+                    out.append({"href": path + self.quote(name) + "/", "time": mtime * 1000,
+                                "size": None, "managed": True, "fetched": fetched})
+                    if fetched:
+                        add_content(folder + [i], False)
+                else:
+                    out.append({"href": path + self.quote(name), "time": mtime * 1000,
+                                "size": size, "managed": True, "fetched": False})
+
+        add_content(indexes, what >= 2)
+        for level in range(len(indexes) - 1, -1, -1):
+            add_content(indexes[:level], False)
+        out.append({"href": self.dir_path([]), "time": BASE_MTIME * 1000, "size": None,
+                    "managed": True, "fetched": True})
+        return {"items": out}
+
+    def materialize(self, directory):
+        """Writes the tree below directory as sparse files, for servers that need real files (FTP)."""
+        def build(indexes, path):
+            os.makedirs(path, exist_ok=True)
+            for i, (name, is_dir, size, mtime) in enumerate(self.entries(indexes)):
+                target = os.path.join(path, name)
+                if is_dir:
+                    build(indexes + [i], target)
+                else:
+                    with open(target, "wb") as f:
+                        f.truncate(size)
+                os.utime(target, (mtime, mtime))
+        build([], os.path.join(directory, self.config.root))
+
+    def listing(self, indexes):
+        path = self.dir_path(indexes)
+        title = html.escape(urllib.parse.unquote(path))
+        parent = path.rsplit('/', 2)[0] + '/'
+        out = [f"<!DOCTYPE html><html><head><title>Index of {title}</title></head><body>\n"]
+        if self.config.style == "h5ai":
+            out.append('<div id="fallback"><table id="fallback-table">\n'
+                       '<tr><th class="fb-i"></th><th class="fb-n"><span>Name</span></th>'
+                       '<th class="fb-d"><span>Last modified</span></th><th class="fb-s"><span>Size</span></th></tr>\n'
+                       f'<tr><td class="fb-i"><img src="/_h5ai/public/images/fallback/folder-parent.png" alt="folder-parent"/></td>'
+                       f'<td class="fb-n"><a href="{parent}">Parent Directory</a></td><td class="fb-d"></td><td class="fb-s"></td></tr>\n')
+            for name, is_dir, size, mtime in self.entries(indexes):
+                href = html.escape(path + self.quote(name) + ("/" if is_dir else ""))
+                date = time.strftime("%Y-%m-%d %H:%M", time.gmtime(mtime))
+                size_text = "" if is_dir else f"{size // 1024} KB"
+                icon = "folder" if is_dir else "file"
+                out.append(f'<tr><td class="fb-i"><img src="/_h5ai/public/images/fallback/{icon}.png" alt="{icon}"/></td>'
+                           f'<td class="fb-n"><a href="{href}">{html.escape(name)}</a></td>'
+                           f'<td class="fb-d">{date}</td><td class="fb-s">{size_text}</td></tr>\n')
+            out.append('</table></div>\n')
+        else:
+            out.append(f"<h1>Index of {title}</h1>\n<table>\n"
+                       '<tr><th valign="top"><img src="/icons/blank.gif" alt="[ICO]"></th><th><a href="?C=N;O=D">Name</a></th>'
+                       '<th><a href="?C=M;O=A">Last modified</a></th><th><a href="?C=S;O=A">Size</a></th></tr>\n'
+                       '<tr><th colspan="4"><hr></th></tr>\n'
+                       f'<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td>'
+                       f'<td><a href="{parent}">Parent Directory</a></td><td>&nbsp;</td><td align="right">  - </td></tr>\n')
+            for name, is_dir, size, mtime in self.entries(indexes):
+                href = html.escape(self.quote(name) + ("/" if is_dir else ""))
+                date = time.strftime("%Y-%m-%d %H:%M", time.gmtime(mtime))
+                size_text = "  - " if is_dir else format_size(size)
+                alt = "[DIR]" if is_dir else "[VID]"
+                out.append(f'<tr><td valign="top"><img src="/icons/folder.gif" alt="{alt}"></td>'
+                           f'<td><a href="{href}">{html.escape(name)}{"/" if is_dir else ""}</a></td>'
+                           f'<td align="right">{date}  </td><td align="right">{size_text}</td></tr>\n')
+            out.append('<tr><th colspan="4"><hr></th></tr>\n</table>\n')
+        out.append("</body></html>\n")
+        return "".join(out).encode('utf-8')
+
+def file_bytes(start, end):
+    """Yields the deterministic content of bytes [start, end] of any synthetic file."""
+    position = start
+    while position <= end:
+        length = min(BLOCK_SIZE, end - position + 1)
+        offset = position % 251
+        yield PATTERN[offset:offset + length]
+        position += length
+
+class SyntheticApp:
+    """Server-agnostic request handling shared by the threaded and asyncio front ends."""
+
+    def __init__(self, config):
+        self.config = config
+        self.tree = SyntheticTree(config)
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def delay(self):
+        with self.lock:
+            self.requests += 1
+            extra = self.random.uniform(0, self.config.jitter) if self.config.jitter else 0.0
+            fail = self.config.error_rate and self.random.random() < self.config.error_rate
+        return self.config.latency + extra, fail
+
+    def handle(self, method, path, headers, fail=False, request_body=b""):
+        """Returns (status, [(header, value)], body_iterable)."""
+        if fail:
+            return 503, [("Content-Length", "0")], []
+        if method == "POST":
+            return self.handle_api(path, request_body)
+
+        target = self.tree.resolve(path)
+        if target is None:
+            body = b"Not Found"
+            return 404, [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))], [body]
+
+        kind, value = target
+        if kind == "dir":
+            body = self.tree.listing(value)
+            response_headers = [("Content-Type", "text/html; charset=utf-8"), ("Content-Length", str(len(body)))]
+            if self.config.etags:
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                if (headers.get("If-None-Match") or headers.get("if-none-match")) == etag:
+                    return 304, [("ETag", etag), ("Content-Length", "0")], []
+                response_headers.append(("ETag", etag))
+            return 200, response_headers, [] if method == "HEAD" else [body]
+
+        size = self.config.file_size
+        leaf = self.tree.leaf_number(value[0])
+        mtime = BASE_MTIME + leaf * 3600 + value[1]
+        response_headers = [("Content-Type", "video/x-matroska"), ("Accept-Ranges", "bytes"),
+                            ("Last-Modified", time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(mtime)))]
+        start, end, status = 0, size - 1, 200
+        byte_range = headers.get("Range") or headers.get("range")
+        if byte_range and byte_range.startswith("bytes="):
+            start_s, _, end_s = byte_range[len("bytes="):].split(',')[0].strip().partition('-')
+            try:
+                if start_s:
+                    start, end = int(start_s), min(int(end_s), size - 1) if end_s else size - 1
+                else:
+                    start, end = max(size - int(end_s), 0), size - 1
+            except ValueError:
+                start, end = 0, size - 1
+            if start >= size:
+                return 416, [("Content-Range", f"bytes */{size}"), ("Content-Length", "0")], []
+            status = 206
+            response_headers.append(("Content-Range", f"bytes {start}-{end}/{size}"))
+        response_headers.append(("Content-Length", str(end - start + 1)))
+        return status, response_headers, [] if method == "HEAD" else file_bytes(start, end)
+
+    def handle_api(self, path, request_body):
+        """h5ai JSON API, posted to any folder URL or to the h5ai script itself."""
+        if self.config.style != "h5ai":
+            return 405, [("Allow", "GET, HEAD"), ("Content-Length", "0")], []
+        try:
+            request = json.loads(request_body or b"{}")
+            items = request["items"]
+            href, what = items["href"], int(items.get("what", 1))
+        except (ValueError, KeyError, TypeError):
+            return 400, [("Content-Length", "0")], []
+        target = self.tree.resolve(href if href.endswith('/') else href + '/')
+        if request.get("action") != "get" or target is None or target[0] != "dir":
+            return 404, [("Content-Length", "0")], []
+        body = json.dumps(self.tree.items(target[1], what)).encode('utf-8')
+        return 200, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))], [body]
+
+class ThreadedHandler(BaseHTTPRequestHandler):
+    app = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _serve(self, method):
+        request_body = self.rfile.read(int(self.headers.get("Content-Length") or 0)) if method == "POST" else b""
+        latency, fail = self.app.delay()
+        if latency:
+            time.sleep(latency)
+        status, headers, body = self.app.handle(method, self.path, self.headers, fail, request_body)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        bandwidth = self.app.config.bandwidth
+        started, sent = time.monotonic(), 0
+        try:
+            for block in body:
+                self.wfile.write(block)
+                sent += len(block)
+                if bandwidth:
+                    ahead = sent / bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_GET(self):
+        self._serve("GET")
+
+    def do_HEAD(self):
+        self._serve("HEAD")
+
+    def do_POST(self):
+        self._serve("POST")
+
+class AsyncioFrontend:
+    """Minimal HTTP/1.1 server on asyncio streams (keep-alive, GET/HEAD/POST)."""
+
+    def __init__(self, app, host, port):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.server = None
+        self.ready = threading.Event()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self.handle_client, self.host, self.port, backlog=1024))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+    def stop(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _version = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip()] = value.strip()
+
+                length = int(headers.get('Content-Length') or headers.get('content-length') or 0)
+                request_body = await reader.readexactly(length) if length else b""
+                latency, fail = self.app.delay()
+                if latency:
+                    await asyncio.sleep(latency)
+                status, response_headers, body = self.app.handle(method, path, headers, fail, request_body)
+                head = [f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"]
+                head += [f"{name}: {value}\r\n" for name, value in response_headers]
+                head.append("\r\n")
+                writer.write("".join(head).encode('latin-1'))
+
+                bandwidth = self.app.config.bandwidth
+                started, sent = time.monotonic(), 0
+                for block in body:
+                    writer.write(block)
+                    await writer.drain()
+                    sent += len(block)
+                    if bandwidth:
+                        ahead = sent / bandwidth - (time.monotonic() - started)
+                        if ahead > 0:
+                            await asyncio.sleep(ahead)
+                await writer.drain()
+                if headers.get('Connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+class SyntheticServer:
+    def __init__(self, config=None, host="127.0.0.1", port=0, mode="threaded"):
+        self.config = config or SyntheticConfig()
+        self.app = SyntheticApp(self.config)
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.httpd = None
+        self.frontend = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/{urllib.parse.quote(self.config.root)}/"
+
+    def start(self):
+        if self.mode == "asyncio":
+            self.frontend = AsyncioFrontend(self.app, self.host, self.port)
+            self.thread = threading.Thread(target=self.frontend.run, daemon=True)
+            self.thread.start()
+            self.frontend.ready.wait()
+            self.port = self.frontend.port
+        else:
+            handler = type("Handler", (ThreadedHandler,), {"app": self.app})
+            self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+            self.httpd.daemon_threads = True
+            self.httpd.request_queue_size = 1024
+            self.port = self.httpd.server_address[1]
+            self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        if self.frontend:
+            self.frontend.stop()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+class SyntheticFtpServer:
+    """
+    The synthetic tree, written to a temporary directory, on an anonymous
+    read-only FTP server. Only latency is injected (per MLSD). base_url is
+    the HTTP URL a crawl with protocol = "ftp" and ftp_port = port indexes.
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        if not FTP_AVAILABLE:
+            raise RuntimeError("pyftpdlib is not installed")
+        self.config = config or SyntheticConfig()
+        self.host = host
+        self.port = port
+        self.requests = 0 # MLSD commands served
+        self.lock = threading.Lock()
+        self.directory = None
+        self.server = None
+        self.thread = None
+        self.stopping = False
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}/{urllib.parse.quote(self.config.root)}/"
+
+    def start(self):
+        self.directory = tempfile.mkdtemp(prefix="synthetic_ftp_")
+        SyntheticTree(self.config).materialize(self.directory)
+        authorizer = DummyAuthorizer()
+        authorizer.add_anonymous(self.directory)
+        owner = self
+
+        class Handler(FTPHandler):
+            def ftp_MLSD(self, path):
+                with owner.lock:
+                    owner.requests += 1
+                if owner.config.latency:
+                    time.sleep(owner.config.latency) # A thread per connection, so this only delays this client
+                return super().ftp_MLSD(path)
+
+        Handler.authorizer = authorizer
+        # A handler of its own stops pyftpdlib from logging every login to stderr
+        ftp_log = logging.getLogger("pyftpdlib")
+        if not ftp_log.handlers:
+            ftp_log.addHandler(logging.NullHandler())
+        ftp_log.setLevel(logging.WARNING)
+        self.server = ThreadedFTPServer((self.host, self.port), Handler)
+        self.server.max_cons = 256
+        self.port = self.server.address[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def _serve(self):
+        while not self.stopping:
+            self.server.serve_forever(timeout=0.05, blocking=False, handle_exit=False)
+        self.server.close_all()
+
+    def stop(self):
+        self.stopping = True
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+def parse_rate(text):
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic DhakaFlix server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--mode", choices=["threaded", "asyncio"], default="threaded")
+    parser.add_argument("--root", default="DHAKA-FLIX-9")
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--file-size", type=parse_rate, default=1024 * 1024)
+    parser.add_argument("--style", choices=["apache", "h5ai"], default="apache")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=parse_rate, default=0, help="e.g. 10M (bytes/s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--etags", action="store_true", help="Support conditional listing requests")
+    parser.add_argument("--ftp-port", type=int, help="Also serve the tree over FTP on this port (needs pyftpdlib)")
+    args = parser.parse_args()
+
+    config = SyntheticConfig(root=args.root, fanout=args.fanout, depth=args.depth, files=args.files,
+                             file_size=args.file_size, style=args.style, latency=args.latency,
+                             jitter=args.jitter, bandwidth=args.bandwidth, error_rate=args.error_rate,
+                             seed=args.seed, etags=args.etags)
+    server = SyntheticServer(config, host=args.host, port=args.port, mode=args.mode).start()
+    print(f"Serving synthetic tree at {server.base_url} ({args.mode}, {args.files} files)")
+    ftp_server = None
+    if args.ftp_port is not None:
+        ftp_server = SyntheticFtpServer(config, host=args.host, port=args.ftp_port).start()
+        print(f"Serving it over FTP at ftp://{args.host}:{ftp_server.port}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    if ftp_server:
+        ftp_server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import asyncio
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.crawl_concurrency import AimdController
+from src.core.http_client import HttpClient
+
+class TestAimdController(unittest.TestCase):
+    def test_additive_increase(self):
+        controller = AimdController(initial=4, maximum=6, target_latency=1.0)
+        for _ in range(5):
+            controller.on_success(0.05)
+        # About one step per round trip's worth of successes
+        self.assertEqual(controller.current_limit(), 5)
+        for _ in range(100):
+            controller.on_success(0.05)
+        self.assertEqual(controller.current_limit(), 6)
+
+    def test_multiplicative_decrease_once_per_window(self):
+        controller = AimdController(initial=16, minimum=2, target_latency=1.0)
+        controller.on_congestion(now=100.0)
+        controller.on_congestion(now=100.1) # Same overload, ignored
+        self.assertEqual(controller.current_limit(), 8)
+        controller.on_congestion(now=102.0)
+        controller.on_congestion(now=104.0)
+        controller.on_congestion(now=106.0)
+        self.assertEqual(controller.current_limit(), 2)
+
+    def test_slow_responses_back_off(self):
+        controller = AimdController(initial=10, target_latency=0.1)
+        controller.on_success(0.5)
+        self.assertEqual(controller.current_limit(), 5)
+
+    def test_acquire_respects_limit(self):
+        controller = AimdController(initial=2, minimum=2, maximum=2)
+        peak = []
+
+        async def request():
+            await controller.acquire()
+            peak.append(controller.inflight)
+            await asyncio.sleep(0.01)
+            await controller.release(0.01, False)
+
+        async def run():
+            await asyncio.gather(*(request() for _ in range(10)))
+
+        asyncio.run(run())
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(controller.inflight, 0)
+
+class TestAdaptiveCrawl(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    def crawl(self, config, **settings):
+        server = SyntheticServer(config, mode="asyncio").start()
+        try:
+            client = HttpClient(base_url=server.base_url, parse_pool=None)
+            for key, value in settings.items():
+                setattr(client, key, value)
+            found = []
+            client.file_found_signal.connect(found.append)
+            client.scan_server()
+        finally:
+            server.stop()
+        return client, found
+
+    def test_limit_grows_on_healthy_server(self):
+        client, found = self.crawl(SyntheticConfig(fanout=4, depth=3, files=64), concurrency=2)
+        self.assertEqual(len(found), 64)
+        controller = list(client.controllers.values())[0]
+        self.assertGreater(controller.current_limit(), 2)
+        self.assertEqual(controller.decreases, 0)
+
+    def test_limit_backs_off_on_errors(self):
+        client, found = self.crawl(SyntheticConfig(fanout=4, depth=3, files=64, error_rate=0.5, seed=3),
+                                   concurrency=16, max_retries=0)
+        controller = list(client.controllers.values())[0]
+        self.assertGreater(controller.decreases, 0)
+        self.assertLess(controller.current_limit(), 16)
+        self.assertTrue(client.failed_urls)
+
+if __name__ == '__main__':
+    unittest.main()
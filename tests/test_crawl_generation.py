@@ -0,0 +1,101 @@
+import sys
+import os
+import tempfile
+import shutil
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.db import DatabaseHandler
+from src.core.http_client import HttpClient
+
+class TestCrawlGeneration(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseHandler(os.path.join(self.tmp_dir, "gen.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def paths(self):
+        return {row[0] for row in self.db.get_all_files()}
+
+    def crawl(self, base_url):
+        """Same wiring as MainWindow: stamp every file, then close the crawl."""
+        client = HttpClient(base_url=base_url)
+        generation = self.db.begin_crawl(base_url)
+        client.file_found_signal.connect(lambda d: self.db.add_file(
+            d['path'], d['filename'], d['parent_dir'], d['size'], d['mtime'], generation))
+        client.scan_server()
+        self.db.commit()
+        return self.db.finish_crawl(generation, client.crawl_complete(), skip=client.failed_urls)
+
+    def test_complete_crawl_sweeps_vanished_files(self):
+        server = SyntheticServer(SyntheticConfig(fanout=2, depth=1, files=10)).start()
+        try:
+            root = server.base_url
+            self.assertEqual(self.crawl(root), 0)
+            self.assertEqual(len(self.paths()), 10)
+
+            # Files that disappeared from the server since an older crawl
+            self.db.add_file(root + "Folder%2000/gone.mkv", "gone.mkv", root + "Folder%2000/")
+            self.db.add_file(root + "Folder%2000/kept.mkv", "kept.mkv", root + "Folder%2000/")
+            self.db.mark_downloaded(root + "Folder%2000/kept.mkv", "/tmp/kept.mkv")
+            # Outside the crawled root
+            self.db.add_file("http://other/DHAKA-FLIX-7/x.mkv", "x.mkv", "http://other/DHAKA-FLIX-7/")
+            self.db.commit()
+
+            self.assertEqual(self.crawl(root), 1)
+        finally:
+            server.stop()
+        paths = self.paths()
+        self.assertEqual(len(paths), 12)
+        self.assertNotIn(root + "Folder%2000/gone.mkv", paths)
+        self.assertIn(root + "Folder%2000/kept.mkv", paths)
+        self.assertIn("http://other/DHAKA-FLIX-7/x.mkv", paths)
+
+    def test_failed_or_stopped_crawls_keep_rows(self):
+        root = "http://127.0.0.1/DHAKA-FLIX-9/"
+        old = self.db.begin_crawl(root)
+        self.db.add_file(root + "A/1.mkv", "1.mkv", root + "A/", generation=old)
+        self.db.add_file(root + "B/2.mkv", "2.mkv", root + "B/", generation=old)
+        self.db.commit()
+        self.db.finish_crawl(old, True)
+
+        stopped = self.db.begin_crawl(root)
+        self.assertEqual(self.db.finish_crawl(stopped, False), 0)
+        self.assertEqual(len(self.paths()), 2)
+
+        # Folder A could not be listed: only B's stale row goes
+        partial = self.db.begin_crawl(root)
+        self.assertEqual(self.db.finish_crawl(partial, True, skip=[root + "A/"]), 1)
+        self.assertEqual(self.paths(), {root + "A/1.mkv"})
+
+    def test_aborted_crawl_does_not_sweep(self):
+        root = "http://127.0.0.1:9/DHAKA-FLIX-9/"
+        old = self.db.begin_crawl(root)
+        self.db.add_file(root + "A/1.mkv", "1.mkv", root + "A/", generation=old)
+        self.db.commit()
+        self.db.finish_crawl(old, True)
+
+        class BrokenClient(HttpClient):
+            async def _crawl_root(self, session, root, frontier, visited):
+                raise RuntimeError("engine bug")
+
+        client = BrokenClient(base_url=root)
+        generation = self.db.begin_crawl(root)
+        client.scan_server()
+        self.assertFalse(client.crawl_complete())
+        self.assertEqual(self.db.finish_crawl(generation, client.crawl_complete()), 0)
+        self.assertEqual(self.paths(), {root + "A/1.mkv"})
+
+if __name__ == '__main__':
+    unittest.main()
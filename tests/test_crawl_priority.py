@@ -0,0 +1,76 @@
+import sys
+import os
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.crawler import Crawler
+
+class BoostingCrawler(Crawler):
+    """Records the listing order and boosts once the root has been listed."""
+
+    def __init__(self, boost_url=None, boost_text=None, **kwargs):
+        super().__init__(**kwargs)
+        self.boost_url = boost_url
+        self.boost_text = boost_text
+        self.order = []
+
+    def on_progress(self, message):
+        pass
+
+    def on_directory_done(self, root, url, ok, children):
+        self.order.append(url)
+        if url == root:
+            if self.boost_url:
+                self.boost(self.boost_url)
+            if self.boost_text:
+                self.boost_matching(self.boost_text)
+
+class TestCrawlPriority(unittest.TestCase):
+    def setUp(self):
+        self.server = SyntheticServer(SyntheticConfig(fanout=4, depth=2, files=32)).start()
+        self.root = self.server.base_url
+
+    def tearDown(self):
+        self.server.stop()
+
+    def crawl(self, **kwargs):
+        # One request at a time so the listing order is the frontier order
+        crawler = BoostingCrawler(base_url=self.root, parse_pool=None, **kwargs)
+        crawler.concurrency = 1
+        crawler.per_host_limit = 1
+        crawler.scan_server()
+        self.assertEqual(crawler.failed_urls, [])
+        self.assertEqual(len(crawler.order), 1 + 4 + 16)
+        return crawler.order
+
+    def assert_subtree_first(self, order, subtree, other):
+        inside = [i for i, url in enumerate(order) if url.startswith(subtree)]
+        self.assertEqual(len(inside), 1 + 4)
+        self.assertLess(max(inside), order.index(other))
+
+    def test_breadth_first_by_default(self):
+        order = self.crawl()
+        self.assertGreater(order.index(self.root + "Music%20003/Folder%20000/"), order.index(self.root + "Movies%20001/"))
+
+    def test_boosted_folder_crawled_next(self):
+        music = self.root + "Music%20003/"
+        order = self.crawl(boost_url=music)
+        self.assert_subtree_first(order, music, self.root + "Movies%20001/")
+
+    def test_boost_by_search_text(self):
+        order = self.crawl(boost_text="SERIES")
+        self.assert_subtree_first(order, self.root + "Series%20002/", self.root + "Movies%20001/")
+
+    def test_boost_without_crawl_is_ignored(self):
+        crawler = Crawler(base_url=self.root)
+        crawler.boost(self.root + "Music%20003/")
+        self.assertEqual(crawler.boosts, [])
+
+if __name__ == "__main__":
+    unittest.main()
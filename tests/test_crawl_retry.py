@@ -0,0 +1,79 @@
+import sys
+import os
+import tempfile
+import shutil
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.db import DatabaseHandler
+from src.core.http_client import HttpClient, FetchError
+
+class TestCrawlRetry(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseHandler(os.path.join(self.tmp_dir, "retry.db"))
+        self.config = SyntheticConfig(fanout=3, depth=2, files=90, error_rate=0.3, seed=7)
+        self.server = SyntheticServer(self.config).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def crawl(self, generation, max_retries, resume=None):
+        client = HttpClient(base_url=self.server.base_url, parse_pool=None)
+        client.max_retries = max_retries
+        client.retry_base_delay = 0.01
+        client.listing_mode = "html" # Keep the seeded error sequence on the listing GETs
+        client.file_found_signal.connect(lambda d: self.db.add_file(
+            d['path'], d['filename'], d['parent_dir'], d['size'], d['mtime'], generation))
+        client.directory_done_signal.connect(
+            lambda root, url, ok, children: self.db.frontier_done(generation, url, ok, children))
+        client.directory_failed_signal.connect(self.db.record_failure)
+        client.scan_server(resume=resume)
+        self.db.commit()
+        return client
+
+    def test_transient_errors_are_retried(self):
+        generation = self.db.begin_crawl(self.server.base_url)
+        client = self.crawl(generation, max_retries=8)
+        self.assertEqual(client.failed_urls, [])
+        self.assertGreater(client.metrics.retries, 0)
+        self.assertEqual(len(self.db.get_all_files()), 90)
+        self.assertEqual(self.db.get_failures(), [])
+
+    def test_retry_failed_only(self):
+        root = self.server.base_url
+        generation = self.db.begin_crawl(root)
+        client = self.crawl(generation, max_retries=0)
+        self.db.finish_crawl(generation, True, skip=client.failed_urls)
+        failures = self.db.get_failures()
+        self.assertEqual(len(failures), len(client.failed_urls))
+        self.assertGreater(len(failures), 0)
+        self.assertLess(len(self.db.get_all_files()), 90)
+
+        # Server recovers; only the dead letters (and what lies below them) are crawled
+        self.config.error_rate = 0.0
+        seeds = [(url, depth) for _, url, depth, _, _, _ in failures]
+        retry = self.db.begin_crawl(root, seeds=seeds)
+        client = self.crawl(retry, max_retries=0, resume={root: self.db.resume_crawl(retry)})
+        self.assertLess(client.metrics.directories, 13)
+        self.db.finish_crawl(retry, client.crawl_complete())
+        self.assertEqual(len(self.db.get_all_files()), 90)
+        self.assertEqual(self.db.get_failures(), [])
+
+    def test_permanent_errors_are_not_retried(self):
+        self.assertFalse(FetchError(404, "HTTP 404").retriable)
+        self.assertTrue(FetchError(503, "HTTP 503").retriable)
+        self.assertTrue(FetchError(0, "timeout").retriable)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+import sqlite3
+import tempfile
+import shutil
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.db import DatabaseHandler
+from src.core.http_client import HttpClient
+
+BASE = "http://127.0.0.1/DHAKA-FLIX-9/Anime/Show/"
+
+class TestFileMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "meta.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_old_database_is_migrated(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''CREATE TABLE files (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT UNIQUE,
+                        filename TEXT, category TEXT, parent_dir TEXT, local_path TEXT,
+                        downloaded BOOLEAN DEFAULT 0)''')
+        conn.execute("INSERT INTO files (path, filename, parent_dir) VALUES ('u', 'f.mkv', 'p')")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseHandler(self.db_path)
+        self.assertEqual(db.get_file_info('u'), (None, None))
+        # A re-crawl fills in the new columns on the existing row
+        db.add_file('u', 'f.mkv', 'p', size=1024, mtime=1700000000)
+        db.commit()
+        self.assertEqual(db.get_file_info('u'), (1024, 1700000000))
+        db.close()
+
+    def test_recent_and_largest_queries(self):
+        db = DatabaseHandler(self.db_path)
+        db.add_file(BASE + "a.mkv", "a.mkv", BASE, size=300, mtime=1000)
+        db.add_file(BASE + "b.mkv", "b.mkv", BASE, size=100, mtime=3000)
+        db.add_file(BASE + "c.mkv", "c.mkv", BASE, size=200, mtime=2000)
+        db.add_file(BASE + "d.mkv", "d.mkv", BASE) # Listing without metadata
+        db.commit()
+
+        self.assertEqual([r[1] for r in db.get_recent()], ["b.mkv", "c.mkv", "a.mkv"])
+        self.assertEqual([r[1] for r in db.get_recent(since=1500)], ["b.mkv", "c.mkv"])
+        self.assertEqual([r[1] for r in db.get_largest(limit=2)], ["a.mkv", "c.mkv"])
+        self.assertEqual(db.get_folder_size(BASE), 600)
+        # Empty search lists the newest files first
+        self.assertEqual([r[1] for r in db.search("")][:3], ["b.mkv", "c.mkv", "a.mkv"])
+        db.close()
+
+    def test_crawler_reports_size_and_mtime(self):
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        for style in ("apache", "h5ai"):
+            config = SyntheticConfig(fanout=2, depth=1, files=6, file_size=5 * 1024 * 1024, style=style)
+            server = SyntheticServer(config).start()
+            try:
+                client = HttpClient(base_url=server.base_url)
+                found = []
+                client.file_found_signal.connect(found.append)
+                client.scan_server()
+            finally:
+                server.stop()
+            self.assertEqual(len(found), 6, style)
+            for data in found:
+                self.assertEqual(data['size'], 5 * 1024 * 1024, style)
+                self.assertIsNotNone(data['mtime'], style)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import ftplib
+import tempfile
+import shutil
+import threading
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticFtpServer, SyntheticConfig, BASE_MTIME, FTP_AVAILABLE
+from src.core import ftp_listing
+from src.core.crawler import Crawler
+from src.core.snapshot_store import SnapshotStore
+
+PAGE = "http://172.16.50.9/DHAKA-FLIX-9/Anime/"
+
+class RecordingCrawler(Crawler):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.files = []
+        self.failures = []
+
+    def on_progress(self, message):
+        pass
+
+    def on_file(self, data):
+        self.files.append(data)
+
+    def on_directory_failed(self, root, url, depth, status, error):
+        self.failures.append((url, status))
+
+class TestParseMlsd(unittest.TestCase):
+    def test_facts(self):
+        body = ("type=cdir;modify=20230101000000; .\r\n"
+                "type=pdir;modify=20230101000000; ..\r\n"
+                "type=dir;modify=20230101000100;perm=el; One Piece\r\n"
+                "Type=File;Size=42;Modify=20230101000000.123; Tom & Jerry 01.mkv\r\n"
+                "type=OS.unix=slink:/x;size=3; Link\r\n").encode("utf-8")
+        entries = ftp_listing.parse_mlsd(body, PAGE)
+        self.assertEqual(entries, [
+            (PAGE + "One%20Piece/", "One Piece", True, None, 1672531260),
+            (PAGE + "Tom%20&%20Jerry%2001.mkv", "Tom & Jerry 01.mkv", False, 42, 1672531200),
+        ])
+
+    def test_names_with_semicolons_and_unicode(self):
+        body = "type=file;size=1; a;b ক.mkv\n".encode("utf-8")
+        (url, name, _, _, mtime), = ftp_listing.parse_mlsd(body, PAGE)
+        self.assertEqual(name, "a;b ক.mkv")
+        self.assertIsNone(mtime)
+
+@unittest.skipUnless(FTP_AVAILABLE, "pyftpdlib is not installed")
+class TestFtpCrawl(unittest.TestCase):
+    def setUp(self):
+        # Level-2 folders have ( ) [ ] & ' in their names, which the HTTP links leave unencoded
+        self.config = SyntheticConfig(fanout=3, depth=2, files=20, release_names=True)
+        self.ftp_server = SyntheticFtpServer(self.config).start()
+
+    def tearDown(self):
+        self.ftp_server.stop()
+
+    def crawl(self, base_url, **attrs):
+        crawler = RecordingCrawler(base_url=base_url, parse_pool=None)
+        crawler.protocol = "ftp"
+        crawler.ftp_port = self.ftp_server.port
+        for name, value in attrs.items():
+            setattr(crawler, name, value)
+        crawler.scan_server()
+        return crawler
+
+    def test_matches_http_crawl(self):
+        http_server = SyntheticServer(self.config).start()
+        try:
+            http_crawler = RecordingCrawler(base_url=http_server.base_url, parse_pool=None)
+            http_crawler.scan_server()
+            # Listed over FTP, indexed under the HTTP URLs the player streams from
+            ftp_crawler = self.crawl(http_server.base_url)
+        finally:
+            http_server.stop()
+        self.assertEqual(ftp_crawler.failed_urls, [])
+        self.assertEqual(sorted((f["path"], f["parent_dir"]) for f in ftp_crawler.files),
+                         sorted((f["path"], f["parent_dir"]) for f in http_crawler.files))
+        self.assertEqual(self.ftp_server.requests, 1 + 3 + 9)
+        self.assertEqual(ftp_crawler.metrics.directories, 13)
+        # MLSD has exact sizes and seconds; the HTML page rounds both
+        first = min(ftp_crawler.files, key=lambda f: f["path"])
+        self.assertEqual((first["size"], first["mtime"]), (1024 * 1024, BASE_MTIME))
+
+    def test_missing_folder_is_not_retried(self):
+        crawler = self.crawl("http://127.0.0.1/NO-SUCH-ROOT/", retry_base_delay=0.01)
+        self.assertEqual(crawler.failures, [("http://127.0.0.1/NO-SUCH-ROOT/", 404)])
+        self.assertEqual(crawler.metrics.retries, 0)
+
+    def test_snapshots_replay_mlsd(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = SnapshotStore(tmp_dir)
+            recorded = self.crawl(self.ftp_server.base_url, snapshot_store=store)
+            replayed = RecordingCrawler(base_url=recorded.base_url, parse_pool=None)
+            replayed.replay_store = store
+            replayed.scan_server()
+            store.close()
+            self.assertEqual(len(recorded.files), 20)
+            self.assertEqual(sorted(f["path"] for f in replayed.files), sorted(f["path"] for f in recorded.files))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_pool_limits_and_reuses_connections(self):
+        pool = ftp_listing.FtpPool("127.0.0.1", self.ftp_server.port, size=2)
+        root = "/" + self.config.root + "/"
+        threads = [threading.Thread(target=pool.list_dir, args=(root,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(pool.idle.qsize(), 2)
+        with self.assertRaises(ftplib.error_perm):
+            pool.list_dir("/missing/")
+        self.assertIn("Folder (1999) [Dual] & Tom's 000".encode(), pool.list_dir(root + "Anime 000/"))
+        self.assertLessEqual(pool.idle.qsize(), 2)
+        pool.close()
+        self.assertEqual(pool.idle.qsize(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import sys
+import os
+import io
+import contextlib
+import json
+import tempfile
+import shutil
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core import h5ai
+from src.core.crawler import Crawler
+from src.core.snapshot_store import SnapshotStore
+
+PAGE = "http://127.0.0.1/DHAKA-FLIX-9/Anime/"
+
+class RecordingCrawler(Crawler):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.files = []
+        self.done = []
+        self.progress = []
+
+    def on_progress(self, message):
+        self.progress.append(message)
+
+    def on_file(self, data):
+        self.files.append(data)
+
+    def on_directory_done(self, root, url, ok, children):
+        self.done.append((url, ok))
+
+class TestParseItems(unittest.TestCase):
+    def test_batch_response(self):
+        body = json.dumps({"items": [
+            {"href": "/DHAKA-FLIX-9/", "time": 0, "size": None, "fetched": True},
+            {"href": "/DHAKA-FLIX-9/Anime/", "time": 0, "size": None, "fetched": True},
+            {"href": "/DHAKA-FLIX-9/Movies/", "time": 0, "size": None, "fetched": False}, # Sibling
+            {"href": "/DHAKA-FLIX-9/Anime/One%20Piece/", "time": 1000, "size": None, "fetched": True},
+            {"href": "/DHAKA-FLIX-9/Anime/Naruto/", "time": 2000, "size": None, "fetched": False},
+            {"href": "/DHAKA-FLIX-9/Anime/Intro.mkv", "time": 1672531200000, "size": 42, "fetched": False},
+            {"href": "/DHAKA-FLIX-9/Anime/One%20Piece/Episode%20001.mkv", "time": 5000, "size": 7},
+            {"href": "/DHAKA-FLIX-9/Anime/One%20Piece/Season%201/", "time": 0, "fetched": False},
+        ]}).encode()
+        listings = h5ai.parse_items(body, PAGE)
+        self.assertEqual([url for url, _ in listings], [PAGE, PAGE + "One%20Piece/"])
+        folder = {entry[0]: entry for entry in listings[0][1]}
+        self.assertEqual(set(folder), {PAGE + "One%20Piece/", PAGE + "Naruto/", PAGE + "Intro.mkv"})
+        self.assertEqual(folder[PAGE + "Intro.mkv"], (PAGE + "Intro.mkv", "Intro.mkv", False, 42, 1672531200))
+        self.assertEqual(sorted(e[1] for e in listings[1][1]), ["Episode 001.mkv", "Season 1"])
+
+    def test_subfolders_keep_server_spelling(self):
+        body = json.dumps({"items": [
+            {"href": "/DHAKA-FLIX-9/Anime/Movie%20(2020)%20[1080p]/", "time": 0, "fetched": True},
+            {"href": "/DHAKA-FLIX-9/Anime/Movie%20(2020)%20[1080p]/a%20(1).mkv", "time": 0, "size": 1},
+        ]}).encode()
+        listings = h5ai.parse_items(body, PAGE)
+        self.assertEqual(listings[1][0], PAGE + "Movie%20(2020)%20[1080p]/")
+        self.assertEqual([e[0] for e in listings[1][1]], [PAGE + "Movie%20(2020)%20[1080p]/a%20(1).mkv"])
+
+    def test_not_h5ai(self):
+        for body in (b"<html>Index of /</html>", b'{"error": "x"}', b"[]"):
+            with self.assertRaises(ValueError):
+                h5ai.parse_items(body, PAGE)
+
+    def test_request_body(self):
+        self.assertEqual(json.loads(h5ai.request_body(PAGE)),
+                         {"action": "get", "items": {"href": "/DHAKA-FLIX-9/Anime/", "what": 2}})
+
+class TestH5aiCrawl(unittest.TestCase):
+    def crawl(self, style, listing_mode="auto", **attrs):
+        config = SyntheticConfig(fanout=3, depth=3, files=54, style=style)
+        server = SyntheticServer(config).start()
+        try:
+            crawler = RecordingCrawler(base_url=server.base_url, parse_pool=None)
+            crawler.listing_mode = listing_mode
+            crawler.max_retries = 0
+            for name, value in attrs.items():
+                setattr(crawler, name, value)
+            crawler.scan_server()
+        finally:
+            server.stop()
+        self.assertEqual(crawler.failed_urls, [])
+        return crawler, server.app.requests
+
+    def test_json_matches_html(self):
+        html_crawler, html_requests = self.crawl("h5ai", "html")
+        json_crawler, json_requests = self.crawl("h5ai")
+        # Each crawl had its own server (port); compare paths below the root
+        def relative(crawler):
+            return sorted((f["path"][len(crawler.base_url):], f["parent_dir"][len(crawler.base_url):])
+                          for f in crawler.files)
+        self.assertEqual(relative(json_crawler), relative(html_crawler))
+        self.assertEqual(len(json_crawler.files), 54)
+        # JSON has exact sizes, the HTML page only "1024 KB"
+        self.assertTrue(all(f["size"] == 1024 * 1024 for f in json_crawler.files))
+        # Root batch covers level 1, each level-2 batch covers level 3
+        self.assertEqual(html_requests, 1 + 3 + 9 + 27)
+        self.assertEqual(json_requests, 1 + 9)
+        self.assertEqual(sorted((url[len(json_crawler.base_url):], ok) for url, ok in json_crawler.done),
+                         sorted((url[len(html_crawler.base_url):], ok) for url, ok in html_crawler.done))
+        self.assertEqual(json_crawler.metrics.directories, 40)
+        self.assertTrue(all(json_crawler.h5ai_hosts.values()))
+
+    def test_autoindex_falls_back_to_html(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            crawler, requests = self.crawl("apache")
+        self.assertEqual(len(crawler.files), 54)
+        self.assertEqual(requests, 1 + 40) # One refused API probe
+        self.assertFalse(any(crawler.h5ai_hosts.values()))
+        # The refusal is expected: one note, not a "Status 405" error line
+        self.assertNotIn("Status", output.getvalue())
+        self.assertEqual(len([m for m in crawler.progress if "no h5ai API" in m]), 1)
+
+    def test_snapshots_replay_json(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            store = SnapshotStore(tmp_dir)
+            recorded, _ = self.crawl("h5ai", snapshot_store=store)
+            replayed = RecordingCrawler(base_url=recorded.base_url, parse_pool=None)
+            replayed.replay_store = store
+            replayed.scan_server()
+            store.close()
+            self.assertEqual(sorted(f["path"] for f in replayed.files), sorted(f["path"] for f in recorded.files))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import os
+import io
+import json
+import contextlib
+import subprocess
+import tempfile
+import shutil
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.db import DatabaseHandler
+from src import indexer
+
+class TestIndexerCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "cli.db")
+        self.config = SyntheticConfig(fanout=2, depth=2, files=40)
+        self.server = SyntheticServer(self.config).start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_main(self, *args):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = indexer.main(["--db", self.db_path, "--roots", self.server.base_url] + list(args))
+        return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def count_files(self):
+        db = DatabaseHandler(self.db_path)
+        try:
+            return len(db.get_all_files())
+        finally:
+            db.close()
+
+    def test_module_entry_point(self):
+        result = subprocess.run([sys.executable, "-m", "src.indexer", "--db", self.db_path,
+                                 "--roots", self.server.base_url, "--concurrency", "4"],
+                                cwd=parent_dir, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, indexer.EXIT_OK, result.stderr)
+        events = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual(events[0]["event"], "start")
+        self.assertEqual(events[-1]["event"], "finished")
+        self.assertTrue(events[-1]["complete"])
+        self.assertEqual(events[-1]["summary"]["files"], 40)
+        self.assertEqual(self.count_files(), 40)
+
+    def test_failures_then_retry_failed(self):
+        self.config.error_rate = 0.4
+        code, events = self.run_main("--retries", "0", "--parser", "regex")
+        failed = [e for e in events if e["event"] == "directory_failed"]
+        self.assertEqual(code, indexer.EXIT_PARTIAL if failed else indexer.EXIT_OK)
+
+        self.config.error_rate = 0.0
+        code, events = self.run_main("--retry-failed")
+        if failed:
+            self.assertEqual(code, indexer.EXIT_OK)
+            self.assertEqual(events[0]["mode"], "retry")
+        else:
+            self.assertEqual(code, indexer.EXIT_FATAL) # Nothing to retry
+        self.assertEqual(self.count_files(), 40)
+
+    def test_crash_is_fatal_not_interrupted(self):
+        async def broken(crawler, session, root, frontier, visited):
+            raise RuntimeError("engine bug")
+
+        original = indexer.JsonLinesCrawler._crawl_root
+        indexer.JsonLinesCrawler._crawl_root = broken
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                code, events = self.run_main()
+        finally:
+            indexer.JsonLinesCrawler._crawl_root = original
+        # Cron wrappers tell a crash (3) from Ctrl+C (130)
+        self.assertEqual(code, indexer.EXIT_FATAL)
+        self.assertFalse(events[-1]["complete"])
+        self.assertEqual(self.count_files(), 0)
+
+    def test_bad_arguments(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit) as ctx:
+                indexer.main(["--concurrency", "0"])
+        self.assertEqual(ctx.exception.code, indexer.EXIT_USAGE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+import os
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticTree, SyntheticConfig
+from src.core.listing_parser import BACKENDS, parse_listing, parse_meta
+
+APACHE_PAGE = """<table>
+<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td><td><a href="/DHAKA-FLIX-9/">Parent Directory</a></td><td>&nbsp;</td><td align="right">  - </td></tr>
+<tr><td valign="top"><img src="/icons/folder.gif" alt="[DIR]"></td><td><a href="Season%2001/">Season 01/</a></td><td align="right">2024-03-05 18:20  </td><td align="right">  - </td></tr>
+<tr><td valign="top"><img src="/icons/movie.gif" alt="[VID]"></td><td><a href="One%20Piece%20Episode%201000%20%5B1080p%5D.mkv">One Piece Episode 100..&gt;</a></td><td align="right">2024-03-05 18:21  </td><td align="right">1.4G</td></tr>
+</table>"""
+
+NGINX_PAGE = """<pre><a href="../">../</a>
+<a href="Tom%20%26%20Jerry/">Tom &amp; Jerry/</a>                                    01-Jan-2024 12:00       -
+<a href="ep%201.mkv">ep 1.mkv</a>                                          02-Feb-2024 13:14   734003200
+</pre>"""
+
+class TestListingParser(unittest.TestCase):
+    def test_apache_rows(self):
+        for backend in BACKENDS:
+            entries = parse_listing(APACHE_PAGE, backend)
+            self.assertEqual(len(entries), 3, backend)
+            self.assertEqual(entries[1], ("Season%2001/", "Season 01/", None, 1709662800))
+            href, name, size, mtime = entries[2]
+            # Truncated link text falls back to the full name from the href
+            self.assertEqual(name, "One Piece Episode 1000 [1080p].mkv", backend)
+            self.assertEqual(size, int(1.4 * 1024 ** 3))
+
+    def test_nginx_pre_listing(self):
+        for backend in BACKENDS:
+            entries = parse_listing(NGINX_PAGE, backend)
+            self.assertEqual(entries[1][1], "Tom & Jerry/", backend)
+            self.assertEqual(entries[2], ("ep%201.mkv", "ep 1.mkv", 734003200, 1706879640), backend)
+
+    def test_backends_agree_on_synthetic_listings(self):
+        for style in ("apache", "h5ai"):
+            page = SyntheticTree(SyntheticConfig(depth=0, files=200, style=style)).listing([]).decode()
+            expected = parse_listing(page, "regex")
+            self.assertEqual(sum(1 for e in expected if e[2] == 1024 * 1024), 200)
+            for backend in BACKENDS:
+                self.assertEqual(parse_listing(page, backend), expected, f"{style}/{backend}")
+
+    def test_meta_units(self):
+        self.assertEqual(parse_meta("2023-01-01 00:00  512 KB"), (512 * 1024, 1672531200))
+        self.assertEqual(parse_meta("2023-01-01 00:00  -"), (None, 1672531200))
+        self.assertEqual(parse_meta("no date here 12M"), (None, None))
+
+if __name__ == "__main__":
+    unittest.main()
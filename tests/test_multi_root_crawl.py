@@ -0,0 +1,64 @@
+import sys
+import os
+import tempfile
+import shutil
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.db import DatabaseHandler
+from src.core.http_client import HttpClient, root_label
+
+class TestMultiRootCrawl(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        self.servers = [
+            SyntheticServer(SyntheticConfig(root="DHAKA-FLIX-7", fanout=2, depth=2, files=20, latency=0.01)).start(),
+            SyntheticServer(SyntheticConfig(root="DHAKA-FLIX-12", fanout=3, depth=1, files=30, style="h5ai")).start(),
+        ]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def test_roots_are_crawled_into_one_index(self):
+        roots = [server.base_url for server in self.servers]
+        tmp_dir = tempfile.mkdtemp()
+        db = DatabaseHandler(os.path.join(tmp_dir, "multi.db"))
+        try:
+            client = HttpClient(roots=roots)
+            client.per_host_limit = 4
+            generations = {root: db.begin_crawl(root) for root in roots}
+            client.file_found_signal.connect(lambda d: db.add_file(
+                d['path'], d['filename'], d['parent_dir'], d['size'], d['mtime'],
+                generations[d['root']], d['root']))
+            client.directory_done_signal.connect(
+                lambda root, url, ok, children: db.frontier_done(generations[root], url, ok, children))
+            client.scan_server()
+            db.commit()
+
+            self.assertEqual(dict(db.get_server_counts()), {roots[0]: 20, roots[1]: 30})
+            # Separate progress per root, plus the crawl-wide total
+            self.assertEqual(client.root_metrics[roots[0]].files, 20)
+            self.assertEqual(client.root_metrics[roots[0]].directories, 7)
+            self.assertEqual(client.root_metrics[roots[1]].directories, 4)
+            self.assertEqual(client.metrics.files, 50)
+            for root, generation in generations.items():
+                db.finish_crawl(generation, client.crawl_complete())
+                self.assertIsNone(db.get_resumable_crawl(root))
+            self.assertEqual(len(db.get_all_files()), 50)
+        finally:
+            db.close()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def test_root_label(self):
+        self.assertEqual(root_label("http://172.16.50.7/DHAKA-FLIX-7/"), "DHAKA-FLIX-7")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import os
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from src.ui.player import PropertyThrottle
+
+class FakeMPV:
+    def __init__(self):
+        self.observers = {}
+
+    def observe_property(self, name, handler):
+        self.observers[name] = handler
+
+class TestPropertyThrottle(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        self.mpv = FakeMPV()
+        self.throttle = PropertyThrottle(rate_hz=4)
+        self.received = []
+        self.throttle.observe(self.mpv, 'time-pos', self.received.append)
+
+    def test_bursts_are_coalesced_to_latest_value(self):
+        for i in range(60):
+            self.mpv.observers['time-pos']('time-pos', i / 10)
+        self.throttle.flush()
+        self.assertEqual(self.received, [5.9])
+
+    def test_unchanged_and_none_values_are_dropped(self):
+        self.mpv.observers['time-pos']('time-pos', 1.0)
+        self.throttle.flush()
+        self.mpv.observers['time-pos']('time-pos', 1.0)
+        self.throttle.flush()
+        self.mpv.observers['time-pos']('time-pos', None)
+        self.throttle.flush()
+        self.assertEqual(self.received, [1.0])
+
+if __name__ == "__main__":
+    unittest.main()
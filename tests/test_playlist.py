@@ -0,0 +1,115 @@
+import sys
+import os
+import io
+import contextlib
+import tempfile
+import shutil
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from src.core.db import DatabaseHandler
+from src.core import playlist
+from src import playlist as playlist_cli
+
+SHOW = "http://172.16.50.9/DHAKA-FLIX-9/Anime/One%20Piece%20(1999)/" # Apache leaves ( ) unencoded
+
+class TestPlaylist(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "playlist.db")
+        self.db = DatabaseHandler(self.db_path)
+        # Inserted out of order; names sort wrong as plain strings
+        for season in (10, 2, 9):
+            folder = f"{SHOW}Season%20{season}/"
+            for episode in (10, 2, 1):
+                name = f"One Piece S{season:02d} Episode {episode}.mkv"
+                self.db.add_file(folder + name.replace(' ', '%20'), name, folder)
+        self.db.add_file(SHOW + "Movie.mp4", "Movie.mp4", SHOW)
+        self.db.add_file("http://172.16.50.9/DHAKA-FLIX-9/Anime/Naruto/Naruto 1.mkv", "Naruto 1.mkv",
+                         "http://172.16.50.9/DHAKA-FLIX-9/Anime/Naruto/")
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def names(self, rows):
+        return [filename for _, filename, _ in rows]
+
+    def test_natural_order(self):
+        rows = playlist.collect(self.db, folder=SHOW)
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(self.names(rows)[:4], ["Movie.mp4", "One Piece S02 Episode 1.mkv",
+                                                "One Piece S02 Episode 2.mkv", "One Piece S02 Episode 10.mkv"])
+        self.assertEqual(self.names(rows)[-1], "One Piece S10 Episode 10.mkv")
+
+    def test_season_ranges(self):
+        self.assertEqual(playlist.parse_seasons("16-"), (16, None))
+        self.assertEqual(playlist.parse_seasons("3"), (3, 3))
+        self.assertEqual(playlist.parse_seasons("2-5"), (2, 5))
+        with self.assertRaises(ValueError):
+            playlist.parse_seasons("5-2")
+        rows = playlist.collect(self.db, folder=SHOW, seasons=(9, None))
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(self.names(rows)[0].startswith("One Piece S09"))
+        rows = playlist.collect(self.db, folder=SHOW, seasons=(2, 2))
+        self.assertEqual(len(rows), 3)
+
+    def test_folder_spelling(self):
+        # Unencoded and without the trailing slash, as pasted from a browser, or fully encoded
+        for folder in ("http://172.16.50.9/DHAKA-FLIX-9/Anime/One Piece (1999)",
+                       "http://172.16.50.9/DHAKA-FLIX-9/Anime/One%20Piece%20%281999%29/"):
+            rows = playlist.collect(self.db, folder=folder)
+            self.assertEqual(len(rows), 10)
+            self.assertEqual(rows[0][0], SHOW + "Movie.mp4")
+        rows = playlist.collect(self.db, folder="http://172.16.50.9/DHAKA-FLIX-9/Anime/One%20Piece%20%281999%29/",
+                                seasons=(10, 10))
+        self.assertEqual(len(rows), 3)
+
+    def test_search(self):
+        rows = playlist.collect(self.db, query="episode 2")
+        self.assertEqual(self.names(rows), ["One Piece S02 Episode 2.mkv", "One Piece S09 Episode 2.mkv",
+                                            "One Piece S10 Episode 2.mkv"])
+
+    def test_m3u_with_local_files(self):
+        kept = os.path.join(self.tmp_dir, "kept.mkv")
+        open(kept, "wb").close()
+        folder = f"{SHOW}Season%202/"
+        self.db.mark_downloaded(folder + "One%20Piece%20S02%20Episode%201.mkv", kept)
+        self.db.mark_downloaded(folder + "One%20Piece%20S02%20Episode%202.mkv", os.path.join(self.tmp_dir, "gone.mkv"))
+        output = os.path.join(self.tmp_dir, "out.m3u8")
+        count = playlist.export_playlist(self.db, output, folder=folder, prefer_local=True, title="One Piece")
+        self.assertEqual(count, 3)
+        with open(output, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, [
+            "#EXTM3U",
+            "#PLAYLIST:One Piece",
+            "#EXTINF:-1,One Piece S02 Episode 1",
+            kept,
+            "#EXTINF:-1,One Piece S02 Episode 2",
+            folder + "One%20Piece%20S02%20Episode%202.mkv", # Download no longer on disk
+            "#EXTINF:-1,One Piece S02 Episode 10",
+            folder + "One%20Piece%20S02%20Episode%2010.mkv",
+        ])
+
+    def test_command_line(self):
+        output = os.path.join(self.tmp_dir, "cli.m3u")
+        with contextlib.redirect_stdout(io.StringIO()):
+            code = playlist_cli.main(["--db", self.db_path, "--folder", SHOW, "--seasons", "10-", "-o", output])
+        self.assertEqual(code, playlist_cli.EXIT_OK)
+        with open(output, encoding="utf-8") as f:
+            self.assertEqual(f.read().count("#EXTINF"), 3)
+        with contextlib.redirect_stderr(io.StringIO()):
+            code = playlist_cli.main(["--db", self.db_path, "--search", "no such show", "-o", output])
+            self.assertEqual(code, playlist_cli.EXIT_FATAL)
+            with self.assertRaises(SystemExit) as ctx:
+                playlist_cli.main(["--db", self.db_path, "--search", "x", "--seasons", "1", "-o", output])
+        self.assertEqual(ctx.exception.code, playlist_cli.EXIT_USAGE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys
+import os
+import tempfile
+import shutil
+import unittest
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.db import DatabaseHandler
+from src.core.http_client import HttpClient
+
+class TestResumableCrawl(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseHandler(os.path.join(self.tmp_dir, "resume.db"))
+        # 1 + 3 + 9 directories, 90 files in the leaves
+        self.server = SyntheticServer(SyntheticConfig(fanout=3, depth=2, files=90)).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_client(self, generation, stop_after=None):
+        client = HttpClient(base_url=self.server.base_url)
+        client.concurrency = 2
+        client.file_found_signal.connect(lambda d: self.db.add_file(
+            d['path'], d['filename'], d['parent_dir'], d['size'], d['mtime'], generation))
+        done = []
+        def on_done(root, url, ok, children):
+            self.db.frontier_done(generation, url, ok, children)
+            done.append(url)
+            if stop_after and len(done) == stop_after:
+                client.stop()
+        client.directory_done_signal.connect(on_done)
+        return client, done
+
+    def test_stopped_crawl_resumes_where_it_left_off(self):
+        root = self.server.base_url
+        generation = self.db.begin_crawl(root)
+        client, first_run = self.make_client(generation, stop_after=5)
+        client.scan_server()
+        self.assertFalse(client.crawl_complete())
+        self.db.finish_crawl(generation, False)
+
+        resumable = self.db.get_resumable_crawl(root)
+        self.assertIsNotNone(resumable)
+        self.assertEqual(resumable[0], generation)
+        pending, visited = self.db.resume_crawl(generation)
+        self.assertEqual(set(first_run) & {url for url, _ in pending}, set())
+
+        client, second_run = self.make_client(generation)
+        client.scan_server(resume={root: (pending, visited)})
+        self.assertTrue(client.crawl_complete())
+        # Every directory listed exactly once across both runs
+        self.assertEqual(len(first_run) + len(second_run), 13)
+        self.assertEqual(set(first_run) & set(second_run), set())
+        self.assertEqual(len(self.db.get_all_files()), 90)
+
+        self.db.finish_crawl(generation, True)
+        self.assertIsNone(self.db.get_resumable_crawl(root))
+
+    def test_new_crawl_abandons_unfinished_one(self):
+        root = self.server.base_url
+        old = self.db.begin_crawl(root)
+        self.assertEqual(self.db.get_resumable_crawl(root), (old, 1))
+        new = self.db.begin_crawl(root)
+        self.assertEqual(self.db.get_resumable_crawl(root), (new, 1))
+
+    def test_retry_keeps_stopped_crawl_resumable(self):
+        root = self.server.base_url
+        stopped = self.db.begin_crawl(root)
+        self.db.finish_crawl(stopped, False)
+        retry = self.db.begin_crawl(root, seeds=[(root + "Anime%20000/", 1)])
+        self.db.finish_crawl(retry, True)
+        self.assertEqual(self.db.get_resumable_crawl(root), (stopped, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import os
+import io
+import json
+import contextlib
+import asyncio
+import tempfile
+import shutil
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.crawler import Crawler
+from src.core.db import DatabaseHandler
+from src.core.snapshot_store import SnapshotStore
+from src import indexer
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_round_trip_and_dedup(self):
+        store = SnapshotStore(os.path.join(self.tmp_dir, "snap"))
+        body = b"<html>" + b"<a href='x.mkv'>x.mkv</a>" * 500 + b"</html>"
+        digest = store.put("http://h/A/", body, "utf-8")
+        self.assertEqual(store.put("http://h/B/", body, "utf-8"), digest) # Same content, one object
+        self.assertEqual((store.stored, store.deduplicated), (1, 1))
+        store.close()
+
+        store = SnapshotStore(os.path.join(self.tmp_dir, "snap"))
+        self.assertEqual(store.get("http://h/B/"), (body, "utf-8"))
+        self.assertIsNone(store.get("http://h/C/"))
+        self.assertEqual(store.count(), 2)
+        path = store._find_object(digest)
+        self.assertLess(os.path.getsize(path), len(body) / 10) # Compressed
+        store.close()
+
+    def test_reindex_from_snapshots_matches_crawl(self):
+        snapshots = os.path.join(self.tmp_dir, "snap")
+        server = SyntheticServer(SyntheticConfig(fanout=3, depth=2, files=60)).start()
+        root = server.base_url
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                code = indexer.main(["--db", os.path.join(self.tmp_dir, "live.db"), "--roots", root,
+                                     "--snapshots", snapshots])
+        finally:
+            server.stop()
+        self.assertEqual(code, indexer.EXIT_OK)
+
+        # Server gone: the rebuild only reads the snapshots
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = indexer.main(["--db", os.path.join(self.tmp_dir, "replay.db"), "--roots", root,
+                                 "--from-snapshots", snapshots])
+        self.assertEqual(code, indexer.EXIT_OK)
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(events[0]["mode"], "replay")
+
+        live = DatabaseHandler(os.path.join(self.tmp_dir, "live.db"))
+        replay = DatabaseHandler(os.path.join(self.tmp_dir, "replay.db"))
+        try:
+            rows = lambda db: sorted((r[0], r[1], r[2], r[5], r[6]) for r in db.get_all_files())
+            self.assertEqual(len(rows(replay)), 60)
+            self.assertEqual(rows(replay), rows(live))
+        finally:
+            live.close()
+            replay.close()
+
+    def test_snapshots_are_written_off_the_event_loop(self):
+        class RecordingStore(SnapshotStore):
+            def put(self, url, body, encoding=None):
+                try:
+                    asyncio.get_running_loop()
+                    self.on_loop = getattr(self, "on_loop", 0) + 1
+                except RuntimeError:
+                    pass
+                return super().put(url, body, encoding)
+
+        store = RecordingStore(os.path.join(self.tmp_dir, "snap"))
+        server = SyntheticServer(SyntheticConfig(fanout=2, depth=2, files=8)).start()
+        try:
+            crawler = Crawler(base_url=server.base_url, parse_pool=None)
+            crawler.on_progress = lambda message: None
+            crawler.snapshot_store = store
+            crawler.scan_server()
+        finally:
+            server.stop()
+        self.assertEqual(store.count(), 7)
+        self.assertFalse(hasattr(store, "on_loop"))
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+import threading
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from src.core.stream_proxy import StreamProxy
+from src.core.prefetcher import Prefetcher
+from src.core.sparse_file import SparseFileMap
+
+PAYLOAD = bytes(range(256)) * 4096 # 1 MiB of predictable bytes
+
+class RangeHandler(BaseHTTPRequestHandler):
+    requests_served = 0
+    payload = PAYLOAD
+    etag = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        RangeHandler.requests_served += 1
+        payload = RangeHandler.payload
+        start, end = 0, len(payload) - 1
+        header = self.headers.get('Range')
+        if header:
+            start_s, _, end_s = header[len('bytes='):].partition('-')
+            start = int(start_s)
+            end = min(int(end_s), end) if end_s else end
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(payload)}')
+        else:
+            self.send_response(200)
+        if RangeHandler.etag:
+            self.send_header('ETag', RangeHandler.etag)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(payload[start:end + 1])
+
+class TestStreamProxy(unittest.TestCase):
+    def setUp(self):
+        RangeHandler.requests_served = 0
+        RangeHandler.payload = PAYLOAD
+        RangeHandler.etag = None
+        self.upstream = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        threading.Thread(target=self.upstream.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.upstream.server_address[1]}/Movies/video.mkv"
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.proxy = StreamProxy(self.cache_dir, chunk_size=64 * 1024, read_ahead=0)
+        self.proxy.start()
+
+    def restart_proxy(self):
+        """A new session on the same cache directory, like the next app start."""
+        self.proxy.stop()
+        self.proxy = StreamProxy(self.cache_dir, chunk_size=64 * 1024, read_ahead=0)
+        self.proxy.start()
+
+    def fetch(self, start, end):
+        req = urllib.request.Request(self.proxy.url_for(self.url),
+                                     headers={'Range': f'bytes={start}-{end}'})
+        with urllib.request.urlopen(req) as response:
+            self.assertEqual(response.status, 206)
+            return response.read()
+
+    def test_range_served_through_proxy(self):
+        self.assertEqual(self.fetch(1000, 200000), PAYLOAD[1000:200001])
+
+    def test_inverted_range_serves_whole_file(self):
+        req = urllib.request.Request(self.proxy.url_for(self.url), headers={'Range': 'bytes=500-100'})
+        with urllib.request.urlopen(req) as response:
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.headers['Content-Length'], str(len(PAYLOAD)))
+            self.assertEqual(response.read(), PAYLOAD)
+
+    def test_repeat_range_hits_cache(self):
+        self.fetch(0, 100000)
+        served = RangeHandler.requests_served
+        self.assertEqual(self.fetch(10, 90000), PAYLOAD[10:90001])
+        self.assertEqual(RangeHandler.requests_served, served)
+
+    def test_replaced_file_is_not_served_from_cache(self):
+        RangeHandler.etag = '"v1"'
+        self.fetch(0, 100000)
+        # Next session, file unchanged: one probe, the chunks come from the cache
+        self.restart_proxy()
+        served = RangeHandler.requests_served
+        self.assertEqual(self.fetch(0, 100000), PAYLOAD[:100001])
+        self.assertEqual(RangeHandler.requests_served, served + 1)
+        # A new release under the same URL: the old chunks are dropped
+        RangeHandler.payload = bytes(reversed(PAYLOAD))
+        RangeHandler.etag = '"v2"'
+        self.restart_proxy()
+        self.assertEqual(self.fetch(0, 100000), RangeHandler.payload[:100001])
+        self.assertEqual(self.proxy.get_meta(self.url)["etag"], '"v2"')
+
+    def test_cache_evicts_under_cap(self):
+        self.proxy.cache.max_bytes = 128 * 1024
+        self.fetch(0, len(PAYLOAD) - 1)
+        self.assertLessEqual(self.proxy.cache.total_bytes, 128 * 1024)
+
+    def test_concurrent_fetches_are_coalesced(self):
+        threads = [threading.Thread(target=self.proxy.get_chunk, args=(self.url, 3)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # One probe for the size plus a single fetch of the chunk
+        self.assertEqual(RangeHandler.requests_served, 2)
+
+    def test_prefetcher_warms_head_of_next_item(self):
+        prefetcher = Prefetcher(self.proxy, prefetch_mb=1, max_rate=0)
+        prefetcher.prefetch(self.url)
+        for _ in range(50):
+            if self.proxy.cache.has(self.url, 15):
+                break
+            time.sleep(0.1)
+        prefetcher.stop()
+        self.assertTrue(all(self.proxy.cache.has(self.url, i) for i in range(16)))
+
+    def test_partial_download_is_shared(self):
+        partial_path = os.path.join(self.cache_dir, "partial.mkv")
+        with open(partial_path, 'wb') as f:
+            f.write(PAYLOAD[:100000])
+        ranges = SparseFileMap()
+        ranges.add(0, 100000)
+        self.proxy.partial_source = lambda url: (partial_path, ranges, len(PAYLOAD))
+
+        self.assertEqual(self.proxy.get_chunk(self.url, 0), PAYLOAD[:65536])
+        served = RangeHandler.requests_served
+        # Chunk 1 is half on disk: only the missing tail goes to the network
+        self.assertEqual(self.proxy.get_chunk(self.url, 1), PAYLOAD[65536:131072])
+        self.assertEqual(RangeHandler.requests_served, served + 1)
+
+    def tearDown(self):
+        self.proxy.stop()
+        self.upstream.shutdown()
+        self.upstream.server_close()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+class TestSparseFileMap(unittest.TestCase):
+    def test_ranges_merge_and_report_gaps(self):
+        ranges = SparseFileMap()
+        ranges.add(0, 10)
+        ranges.add(20, 30)
+        ranges.add(10, 15)
+        self.assertTrue(ranges.covers(0, 15))
+        self.assertFalse(ranges.covers(0, 20))
+        self.assertEqual(ranges.missing(5, 40), [(15, 20), (30, 40)])
+        self.assertEqual(ranges.total(), 25)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import os
+import unittest
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from src.core.stream_tuning import AdaptiveCacheTuner, MB
+
+class TestAdaptiveCacheTuner(unittest.TestCase):
+    def test_slow_link_gets_deep_buffer_within_budget(self):
+        tuner = AdaptiveCacheTuner(memory_budget=256 * MB)
+        tuner.observe(cache_speed=1.1 * MB)
+        settings, _reason = tuner.decide(1 * MB)
+        self.assertEqual(settings['demuxer-max-bytes'], 256 * MB)
+        self.assertEqual(settings['cache-secs'], 256)
+        self.assertEqual(settings['demuxer-readahead-secs'], 256)
+
+    def test_fast_link_keeps_memory_low(self):
+        tuner = AdaptiveCacheTuner()
+        tuner.observe(cache_speed=50 * MB)
+        settings, _reason = tuner.decide(1 * MB)
+        self.assertEqual(settings['demuxer-readahead-secs'], 20)
+        self.assertEqual(settings['demuxer-max-bytes'], 60 * MB)
+
+    def test_small_fluctuations_do_not_reapply(self):
+        tuner = AdaptiveCacheTuner()
+        tuner.observe(cache_speed=10 * MB)
+        self.assertIsNotNone(tuner.decide(1 * MB))
+        tuner.observe(cache_speed=11 * MB)
+        self.assertIsNone(tuner.decide(1 * MB))
+
+    def test_full_cache_does_not_count_as_bandwidth(self):
+        tuner = AdaptiveCacheTuner()
+        tuner.observe(cache_speed=50 * MB, demuxer_cache_state={'cache-duration': 5, 'underrun': False},
+                      readahead_secs=60)
+        # Read-ahead reached: mpv reads at the 1 MB/s bitrate, which says nothing about the link
+        for state in ({'cache-duration': 59, 'underrun': False}, {'cache-duration': 300, 'eof': True},
+                      {'cache-duration': 40, 'idle': True}):
+            tuner.observe(cache_speed=1 * MB, demuxer_cache_state=state, readahead_secs=60)
+        self.assertEqual(tuner.speed, 50 * MB)
+        settings, _reason = tuner.decide(1 * MB)
+        self.assertEqual(settings['demuxer-readahead-secs'], 20)
+        # An underrun is a real measurement even with seconds buffered
+        tuner.observe(cache_speed=1 * MB, demuxer_cache_state={'cache-duration': 59, 'underrun': True},
+                      readahead_secs=60)
+        self.assertLess(tuner.speed, 50 * MB)
+
+    def test_no_decision_without_measurements(self):
+        tuner = AdaptiveCacheTuner()
+        self.assertIsNone(tuner.decide(1 * MB))
+        tuner.observe(cache_speed=5 * MB)
+        self.assertIsNone(tuner.decide(None))
+
+if __name__ == "__main__":
+    unittest.main()
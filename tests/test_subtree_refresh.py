@@ -0,0 +1,155 @@
+import sys
+import os
+import tempfile
+import shutil
+import unittest
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src.core.crawler import Crawler
+from src.core.db import DatabaseHandler
+from src.core.index_writer import IndexWriter
+from src.ui.browser import FileBrowser
+
+# Widgets need a full QApplication; create it before other tests make a QCoreApplication
+app = QApplication.instance() or QApplication(sys.argv)
+
+class QuietCrawler(Crawler):
+    def on_progress(self, message):
+        pass
+
+class TestSubtreeRefresh(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseHandler(os.path.join(self.tmp_dir, "refresh.db"))
+        self.writer = IndexWriter(self.db)
+        # 2 categories x 2 folders, 2 episodes each
+        self.config = SyntheticConfig(fanout=2, depth=2, files=8, etags=True)
+        self.server = SyntheticServer(self.config).start()
+        self.root = self.server.base_url
+        self.crawler = QuietCrawler(base_url=self.root, parse_pool=None)
+        self.crawler.max_retries = 0
+        self.leaf = self.root + "Anime%20000/Folder%20001/"
+
+    def tearDown(self):
+        self.server.stop()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_refresh_builds_then_revalidates(self):
+        diff = self.writer.refresh(self.crawler, self.root, depth=2)
+        self.assertEqual((diff["listed"], diff["not_modified"], diff["failed"]), (7, 0, 0))
+        self.assertEqual(len(diff["added"]), 8)
+        self.assertEqual(len(self.db.get_all_files()), 8)
+
+        # Nothing changed: every folder answers 304 and nothing is re-parsed or written
+        diff = self.writer.refresh(self.crawler, self.root, depth=2)
+        self.assertEqual((diff["listed"], diff["not_modified"]), (0, 7))
+        self.assertEqual((diff["added"], diff["updated"], diff["removed"]), ([], [], []))
+        self.assertEqual(self.crawler.metrics.report()["status_counts"], {"304": 7})
+        self.assertEqual(self.crawler.metrics.errors, 0)
+
+    def test_new_and_deleted_episodes(self):
+        self.writer.refresh(self.crawler, self.root, depth=2)
+        self.config.files = 10 # Leaves 0 and 1 get a third episode
+        diff = self.writer.refresh(self.crawler, self.leaf, depth=0)
+        self.assertEqual(diff["listed"], 1)
+        self.assertEqual([row[0] for row in diff["added"]], [self.leaf + "Episode%2000002.mkv"])
+        self.assertEqual(diff["added"][0][3], self.leaf)
+
+        self.config.files = 4 # One episode per leaf
+        diff = self.writer.refresh(self.crawler, self.root, depth=2)
+        self.assertEqual(diff["listed"], 4) # Only the leaves changed
+        self.assertEqual(len(diff["removed"]), 5)
+        self.assertEqual(len(self.db.get_all_files()), 4)
+
+    def test_downloaded_files_survive(self):
+        self.writer.refresh(self.crawler, self.root, depth=2)
+        kept = self.leaf + "Episode%2000001.mkv"
+        self.db.mark_downloaded(kept, "/tmp/kept.mkv")
+        self.config.files = 4
+        diff = self.writer.refresh(self.crawler, self.leaf, depth=0)
+        self.assertNotIn(kept, diff["removed"])
+        self.assertEqual(self.db.get_local_path(kept), "/tmp/kept.mkv")
+
+    def test_vanished_folder_removes_subtree(self):
+        self.writer.refresh(self.crawler, self.root, depth=2)
+        gone = self.root + "Anime%20000/Folder%20009/"
+        self.db.add_file(gone + "Old.mkv", "Old.mkv", gone)
+        # Forget the validators, as if the folder had been listed before Folder 009 was deleted
+        self.db.set_directory_validators(self.root + "Anime%20000/", None, None, None)
+        self.db.commit()
+        diff = self.writer.refresh(self.crawler, self.root + "Anime%20000/", depth=0)
+        self.assertEqual(diff["removed"], [gone + "Old.mkv"])
+
+    def test_without_validators_unchanged_listings_are_skipped(self):
+        self.config.etags = False
+        self.writer.refresh(self.crawler, self.root, depth=2)
+        diff = self.writer.refresh(self.crawler, self.root, depth=2)
+        self.assertEqual((diff["listed"], diff["not_modified"]), (0, 7))
+
+    def test_unreachable_folder_is_kept(self):
+        self.writer.refresh(self.crawler, self.root, depth=2)
+        self.server.stop()
+        diff = self.writer.refresh(self.crawler, self.leaf, depth=0)
+        self.assertEqual(diff["failed"], 1)
+        self.assertEqual(len(self.db.get_all_files()), 8)
+
+class TestTreeDiff(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseHandler(os.path.join(self.tmp_dir, "tree.db"))
+        self.folder = "http://h/DHAKA-FLIX-9/Anime/Show/"
+        self.db.add_file(self.folder + "E1.mkv", "E1.mkv", self.folder, 10, 100)
+        self.db.add_file(self.folder + "E2.mkv", "E2.mkv", self.folder, 10, 100)
+        self.db.commit()
+        self.browser = FileBrowser(self.db)
+        self.browser.search_thread.wait()
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def tree_paths(self):
+        folder_item = self.browser.find_folder_item("Anime", self.folder)
+        if folder_item is None:
+            return []
+        return [folder_item.child(i).data(0, Qt.ItemDataRole.UserRole) for i in range(folder_item.childCount())]
+
+    def test_apply_diff(self):
+        new_folder = "http://h/DHAKA-FLIX-9/Series/New/"
+        diff = {
+            "added": [(self.folder + "E3.mkv", "E3.mkv", "Anime", self.folder, 0, 20, 200),
+                      (new_folder + "S1.mkv", "S1.mkv", "Series", new_folder, 0, 5, 300)],
+            "updated": [(self.folder + "E2.mkv", "E2.mkv", "Anime", self.folder, 0, 99, 100)],
+            "removed": [self.folder + "E1.mkv"],
+        }
+        self.browser.apply_diff(diff)
+        self.assertEqual(self.tree_paths(), [self.folder + "E2.mkv", self.folder + "E3.mkv"])
+        e2 = self.browser.find_folder_item("Anime", self.folder).child(0)
+        self.assertEqual(e2.text(2), "99 B")
+        self.assertIsNotNone(self.browser.find_folder_item("Series", new_folder))
+
+        self.browser.apply_diff({"added": [], "updated": [], "removed": self.tree_paths()})
+        self.assertIsNone(self.browser.find_folder_item("Anime", self.folder))
+
+    def test_playlist_is_the_selected_files_folder(self):
+        other = "http://h/DHAKA-FLIX-9/Anime/Other/"
+        self.db.add_file(other + "O1.mkv", "O1.mkv", other, 10, 100)
+        self.db.mark_downloaded(self.folder + "E2.mkv", "/tmp/E2.mkv")
+        self.browser.load_tree()
+        self.browser.tabs.setCurrentIndex(1)
+        folder_item = self.browser.find_folder_item("Anime", self.folder)
+        self.browser.file_tree.setCurrentItem(folder_item.child(0))
+        self.assertEqual(self.browser.get_current_items(),
+                         [(self.folder + "E1.mkv", None), (self.folder + "E2.mkv", "/tmp/E2.mkv")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import os
+import subprocess
+import unittest
+import urllib.error
+import urllib.request
+from PyQt6.QtCore import QCoreApplication
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig, file_bytes
+from src.core.http_client import HttpClient
+
+class TestSyntheticServer(unittest.TestCase):
+    def setUp(self):
+        self.app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    def crawl(self, server, **kwargs):
+        client = HttpClient(base_url=server.base_url, **kwargs)
+        found = []
+        client.file_found_signal.connect(found.append)
+        client.scan_server()
+        return found
+
+    def test_crawler_finds_every_generated_file(self):
+        for mode in ("threaded", "asyncio"):
+            for style in ("apache", "h5ai"):
+                config = SyntheticConfig(fanout=3, depth=2, files=50, style=style)
+                server = SyntheticServer(config, mode=mode).start()
+                try:
+                    found = self.crawl(server)
+                finally:
+                    server.stop()
+                self.assertEqual(len(found), 50, f"{mode}/{style}")
+                self.assertEqual(len({f['path'] for f in found}), 50)
+
+    def test_offloaded_parsing_matches_inline(self):
+        config = SyntheticConfig(fanout=2, depth=1, files=400)
+        server = SyntheticServer(config).start()
+        try:
+            inline = self.crawl(server, parse_pool=None)
+            for pool in ("thread", "process"):
+                offloaded = self.crawl(server, parse_pool=pool, offload_threshold=0)
+                self.assertEqual(sorted(f['path'] for f in offloaded),
+                                 sorted(f['path'] for f in inline), pool)
+        finally:
+            server.stop()
+
+    def test_parser_workers_skip_the_ui(self):
+        # Spawned workers run the app's main script as __mp_main__; Qt must stay unloaded there
+        probe = ("import runpy, sys; runpy.run_path('src/main.py', run_name='__mp_main__'); "
+                 "print(sorted(m for m in sys.modules if m.startswith(('PyQt6', 'src.ui'))))")
+        output = subprocess.run([sys.executable, "-c", probe], cwd=parent_dir, capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_crawl_metrics_are_recorded(self):
+        server = SyntheticServer(SyntheticConfig(fanout=2, depth=2, files=8)).start()
+        client = HttpClient(base_url=server.base_url)
+        try:
+            client.scan_server()
+        finally:
+            server.stop()
+        report = client.metrics.report()
+        self.assertEqual(report["directories"], 7)
+        self.assertEqual(report["files"], 8)
+        self.assertEqual(report["links"], 6 + 8) # Subfolders and files seen while parsing
+        self.assertGreater(report["bytes"], 0)
+        self.assertGreater(report["fetch_p95_ms"], 0)
+        self.assertEqual(len(report["slowest_directories"]), 7)
+
+    def test_range_requests(self):
+        server = SyntheticServer(SyntheticConfig(depth=0, files=1, file_size=300000)).start()
+        try:
+            req = urllib.request.Request(server.base_url + "Episode%2000000.mkv",
+                                         headers={'Range': 'bytes=1000-1999'})
+            with urllib.request.urlopen(req) as response:
+                self.assertEqual(response.status, 206)
+                self.assertEqual(response.read(), b"".join(file_bytes(1000, 1999)))
+        finally:
+            server.stop()
+
+    def test_error_injection(self):
+        server = SyntheticServer(SyntheticConfig(error_rate=1.0)).start()
+        try:
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(server.base_url)
+            self.assertEqual(ctx.exception.code, 503)
+        finally:
+            server.stop()
+
+if __name__ == "__main__":
+    unittest.main()
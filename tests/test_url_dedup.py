@@ -0,0 +1,169 @@
+import sys
+import os
+import io
+import json
+import contextlib
+import tempfile
+import shutil
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure src is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from synthetic_server import SyntheticServer, SyntheticConfig
+from src import indexer
+from src.core.crawler import Crawler
+from src.core.db import DatabaseHandler
+from src.core.url_dedup import VisitedSet, canonical_url
+
+# Every folder links to the others under several spellings
+LISTINGS = {
+    "/R/": ['A/', './A/', '/R/A/', '%41/', 'a/', '../R/A/', 'B%20%26%20C/', 'B & C/', 'B%20&%20C/'],
+    "/R/A/": ['/R/', '/R/A/', 'x.mkv', '../B%20%26%20C/', 'Movie%20(2020)%20[1080p]/'],
+    "/R/A/Movie%20(2020)%20[1080p]/": ['a%20(1).mkv', '../Movie%20%282020%29%20%5B1080p%5D/'],
+    "/R/B%20%26%20C/": ['/R/A/', 'y.mkv', '../A/'],
+}
+
+class DuplicateLinkHandler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        key = canonical_url("http://h" + self.path.split("?")[0]).lower()
+        DuplicateLinkHandler.hits[key] = DuplicateLinkHandler.hits.get(key, 0) + 1
+        links = next((v for k, v in LISTINGS.items() if canonical_url("http://h" + k).lower() == key), None)
+        if links is None:
+            self.send_error(404)
+            return
+        body = "<html><body>" + "".join(f'<a href="{href}">{href}</a>' for href in links) + "</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+class CollectingCrawler(Crawler):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.files = []
+
+    def on_progress(self, message):
+        pass
+
+    def on_file(self, data):
+        self.files.append(data['path'])
+
+class TestCanonicalUrl(unittest.TestCase):
+    def test_equivalent_spellings(self):
+        expected = "http://172.16.50.9/DHAKA-FLIX-9/Tom%20%26%20Jerry/"
+        for url in ["http://172.16.50.9/DHAKA-FLIX-9/Tom%20%26%20Jerry/",
+                    "HTTP://172.16.50.9:80/DHAKA-FLIX-9/Tom & Jerry/",
+                    "http://172.16.50.9/DHAKA-FLIX-9/./Movies/../Tom%20&%20Jerry/",
+                    "http://172.16.50.9//DHAKA-FLIX-9//Tom%20%26%20Jerry/?C=N;O=D#top"]:
+            self.assertEqual(canonical_url(url), expected)
+
+    def test_keeps_meaningful_parts(self):
+        self.assertEqual(canonical_url("http://h:8080/a%2Fb/"), "http://h:8080/a%2Fb/")
+        self.assertEqual(canonical_url("http://h/file.mkv"), "http://h/file.mkv")
+
+class TestVisitedSet(unittest.TestCase):
+    def test_exact(self):
+        visited = VisitedSet()
+        self.assertTrue(visited.add("http://h/R/A/"))
+        self.assertFalse(visited.add("http://h/R/./a/"))
+        self.assertIn("http://h/R/%41/", visited)
+        self.assertNotIn("http://h/R/B/", visited)
+        self.assertEqual(len(visited), 1)
+
+    def test_case_sensitive(self):
+        visited = VisitedSet(fold_case=False)
+        visited.add("http://h/R/A/")
+        self.assertTrue(visited.add("http://h/R/a/"))
+
+    def test_bloom(self):
+        visited = VisitedSet(bloom_capacity=5000)
+        urls = [f"http://h/R/{i}/" for i in range(5000)]
+        self.assertTrue(all(visited.add(url) for url in urls[:2500]))
+        self.assertFalse(any(visited.add(url) for url in urls[:2500]))
+        # 0.1% target; allow generous slack
+        false_positives = sum(url in visited for url in urls[2500:])
+        self.assertLess(false_positives, 25)
+
+class TestCrawlDedup(unittest.TestCase):
+    def setUp(self):
+        DuplicateLinkHandler.hits = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), DuplicateLinkHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.root = f"http://127.0.0.1:{self.server.server_address[1]}/R/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def crawl(self, **attrs):
+        crawler = CollectingCrawler(base_url=self.root, parse_pool=None)
+        crawler.max_retries = 0
+        for name, value in attrs.items():
+            setattr(crawler, name, value)
+        crawler.scan_server()
+        return crawler
+
+    def test_each_directory_fetched_once(self):
+        crawler = self.crawl()
+        self.assertEqual(sorted(DuplicateLinkHandler.hits.values()), [1, 1, 1, 1])
+        self.assertEqual(len(crawler.files), 3)
+        self.assertEqual(crawler.failed_urls, [])
+        self.assertGreater(crawler.metrics.duplicates, 0)
+        self.assertEqual(crawler.metrics.summary()["duplicates_skipped"], crawler.metrics.duplicates)
+
+    def test_bloom_visited_set(self):
+        crawler = self.crawl(bloom_capacity=1000)
+        self.assertEqual(sorted(DuplicateLinkHandler.hits.values()), [1, 1, 1, 1])
+        self.assertEqual(len(crawler.files), 3)
+
+    def test_server_spelling_is_kept(self):
+        # Only the dedup key is canonical; the index keeps the URLs the server links to
+        crawler = self.crawl()
+        self.assertIn(self.root + "A/Movie%20(2020)%20[1080p]/a%20(1).mkv", crawler.files)
+
+class TestBloomDoesNotSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "bloom.db")
+        self.server = SyntheticServer(SyntheticConfig(fanout=3, depth=2, files=90)).start()
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_main(self, *args):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            code = indexer.main(["--db", self.db_path, "--roots", self.server.base_url] + list(args))
+        return code, json.loads(out.getvalue().splitlines()[-1])
+
+    def count_files(self):
+        db = DatabaseHandler(self.db_path)
+        try:
+            return len(db.get_all_files())
+        finally:
+            db.close()
+
+    def test_false_positives_keep_indexed_files(self):
+        self.assertEqual(self.run_main()[0], indexer.EXIT_OK)
+        self.assertEqual(self.count_files(), 90)
+        # Sized for one folder, the filter is saturated: most folders look seen and are skipped
+        code, finished = self.run_main("--bloom-capacity", "1")
+        self.assertEqual(code, indexer.EXIT_OK)
+        self.assertLess(finished["summary"]["files"], 90)
+        self.assertEqual(finished["removed"], 0)
+        self.assertEqual(self.count_files(), 90)
+
+if __name__ == "__main__":
+    unittest.main()